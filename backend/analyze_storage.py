@@ -1,20 +1,69 @@
+"""
+Storage analysis of the plant image store.
+
+    python analyze_storage.py [--workers 8] [--full]
+
+Walks the image store with os.scandir in a thread pool, one task per shard
+directory, and keeps what it found in an SQLite index next to the report.
+A directory whose mtime is unchanged since the last run is not re-listed
+file by file, and an unchanged leaf directory is not opened at all: store
+files are written once and atomically renamed into place, which always
+updates their directory's mtime. Originals and thumbnails are named by
+their SHA-256 digest; any other file is hashed once and its digest cached.
+Totals, duplicates (files sharing a digest) and per-category sizes are SQL
+aggregates over the index, so memory use does not grow with the number of
+files. Growth is projected from the history of previous runs, or from
+recent file mtimes on the first run.
+"""
+
+import argparse
 import os
 import json
+import hashlib
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import pandas as pd
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 import asyncio
 import aiohttp
-import aiofiles
-from datetime import datetime
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import SessionLocal
+# Import every model so relationship() string references resolve
+from app.models import feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+from app.models.plant import PlantSpecies
+from app.models.plant_image import PlantImage
+from app.services.image_store import ImageStore, is_digest
+
+DAY_NS = 86_400 * 10**9
+# Runs kept in the report for growth projection
+HISTORY_LENGTH = 50
+PROJECTION_DAYS = (30, 90, 365)
+
+# (relative directory, mtime_ns, has subdirectories, [(name, size, mtime_ns, kind, digest)])
+Listing = Tuple[str, int, bool, List[Tuple[str, int, int, str, str]]]
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class StorageAnalyzer:
-    def __init__(self):
-        self.base_dir = Path(__file__).parent / 'app' / 'data'
-        self.images_dir = self.base_dir / 'plant_images'
-        self.images_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, store: Optional[ImageStore] = None, base_dir: Optional[Path] = None,
+                 plant_list_path: Optional[Path] = None, workers: int = 8):
+        self.base_dir = Path(base_dir) if base_dir else Path(__file__).parent / 'app' / 'data'
+        self.store = store or ImageStore()
+        self.plant_list_path = Path(plant_list_path) if plant_list_path else self.base_dir / 'common_plants.json'
         self.storage_report_path = self.base_dir / 'storage_analysis.json'
-        
+        self.index_path = self.base_dir / 'storage_index.sqlite3'
+        self.workers = workers
+
     async def download_and_analyze_image(
         self,
         image_url: str,
@@ -25,108 +74,280 @@ class StorageAnalyzer:
         try:
             async with session.get(image_url) as response:
                 if response.status == 200:
-                    # Create a unique filename
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    safe_name = "".join(c if c.isalnum() else "_" for c in plant_name)
-                    filename = f"{safe_name}_{timestamp}.jpg"
-                    filepath = self.images_dir / filename
-                    
-                    # Save the image
+                    # Stored under its SHA-256 digest, so a re-download is not saved twice
                     image_data = await response.read()
-                    async with aiofiles.open(filepath, 'wb') as f:
-                        await f.write(image_data)
-                    
+                    digest, written = await asyncio.to_thread(self.store.put, image_data)
+
                     return {
-                        'file_path': str(filepath),
+                        'content_hash': digest,
+                        'file_path': ImageStore.relative_path(digest),
                         'file_size': len(image_data),
-                        'content_type': response.headers.get('content-type', 'image/jpeg')
+                        'content_type': response.headers.get('content-type', 'image/jpeg'),
+                        'deduplicated': not written
                     }
         except Exception as e:
             print(f"Error downloading image for {plant_name}: {e}")
             return None
-        
-    async def analyze_storage_requirements(self):
-        """Analyze storage requirements for plant images"""
-        # Load plant list
-        with open(self.base_dir / 'common_plants.json', 'r') as f:
-            plant_data = json.load(f)
-        
-        storage_data = {
-            'total_size_bytes': 0,
-            'total_images': 0,
-            'images_per_category': {},
-            'size_per_category': {},
-            'plant_details': []
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            for category, plants in plant_data.items():
-                storage_data['images_per_category'][category] = 0
-                storage_data['size_per_category'][category] = 0
-                
-                for plant in plants:
-                    plant_name = plant['common_name']
-                    scientific_name = plant['scientific_name']
-                    
-                    # Simulate getting 3 images per plant
-                    # In production, this would use PlantNet API
-                    sample_image_sizes = [
-                        500_000,  # 500KB
-                        750_000,  # 750KB
-                        1_000_000 # 1MB
-                    ]
-                    
-                    plant_total_size = sum(sample_image_sizes)
-                    storage_data['total_size_bytes'] += plant_total_size
-                    storage_data['total_images'] += len(sample_image_sizes)
-                    storage_data['images_per_category'][category] += len(sample_image_sizes)
-                    storage_data['size_per_category'][category] += plant_total_size
-                    
-                    storage_data['plant_details'].append({
-                        'name': plant_name,
-                        'scientific_name': scientific_name,
-                        'category': category,
-                        'estimated_size_bytes': plant_total_size,
-                        'num_images': len(sample_image_sizes)
-                    })
-        
-        # Convert to more readable format
-        analysis = {
-            'summary': {
-                'total_storage_mb': round(storage_data['total_size_bytes'] / (1024 * 1024), 2),
-                'total_images': storage_data['total_images'],
-                'average_image_size_kb': round(storage_data['total_size_bytes'] / storage_data['total_images'] / 1024, 2)
-            },
-            'categories': {
-                category: {
-                    'total_mb': round(size / (1024 * 1024), 2),
-                    'num_images': count
-                }
-                for category, (size, count) in zip(
-                    storage_data['size_per_category'].keys(),
-                    zip(storage_data['size_per_category'].values(), storage_data['images_per_category'].values())
-                )
-            },
-            'plants': storage_data['plant_details']
+
+    def _open_index(self, full: bool) -> sqlite3.Connection:
+        if full and self.index_path.exists():
+            self.index_path.unlink()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        index = sqlite3.connect(self.index_path)
+        index.executescript("""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, has_subdirs INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS files (
+                dir TEXT NOT NULL, name TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,
+                kind TEXT NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (dir, name));
+            CREATE INDEX IF NOT EXISTS ix_files_digest ON files (digest);
+        """)
+        return index
+
+    def _classify(self, relative_dir: str, entry: os.DirEntry) -> Tuple[str, str]:
+        """(kind, digest) of a file; only files not named by their digest are read"""
+        if relative_dir.split('/', 1)[0] == 'thumbs':
+            stem = entry.name.split('.', 1)[0]
+            if is_digest(stem):
+                return 'thumbnail', stem
+        elif is_digest(entry.name):
+            return 'original', entry.name
+        return 'other', _file_digest(entry.path)
+
+    def _walk(self, top: str, known: Dict[str, Tuple[int, int]]) -> Tuple[List[str], List[Listing]]:
+        """Every directory under top, and listings of those that changed since the last run"""
+        seen, changed = [], []
+        prefix = len(str(self.store.root)) + 1
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            relative = directory[prefix:].replace(os.sep, '/')
+            seen.append(relative)
+            mtime_ns = os.stat(directory).st_mtime_ns
+            previous_mtime, had_subdirs = known.get(relative, (None, True))
+            unchanged = previous_mtime == mtime_ns
+            # Same mtime means the same entries, so an unchanged leaf needs no listing at all
+            if unchanged and not had_subdirs:
+                continue
+            files, has_subdirs = [], False
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        has_subdirs = True
+                    elif not unchanged and entry.is_file(follow_symlinks=False) and not entry.name.startswith('.tmp-'):
+                        stat = entry.stat(follow_symlinks=False)
+                        files.append((entry.name, stat.st_size, stat.st_mtime_ns, *self._classify(relative, entry)))
+            if not unchanged:
+                changed.append((relative, mtime_ns, has_subdirs, files))
+        return seen, changed
+
+    def scan(self, index: sqlite3.Connection) -> Dict:
+        """Bring the index up to date with the store; returns scan statistics"""
+        started = time.perf_counter()
+        known = {path: (mtime_ns, has_subdirs)
+                 for path, mtime_ns, has_subdirs in index.execute("SELECT path, mtime_ns, has_subdirs FROM dirs")}
+        root = self.store.root
+        root.mkdir(parents=True, exist_ok=True)
+        # One task per shard; thumbnails are split by size and shard as well, so no
+        # single task walks most of the store. Containers above the shards hold no files.
+        containers, tops = ['.'], []
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.name != 'thumbs':
+                    tops.append(entry.path)
+                    continue
+                containers.append('thumbs')
+                with os.scandir(entry.path) as sizes:
+                    for size in sizes:
+                        if size.is_dir(follow_symlinks=False):
+                            containers.append(f'thumbs/{size.name}')
+                            with os.scandir(size.path) as shards:
+                                tops.extend(s.path for s in shards if s.is_dir(follow_symlinks=False))
+        seen_all = set(containers)
+        rescanned = files_listed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for seen, changed in pool.map(lambda top: self._walk(top, known), tops):
+                seen_all.update(seen)
+                for relative, mtime_ns, has_subdirs, files in changed:
+                    index.execute("DELETE FROM files WHERE dir = ?", (relative,))
+                    index.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?)",
+                                      ((relative, *file) for file in files))
+                    index.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?)", (relative, mtime_ns, has_subdirs))
+                    rescanned += 1
+                    files_listed += len(files)
+        # Directories that disappeared since the last run
+        vanished = [(path,) for path in known.keys() - seen_all]
+        index.executemany("DELETE FROM files WHERE dir = ?", vanished)
+        index.executemany("DELETE FROM dirs WHERE path = ?", vanished)
+        index.commit()
+        return {
+            'directories': len(seen_all),
+            'rescanned_directories': rescanned,
+            'files_listed': files_listed,
+            'seconds': round(time.perf_counter() - started, 3),
         }
-        
+
+    def _load_plant_list(self) -> List[Tuple[str, str, str]]:
+        """(category, scientific name, common name) of every plant in the list"""
+        if not self.plant_list_path.exists():
+            return []
+        with open(self.plant_list_path, 'r') as f:
+            plant_data = json.load(f)
+        return [(category, plant['scientific_name'], plant['common_name'])
+                for category, plants in plant_data.items() for plant in plants]
+
+    def _image_species(self) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """(digest, species name, scientific name) of every image row, streamed from the database"""
+        db = SessionLocal()
+        try:
+            rows = (db.query(PlantImage.content_hash, PlantSpecies.name, PlantSpecies.scientific_name)
+                    .join(PlantSpecies, PlantSpecies.id == PlantImage.plant_species_id)
+                    .filter(PlantImage.content_hash.isnot(None))
+                    .execution_options(yield_per=1000))
+            yield from rows
+        except SQLAlchemyError as e:
+            print(f"Image categories unavailable, database not readable: {e}")
+        finally:
+            db.close()
+
+    def _categorize(self, index: sqlite3.Connection, categories: Dict[str, str]) -> set:
+        """Fill a temp digest -> category table; returns the names of species that have images"""
+        index.execute("CREATE TEMP TABLE digest_category (digest TEXT PRIMARY KEY, category TEXT NOT NULL)")
+        with_images = set()
+        batch = []
+        for digest, name, scientific_name in self._image_species():
+            category = categories.get(scientific_name) or categories.get(name) or 'uncategorized'
+            with_images.update((name, scientific_name))
+            batch.append((digest, category))
+            if len(batch) >= 1000:
+                index.executemany("INSERT OR IGNORE INTO digest_category VALUES (?, ?)", batch)
+                batch = []
+        index.executemany("INSERT OR IGNORE INTO digest_category VALUES (?, ?)", batch)
+        return with_images
+
+    def _growth(self, index: sqlite3.Connection, history: List[Dict], total_bytes: int) -> float:
+        """Bytes added per day: across previous runs when they span a day, else from recent mtimes"""
+        now = time.time()
+        for snapshot in history:
+            days = (now - snapshot['at']) / 86_400
+            if days >= 1:
+                return max(total_bytes - snapshot['total_bytes'], 0) / days
+        since = time.time_ns() - 30 * DAY_NS
+        recent = index.execute("SELECT COALESCE(SUM(size), 0) FROM files WHERE mtime_ns >= ?", (since,)).fetchone()[0]
+        return recent / 30
+
+    def analyze(self, full: bool = False) -> Dict:
+        """Scan the store and write the storage report"""
+        index = self._open_index(full)
+        try:
+            scan = self.scan(index)
+            kinds = {kind: (count, size) for kind, count, size in index.execute(
+                "SELECT kind, COUNT(*), SUM(size) FROM files GROUP BY kind")}
+            total_files, total_bytes = index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+            # Every copy of a digest beyond the first is reclaimable; a thumbnail is
+            # named by its source's digest, not its own, so thumbnails are left out
+            duplicate_files, duplicate_bytes, duplicated_digests = index.execute("""
+                SELECT COALESCE(SUM(copies - 1), 0), COALESCE(SUM(size * (copies - 1)), 0), COUNT(*)
+                FROM (SELECT digest, COUNT(*) AS copies, MAX(size) AS size
+                      FROM files WHERE kind != 'thumbnail' GROUP BY digest HAVING COUNT(*) > 1)
+            """).fetchone()
+
+            plant_list = self._load_plant_list()
+            categories = {}
+            for category, scientific_name, common_name in plant_list:
+                categories.setdefault(scientific_name, category)
+                categories.setdefault(common_name, category)
+            with_images = self._categorize(index, categories)
+            by_category = {
+                category: {'total_mb': round(size / (1024 * 1024), 2), 'num_images': images, 'num_files': count}
+                for category, count, images, size in index.execute("""
+                    SELECT COALESCE(c.category, 'unreferenced'), COUNT(*),
+                           SUM(f.kind = 'original'), SUM(f.size)
+                    FROM files f LEFT JOIN digest_category c ON c.digest = f.digest
+                    GROUP BY 1 ORDER BY 1
+                """)
+            }
+
+            originals, original_bytes = kinds.get('original', (0, 0))
+            report = json.loads(self.storage_report_path.read_text()) if self.storage_report_path.exists() else {}
+            history = report.get('history', [])
+            bytes_per_day = self._growth(index, history, total_bytes)
+            # Plants in the list without an image yet, at the current average per imaged plant
+            imaged = sum(1 for _, scientific, common in plant_list if {scientific, common} & with_images)
+            missing = len(plant_list) - imaged
+            per_plant = total_bytes / imaged if imaged else 0
+
+            analysis = {
+                'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'store': str(self.store.root),
+                'summary': {
+                    'total_storage_mb': round(total_bytes / (1024 * 1024), 2),
+                    'total_files': total_files,
+                    'total_images': originals,
+                    'total_thumbnails': kinds.get('thumbnail', (0, 0))[0],
+                    'other_files': kinds.get('other', (0, 0))[0],
+                    'average_image_size_kb': round(original_bytes / originals / 1024, 2) if originals else 0,
+                    'duplicate_files': duplicate_files,
+                    'duplicated_digests': duplicated_digests,
+                    'duplicate_mb': round(duplicate_bytes / (1024 * 1024), 2),
+                },
+                'categories': by_category,
+                'growth': {
+                    'bytes_per_day': round(bytes_per_day),
+                    'projected_mb': {
+                        f'{days}_days': round((total_bytes + bytes_per_day * days) / (1024 * 1024), 2)
+                        for days in PROJECTION_DAYS
+                    },
+                    'plants_without_images': missing,
+                    'catalog_complete_mb': round((total_bytes + missing * per_plant) / (1024 * 1024), 2),
+                },
+                'scan': scan,
+                'history': [{'at': time.time(), 'total_bytes': total_bytes, 'files': total_files},
+                            *history][:HISTORY_LENGTH],
+            }
+        finally:
+            index.close()
+
         # Save analysis
         with open(self.storage_report_path, 'w') as f:
             json.dump(analysis, f, indent=2)
-        
-        # Create a pandas DataFrame for better visualization
-        df = pd.DataFrame(storage_data['plant_details'])
-        print("\nStorage Analysis Summary:")
-        print("========================")
-        print(f"Total Storage Required: {analysis['summary']['total_storage_mb']:.2f} MB")
-        print(f"Total Number of Images: {analysis['summary']['total_images']}")
-        print(f"Average Image Size: {analysis['summary']['average_image_size_kb']:.2f} KB")
-        print("\nStorage by Category:")
-        for category, details in analysis['categories'].items():
-            print(f"{category}: {details['total_mb']:.2f} MB ({details['num_images']} images)")
-        
         return analysis
 
+    async def analyze_storage_requirements(self, full: bool = False):
+        """Analyze storage requirements for plant images"""
+        analysis = await asyncio.to_thread(self.analyze, full)
+        print_summary(analysis)
+        return analysis
+
+
+def print_summary(analysis: Dict):
+    summary, growth, scan = analysis['summary'], analysis['growth'], analysis['scan']
+    print("\nStorage Analysis Summary:")
+    print("========================")
+    print(f"Total Storage Used: {summary['total_storage_mb']:.2f} MB in {summary['total_files']} files")
+    print(f"Images: {summary['total_images']} originals, {summary['total_thumbnails']} thumbnails, "
+          f"{summary['other_files']} other files")
+    print(f"Average Image Size: {summary['average_image_size_kb']:.2f} KB")
+    print(f"Duplicates: {summary['duplicate_files']} files ({summary['duplicate_mb']:.2f} MB reclaimable)")
+    print("\nStorage by Category:")
+    for category, details in analysis['categories'].items():
+        print(f"{category}: {details['total_mb']:.2f} MB ({details['num_images']} images)")
+    print("\nProjected Growth:")
+    for horizon, megabytes in growth['projected_mb'].items():
+        print(f"{horizon.replace('_', ' ')}: {megabytes:.2f} MB")
+    print(f"All {growth['plants_without_images']} remaining plants imaged: {growth['catalog_complete_mb']:.2f} MB")
+    print(f"\nScanned {scan['directories']} directories ({scan['rescanned_directories']} changed) "
+          f"in {scan['seconds']:.2f}s")
+
+
 if __name__ == "__main__":
-    analyzer = StorageAnalyzer()
-    asyncio.run(analyzer.analyze_storage_requirements())
+    parser = argparse.ArgumentParser(description="Analyze disk usage of the plant image store")
+    parser.add_argument("--workers", type=int, default=8, help="directory scanning threads")
+    parser.add_argument("--full", action="store_true", help="discard the index and rescan every directory")
+    args = parser.parse_args()
+    analyzer = StorageAnalyzer(workers=args.workers)
+    asyncio.run(analyzer.analyze_storage_requirements(args.full))
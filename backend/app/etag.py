@@ -0,0 +1,176 @@
+"""
+Conditional GET support for read-heavy endpoints.
+
+Every cacheable resource belongs to a scope: ("garden", id) for anything
+stored against a garden, ("catalog",) for the plant catalog. Each scope has a
+version row in cache_versions that is bumped inside any transaction that
+writes to it, so the new version becomes visible together with the data. The
+ETag is derived from that version and the request URL, so an If-None-Match
+check is one primary-key lookup and a 304 is returned before the endpoint
+runs any queries or spatial work.
+
+    @router.get("/features/", dependencies=[conditional_get(garden_scope)])
+
+Versions live in the database, so every worker process serves the same tags.
+"""
+
+import hashlib
+from itertools import chain
+from typing import Callable, Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import event, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.metrics import registry
+from app.models.cache_version import CacheVersion
+
+# Clients may store responses but must revalidate before reuse
+CACHE_CONTROL = "private, no-cache"
+
+CATALOG_SCOPE = ("catalog",)
+
+# Session.info key holding scopes already bumped in the current transaction
+_BUMPED_KEY = "etag_bumped_scopes"
+
+conditional_requests = registry.counter(
+    "http_conditional_requests_total",
+    "Requests to ETag-enabled endpoints by outcome",
+    labelnames=("endpoint", "result"),
+)
+etag_hit_ratio = registry.gauge(
+    "http_etag_hit_ratio",
+    "Share of requests to ETag-enabled endpoints answered with 304",
+    labelnames=("endpoint",),
+)
+
+
+_versions = CacheVersion.__table__
+
+
+def _key(scope: tuple) -> str:
+    return ":".join(str(part) for part in scope)
+
+
+class ResourceVersions:
+    """Version counter per cache scope, read and bumped on the caller's connection"""
+
+    def get(self, connection, scope: tuple) -> int:
+        version = connection.execute(select(_versions.c.version).where(_versions.c.scope == _key(scope))).scalar()
+        return version or 0
+
+    def bump(self, connection, scopes: Iterable[tuple]):
+        dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+        # In key order, so concurrent writers lock the rows in the same order
+        for key in sorted(_key(scope) for scope in scopes):
+            connection.execute(
+                dialect.insert(_versions).values(scope=key, version=1).on_conflict_do_update(
+                    index_elements=[_versions.c.scope], set_={"version": _versions.c.version + 1}
+                )
+            )
+
+
+resource_versions = ResourceVersions()
+
+
+def scopes_for(obj) -> set:
+    """Cache scopes touched by writing a model instance"""
+    table = getattr(obj, "__tablename__", None)
+    if table == "gardens":
+        return {("garden", obj.id)}
+    if table == "plant_species":
+        return {CATALOG_SCOPE}
+    if not hasattr(obj, "garden_id"):
+        return set()
+    # Include the previous garden when a row is moved between gardens
+    history = inspect(obj).attrs.garden_id.history
+    garden_ids = {obj.garden_id, *history.deleted}
+    return {("garden", garden_id) for garden_id in garden_ids if garden_id is not None}
+
+
+def mark_changed(session: Session, *scopes: tuple):
+    """Record writes the ORM cannot see (bulk statements, raw SQL) for the current transaction"""
+    bumped = session.info.setdefault(_BUMPED_KEY, set())
+    scopes = set(scopes) - bumped
+    if scopes:
+        # Once per scope and transaction; the row stays locked until commit
+        resource_versions.bump(session.connection(), scopes)
+        bumped.update(scopes)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_scopes(session, flush_context):
+    # new/dirty/deleted still describe the flushed objects at this point
+    for obj in chain(session.new, session.dirty, session.deleted):
+        scopes = scopes_for(obj)
+        if scopes:
+            mark_changed(session, *scopes)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_bumped_scopes(session):
+    # A rollback undoes the bumps along with the writes
+    session.info.pop(_BUMPED_KEY, None)
+
+
+def garden_scope(request: Request) -> Optional[tuple]:
+    """Scope for endpoints taking garden_id as a path or query parameter"""
+    value = request.path_params.get("garden_id", request.query_params.get("garden_id"))
+    try:
+        return ("garden", int(value))
+    except (TypeError, ValueError):
+        return None  # Let the endpoint's own validation report it
+
+
+def catalog_scope(request: Request) -> tuple:
+    return CATALOG_SCOPE
+
+
+def make_etag(scope: tuple, request: Request, version: int) -> str:
+    # Different query strings are different representations, so they get different tags
+    variant = repr((scope, request.url.path, sorted(request.query_params.multi_items())))
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def conditional_get(scope_for: Callable[[Request], Optional[tuple]]):
+    """Route dependency adding ETag/Cache-Control and answering matching If-None-Match with 304"""
+
+    def check(request: Request, response: Response, db: Session = Depends(get_db)):
+        scope = scope_for(request)
+        if scope is None:
+            return
+        # The endpoint shares this session, so a 200 reads on the same connection
+        etag = make_etag(scope, request, resource_versions.get(db.connection(), scope))
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", request.url.path)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            result = "not_modified"
+        else:
+            result = "modified" if if_none_match else "unconditional"
+        conditional_requests.inc(endpoint=endpoint, result=result)
+        hits = conditional_requests.value(endpoint=endpoint, result="not_modified")
+        total = hits + sum(
+            conditional_requests.value(endpoint=endpoint, result=r) for r in ("modified", "unconditional")
+        )
+        etag_hit_ratio.set(hits / total, endpoint=endpoint)
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if result == "not_modified":
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    return Depends(check)
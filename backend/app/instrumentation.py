@@ -0,0 +1,222 @@
+"""
+Request-level instrumentation.
+
+MetricsMiddleware is a plain ASGI middleware (no BaseHTTPMiddleware, so no
+extra task or body buffering per request). It records per-route latency,
+status and response size, and the number of requests in flight. Routes are
+labelled by their template ("/api/gardens/{garden_id}"), and unmatched paths
+share one label, so series stay bounded no matter what clients request.
+
+Each request also gets a RequestStats object in a context variable. The
+engine hooks below add every statement's count and duration to it. FastAPI
+runs sync endpoints and dependencies in threads that copy the context, so
+their queries are attributed to the request too.
+
+Calls to external APIs are timed per upstream and counted by response
+status. aiohttp sessions take a trace config that does this for every request
+they send; other clients wrap each call in upstream_call():
+
+    aiohttp.ClientSession(trace_configs=[upstream_trace("census")])
+
+    with upstream_call("brevo") as call:
+        response = requests.post(url, json=data)
+        call.status = response.status_code
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.lazy_imports import lazy_module
+from app.metrics import registry
+
+aiohttp = lazy_module("aiohttp")
+
+# Route label for requests that matched no route (404s, scanners)
+UNMATCHED_ROUTE = "<unmatched>"
+
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route and response status",
+    labelnames=("method", "route", "status"),
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    labelnames=("method", "route"),
+)
+http_response_bytes = registry.histogram(
+    "http_response_size_bytes",
+    "Response body sizes",
+    labelnames=("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    labelnames=("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+request_db_seconds = registry.histogram(
+    "http_request_db_seconds",
+    "Time spent executing database statements per request",
+    labelnames=("method", "route"),
+)
+db_queries = registry.counter(
+    "db_queries_total",
+    "Database statements executed, inside requests or not",
+)
+upstream_seconds = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Time spent on calls to external APIs",
+    labelnames=("upstream",),
+)
+upstream_requests = registry.counter(
+    "upstream_requests_total",
+    "Calls to external APIs by response status; error when no response arrived",
+    labelnames=("upstream", "status"),
+)
+
+
+class RequestStats:
+    """Database work done on behalf of one request"""
+
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being served, or None outside a request"""
+    return _request_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    db_queries.inc_at(())
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - context._query_started
+
+
+def route_label(scope) -> str:
+    # Routing stores the matched route in the scope. Routes of an included router
+    # keep their unprefixed path there; FastAPI's route context has the full one
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records latency, status, size and database work of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            # Live-update websockets keep their own metrics
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            kind = message["type"]
+            if kind == "http.response.body":
+                size += len(message.get("body", b""))
+            elif kind == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            _request_stats.reset(token)
+            # Label values built once and passed positionally; this runs on every request
+            key = (scope["method"], route_label(scope))
+            http_requests.inc_at(key + (str(status),))
+            http_request_seconds.observe_at(key, elapsed)
+            http_response_bytes.observe_at(key, size)
+            request_db_queries.observe_at(key, stats.queries)
+            request_db_seconds.observe_at(key, stats.db_seconds)
+
+
+def _record_upstream(upstream: str, started: float, status):
+    upstream_seconds.observe(time.perf_counter() - started, upstream=upstream)
+    upstream_requests.inc(upstream=upstream, status=status)
+
+
+class UpstreamCall:
+    """Set status to the response's status code inside upstream_call()"""
+
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status: Optional[int] = None
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """Time one call to an external API (usda, census, plantnet, brevo, ...)"""
+    call = UpstreamCall()
+    started = time.perf_counter()
+    try:
+        yield call
+    finally:
+        _record_upstream(upstream, started, call.status if call.status is not None else "error")
+
+
+@lru_cache(maxsize=None)
+def upstream_trace(upstream: str) -> "aiohttp.TraceConfig":
+    """aiohttp trace config recording every request of a session as upstream"""
+
+    async def on_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_end(session, context, params):
+        # Fires once the response headers arrive
+        _record_upstream(upstream, context.started, params.response.status)
+
+    async def on_exception(session, context, params):
+        _record_upstream(upstream, context.started, "error")
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    trace.on_request_exception.append(on_exception)
+    trace.freeze()
+    return trace
@@ -0,0 +1,78 @@
+"""
+Deferred imports for heavy dependencies.
+
+Modules that only a few endpoints need (the HTTP client, Pillow, pysolar,
+pyproj, ...) are bound at module level to a placeholder that imports the real
+module on first attribute access, so importing the app, and every worker
+and test process, does not pay for them:
+
+    aiohttp = lazy_module("aiohttp")
+    ...
+    async with aiohttp.ClientSession() as session:  # imported here, once
+
+Every placeholder is registered, so preload() can import them all ahead of
+the first request that needs one; main.py runs it in a background thread
+shortly after startup when IMPORT_WARMUP is enabled.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+import types
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Names of every module bound through lazy_module(), in registration order
+HEAVY_MODULES: Dict[str, None] = {}
+
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module until one of its attributes is used"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_loaded"] = False
+
+    def _load(self) -> types.ModuleType:
+        module = importlib.import_module(self.__name__)
+        with _lock:
+            if not self.__dict__["_lazy_loaded"]:
+                # Later lookups find the attributes directly and skip __getattr__
+                self.__dict__.update(module.__dict__)
+                self.__dict__["_lazy_loaded"] = True
+        return module
+
+    def __getattr__(self, attribute: str):
+        return getattr(self._load(), attribute)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_loaded"] else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """The module if something already imported it, otherwise a placeholder"""
+    HEAVY_MODULES[name] = None
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def preload(names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Import heavy modules now; seconds taken per module, 0 for ones already loaded"""
+    timings = {}
+    for name in list(names if names is not None else HEAVY_MODULES):
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning("Could not preload %s: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - started
+    return timings
@@ -1,8 +1,60 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import math
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import gardens, plants, features, auth
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import SQLAlchemyError
+from app.database import SessionLocal
+from app.instrumentation import MetricsMiddleware
+from app.lazy_imports import preload
+from app.metrics import registry
+# Import every model so relationship() string references resolve
+from app.models import cache_version, feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+from app.profiling import ProfilingMiddleware
+from app.routers import admin, gardens, grid_simple, images, plants, features, auth
+from app.services.image_store import thumbnails
+from app.services.plant_catalog import catalog_store
+
+logger = logging.getLogger(__name__)
+
+# Import the lazily loaded dependencies in the background once the server is up
+IMPORT_WARMUP = os.getenv("IMPORT_WARMUP", "false").lower() in ("1", "true", "yes")
+IMPORT_WARMUP_DELAY_SECONDS = float(os.getenv("IMPORT_WARMUP_DELAY_SECONDS", "2"))
+
+
+async def warm_up_imports(delay: float = IMPORT_WARMUP_DELAY_SECONDS):
+    # The delay lets the server start accepting requests first; the imports
+    # run in a thread so the event loop keeps serving meanwhile
+    await asyncio.sleep(delay)
+    timings = await asyncio.to_thread(preload)
+    logger.info("Preloaded %d modules in %.2fs", len(timings), sum(timings.values()))
 
-app = FastAPI(title="Garden Yard Planner API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the plant catalog before serving; if the database is not ready yet
+    # the first catalog request builds it instead
+    db = SessionLocal()
+    try:
+        catalog_store.load(db)
+    except SQLAlchemyError as e:
+        logger.warning("Plant catalog not loaded at startup: %s", e)
+    finally:
+        db.close()
+    warmup = asyncio.create_task(warm_up_imports()) if IMPORT_WARMUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    thumbnails.shutdown()
+
+
+app = FastAPI(title="Garden Yard Planner API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -11,14 +63,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag"],
 )
+# Profiles cover everything inside it, down to the endpoint
+app.add_middleware(ProfilingMiddleware)
+# Added last so it is outermost and times CORS handling as well
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(gardens.router, prefix="/api", tags=["gardens"])
+app.include_router(grid_simple.router, prefix="/api", tags=["grid"])
 app.include_router(plants.router, prefix="/api", tags=["plants"])
+app.include_router(images.router, prefix="/api", tags=["images"])
 app.include_router(features.router, prefix="/api", tags=["features"])
 app.include_router(auth.router, prefix="/api", tags=["auth"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+
+@app.exception_handler(RequestValidationError)
+async def request_validation_error(request: Request, exc: RequestValidationError):
+    # The JSON parser accepts NaN and Infinity, which the error body cannot echo
+    # back as numbers, so non-finite inputs are reported as strings
+    errors = jsonable_encoder(exc.errors(), custom_encoder={float: lambda x: x if math.isfinite(x) else str(x)})
+    return JSONResponse(status_code=422, content={"detail": errors})
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Garden Yard Planner API"}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
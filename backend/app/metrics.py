@@ -0,0 +1,205 @@
+"""
+In-process metrics registry for the Garden Planner API.
+
+Counters, gauges and histograms are kept in plain Python structures and
+rendered in the Prometheus text exposition format by the /metrics endpoint.
+Recording a value is a dict update under a lock, so it is cheap enough to
+call from pool events and request handlers.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple([str(labels.get(name, "")) for name in self.labelnames])
+
+    def header(self) -> list:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.inc_at(self._key(labels), amount)
+
+    def inc_at(self, key: LabelValues, amount: float = 1.0):
+        """inc() for label values already in labelnames order, as strings"""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self._callback is not None:
+            return float(self._callback())
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list:
+        lines = self.header()
+        if self._callback is not None:
+            lines.append(f"{self.name} {float(self._callback())}")
+            return lines
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        self.observe_at(self._key(labels), value)
+
+    def observe_at(self, key: LabelValues, value: float):
+        """observe() for label values already in labelnames order, as strings"""
+        # First bucket whose bound is >= value; past the end means only +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0] * len(self.buckets) + [0.0, 0]
+                self._values[key] = series
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def sum(self, **labels) -> float:
+        series = self._values.get(self._key(labels))
+        return series[-2] if series else 0.0
+
+    def render(self) -> list:
+        lines = self.header()
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames + ("le",), key + (repr(float(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            base = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{base} {series[-2]}")
+            lines.append(f"{self.name}_count{base} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric by name so modules can share them"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, **kwargs)
+                self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames=labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames=labelnames, callback=callback)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames=labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text format"""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+class CacheVersion(Base):
+    """Version of one ETag cache scope, bumped in every transaction that writes to it (see app/etag.py)"""
+    __tablename__ = "cache_versions"
+
+    scope = Column(String, primary_key=True)  # "garden:<id>" or "catalog"
+    version = Column(Integer, nullable=False)
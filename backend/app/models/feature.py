@@ -1,17 +1,62 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, Index, and_, event, inspect
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.geometry import Geometry, load_geometry, spatial_index
+from app.models.mixins import VersionedMixin
 
-class Feature(Base):
+BBOX_COLUMNS = ('min_lon', 'min_lat', 'max_lon', 'max_lat')
+
+class Feature(VersionedMixin, Base):
     __tablename__ = "features"
+    __table_args__ = (
+        spatial_index('ix_features_boundary_gist', 'boundary'),
+        Index('ix_features_garden_id_bbox', 'garden_id', 'min_lon', 'min_lat'),
+    )
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    garden_id = Column(Integer, ForeignKey('gardens.id'))
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    garden_id = Column(Integer, ForeignKey('gardens.id'), index=True)
     name = Column(String)
-    boundary = Column(Text)  # GeoJSON string
+    boundary = Column(Geometry())  # GeoJSON string on SQLite, PostGIS geometry on PostgreSQL
     color = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Bounding box of the boundary, kept in sync on write so bbox filters never parse geometry
+    min_lon = Column(Float)
+    min_lat = Column(Float)
+    max_lon = Column(Float)
+    max_lat = Column(Float)
+
     user = relationship('User')
     garden = relationship('Garden')
+
+    @classmethod
+    def bbox_overlaps(cls, bbox):
+        """SQL filter for features whose bounding box overlaps (min_lon, min_lat, max_lon, max_lat)"""
+        min_lon, min_lat, max_lon, max_lat = bbox
+        return and_(
+            cls.min_lon <= max_lon,
+            cls.max_lon >= min_lon,
+            cls.min_lat <= max_lat,
+            cls.max_lat >= min_lat,
+        )
+
+
+def boundary_bbox(boundary) -> dict:
+    """Bounding-box column values for a boundary (all None when there is no geometry)"""
+    geometry = load_geometry(boundary)
+    if geometry is None or geometry.is_empty:
+        return dict.fromkeys(BBOX_COLUMNS)
+    return dict(zip(BBOX_COLUMNS, geometry.bounds))
+
+
+@event.listens_for(Feature, "before_insert")
+def _set_bbox(mapper, connection, target):
+    for column, value in boundary_bbox(target.boundary).items():
+        setattr(target, column, value)
+
+
+@event.listens_for(Feature, "before_update")
+def _update_bbox(mapper, connection, target):
+    if inspect(target).attrs.boundary.history.has_changes():
+        _set_bbox(mapper, connection, target)
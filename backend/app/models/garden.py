@@ -2,22 +2,31 @@ from datetime import datetime, date
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Time, Boolean, JSON, Text
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.geometry import Geometry, spatial_index
+from app.models.mixins import VersionedMixin
 
-# For SQLite development, we'll use TEXT for geometry data instead of PostGIS types
-# In production with PostgreSQL, these would be Geometry types
+# For SQLite development, geometry data is stored as TEXT (GeoJSON or WKT)
+# In production with PostgreSQL, these are native PostGIS geometry columns
 
-class Garden(Base):
+class Garden(VersionedMixin, Base):
     __tablename__ = "gardens"
+    __table_args__ = (spatial_index('ix_gardens_boundary_gist', 'boundary'),)
     
     id = Column(Integer, primary_key=True)
     name = Column(String)
-    user_id = Column(Integer, ForeignKey('users.id'))
-    boundary = Column(Text)  # GeoJSON string for SQLite, Geometry('POLYGON') for PostgreSQL
+    user_id = Column(Integer, ForeignKey('users.id'), index=True)
+    boundary = Column(Geometry())  # GeoJSON/WKT string for SQLite, PostGIS geometry for PostgreSQL
     elevation = Column(Float)
     soil_type = Column(String)
     climate_zone = Column(String)
+    # Average last spring / first fall frost; only month and day are used
+    last_frost_date = Column(Date)
+    first_frost_date = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Change-log entries up to this sequence number have been compacted away
+    changes_compacted_seq = Column(Integer, nullable=False, default=0, server_default="0")
     
+    user = relationship('User', back_populates='gardens')
     zones = relationship('Zone', back_populates='garden')
     plants = relationship('Plant', back_populates='garden')
     weather_data = relationship('WeatherData', back_populates='garden')
@@ -0,0 +1,20 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
+from app.database import Base
+
+class GardenChange(Base):
+    """One entry of a garden's change feed; id is the sequence number clients sync from"""
+    __tablename__ = "garden_changes"
+    __table_args__ = (
+        Index('ix_garden_changes_garden_id_id', 'garden_id', 'id'),
+        Index('ix_garden_changes_garden_id_entity', 'garden_id', 'entity', 'entity_id'),
+        # Never reuse a sequence number after compaction deletes the newest rows
+        {'sqlite_autoincrement': True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    garden_id = Column(Integer, ForeignKey('gardens.id'), nullable=False)
+    entity = Column(String, nullable=False)     # feature, zone or plant
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)         # upsert or delete
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import relationship
+from app.database import Base
+from app.models.mixins import VersionedMixin
+
+class GardenGrid(VersionedMixin, Base):
+    """
+    Planning grid of a garden. Rows and columns live in physical slots that
+    never move; row_order/col_order list the slots top-to-bottom and
+    left-to-right, so inserting or deleting a row only edits those lists and
+    every other cell keeps its ID (see app/services/grid_service.py).
+    """
+    __tablename__ = "garden_grids"
+
+    id = Column(Integer, primary_key=True)
+    garden_id = Column(Integer, ForeignKey('gardens.id'), unique=True, nullable=False)
+    origin_lon = Column(Float)       # South-west corner of the first row and column
+    origin_lat = Column(Float)
+    cell_size_feet = Column(Float, nullable=False, default=1.0)
+    row_order = Column(JSON, nullable=False, default=list)
+    col_order = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    garden = relationship('Garden')
+    planted = relationship('PlantedCells', back_populates='grid', uselist=False, cascade='all, delete-orphan')
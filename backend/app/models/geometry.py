@@ -0,0 +1,75 @@
+import json
+from sqlalchemy import Index, Text, func
+from sqlalchemy.types import UserDefinedType
+
+# Spatial column support
+# SQLite (development): geometries are stored as GeoJSON or WKT text
+# PostgreSQL (production): native PostGIS geometry columns with GiST indexes
+# Reads on PostgreSQL come back as GeoJSON text so callers see the same format
+
+SRID = 4326
+
+
+def to_wkt(value) -> str:
+    """Normalize a GeoJSON string/dict, WKT string or shapely geometry to WKT"""
+    if hasattr(value, "wkt"):
+        return value.wkt
+    if isinstance(value, dict) or (isinstance(value, str) and value.lstrip().startswith("{")):
+        from shapely.geometry import shape
+
+        data = json.loads(value) if isinstance(value, str) else value
+        if data.get("type") == "Feature":
+            data = data["geometry"]
+        return shape(data).wkt
+    return value
+
+
+def load_geometry(value):
+    """Parse a stored boundary (GeoJSON string/dict or WKT) into a shapely geometry"""
+    if value is None:
+        return None
+    if hasattr(value, "geom_type"):
+        return value
+    from shapely import wkt
+    from shapely.geometry import shape
+
+    if isinstance(value, dict):
+        return shape(value.get("geometry", value) if value.get("type") == "Feature" else value)
+    text = value.strip()
+    if text.startswith("{"):
+        return load_geometry(json.loads(text))
+    return wkt.loads(text)
+
+
+class PostGISGeometry(UserDefinedType):
+    """PostGIS geometry column that accepts GeoJSON/WKT and returns GeoJSON"""
+
+    cache_ok = True
+
+    def __init__(self, geometry_type: str = "GEOMETRY", srid: int = SRID):
+        self.geometry_type = geometry_type
+        self.srid = srid
+
+    def get_col_spec(self, **kw):
+        return f"geometry({self.geometry_type},{self.srid})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            return None if value is None else to_wkt(value)
+        return process
+
+    def bind_expression(self, bindvalue):
+        return func.ST_GeomFromText(bindvalue, self.srid)
+
+    def column_expression(self, col):
+        return func.ST_AsGeoJSON(col)
+
+
+def Geometry(geometry_type: str = "GEOMETRY", srid: int = SRID):
+    """Text on SQLite, native PostGIS geometry on PostgreSQL"""
+    return Text().with_variant(PostGISGeometry(geometry_type, srid), "postgresql")
+
+
+def spatial_index(name: str, column: str) -> Index:
+    """GiST index that is only emitted on PostgreSQL"""
+    return Index(name, column, postgresql_using="gist").ddl_if(dialect="postgresql")
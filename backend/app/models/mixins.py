@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, event
+import sqlalchemy.orm  # Mapper events must be registered before listening on a mixin
+
+
+class VersionedMixin:
+    """Adds a row version that is bumped on every ORM update"""
+
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+
+@event.listens_for(VersionedMixin, "before_update", propagate=True)
+def _bump_row_version(mapper, connection, target):
+    target.version = (target.version or 0) + 1
@@ -2,15 +2,18 @@ from datetime import datetime, date
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, JSON, Text
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.geometry import Geometry, spatial_index
+from app.models.mixins import VersionedMixin
 
-class Plant(Base):
+class Plant(VersionedMixin, Base):
     __tablename__ = "plants"
+    __table_args__ = (spatial_index('ix_plants_location_gist', 'location'),)
     
     id = Column(Integer, primary_key=True)
-    garden_id = Column(Integer, ForeignKey('gardens.id'))
-    zone_id = Column(Integer, ForeignKey('zones.id'))
-    species_id = Column(Integer, ForeignKey('plant_species.id'))
-    location = Column(Text)  # GeoJSON point for location data
+    garden_id = Column(Integer, ForeignKey('gardens.id'), index=True)
+    zone_id = Column(Integer, ForeignKey('zones.id'), index=True)
+    species_id = Column(Integer, ForeignKey('plant_species.id'), index=True)
+    location = Column(Geometry('POINT'))  # GeoJSON/WKT point on SQLite, PostGIS point on PostgreSQL
     planted_date = Column(Date)
     current_height = Column(Float)
     current_spread = Column(Float)
@@ -29,12 +32,14 @@ class PlantSpecies(Base):
     scientific_name = Column(String)
     sun_requirement = Column(String)
     water_requirement = Column(String)
-    min_temp = Column(Float)
-    max_temp = Column(Float)
+    min_temp = Column(Float)  # °F, like USDA hardiness zones
+    max_temp = Column(Float)  # °F
     mature_height = Column(Float)
     mature_spread = Column(Float)
     spacing = Column(Float)
     growing_seasons = Column(JSON)
     days_to_harvest = Column(Integer)
     harvest_window_days = Column(Integer)
-    companion_plants = Column(JSON)  # List of compatible plant IDs
+    companion_plants = Column(JSON)  # List of compatible plant IDs; negative IDs mark plants to keep apart
+
+    images = relationship('PlantImage', back_populates='plant_species', order_by='PlantImage.id')
@@ -1,18 +1,22 @@
-from sqlalchemy import Column, Integer, String, LargeBinary, ForeignKey, Table, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class PlantImage(Base):
     __tablename__ = "plant_images"
-    
+    __table_args__ = (UniqueConstraint('plant_species_id', 'content_hash', name='uq_plant_images_species_hash'),)
+
     id = Column(Integer, primary_key=True)
-    plant_species_id = Column(Integer, ForeignKey('plant_species.id'))
-    file_path = Column(String)        # Path to image file
+    plant_species_id = Column(Integer, ForeignKey('plant_species.id'), index=True)
+    content_hash = Column(String(64), index=True)  # SHA-256 hex digest; the key in the image store
+    file_path = Column(String)        # Path of the original, relative to the image store root
     content_type = Column(String)     # e.g., 'image/jpeg'
     is_primary = Column(Boolean, default=False)  # Main display image
     source = Column(String)           # e.g., 'plantnet'
     copyright_info = Column(String)   # Attribution if required
     file_size_bytes = Column(Integer) # Size of the image file
-    
+    width = Column(Integer)
+    height = Column(Integer)
+
     # Relationship
     plant_species = relationship('PlantSpecies', back_populates='images')
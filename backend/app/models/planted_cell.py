@@ -0,0 +1,41 @@
+import zlib
+from datetime import datetime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, LargeBinary
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+# Species ID per grid cell, 0 for an empty cell, stored as one compressed
+# uint32 array per garden instead of one row per planted cell. The array is
+# indexed by the grid's physical row/column slots (see GardenGrid), so grid
+# edits never shift it; capacity grows geometrically as slots are added.
+
+OCCUPANCY_DTYPE = "<u4"
+
+class PlantedCells(Base):
+    __tablename__ = "planted_cells"
+
+    id = Column(Integer, primary_key=True)
+    garden_id = Column(Integer, ForeignKey('gardens.id'), unique=True, nullable=False)
+    grid_id = Column(Integer, ForeignKey('garden_grids.id'), unique=True, nullable=False)
+    row_capacity = Column(Integer, nullable=False, default=0)
+    col_capacity = Column(Integer, nullable=False, default=0)
+    species = Column(LargeBinary, nullable=False, default=b"")  # zlib-compressed row-major array
+    version = Column(Integer, nullable=False)  # Optimistic lock: concurrent writers get StaleDataError
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    grid = relationship('GardenGrid', back_populates='planted')
+
+    __mapper_args__ = {"version_id_col": version}
+
+    def load(self):
+        """Occupancy as a (row_capacity, col_capacity) array"""
+        import numpy as np
+
+        if not self.row_capacity or not self.col_capacity:
+            return np.zeros((self.row_capacity or 0, self.col_capacity or 0), dtype=OCCUPANCY_DTYPE)
+        data = np.frombuffer(zlib.decompress(self.species), dtype=OCCUPANCY_DTYPE)
+        return data.reshape(self.row_capacity, self.col_capacity).copy()
+
+    def store(self, array):
+        self.row_capacity, self.col_capacity = array.shape
+        self.species = zlib.compress(array.astype(OCCUPANCY_DTYPE, copy=False).tobytes(), 1)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Time, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Time, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -7,7 +7,7 @@ class WateringSchedule(Base):
     __tablename__ = "watering_schedules"
     
     id = Column(Integer, primary_key=True)
-    zone_id = Column(Integer, ForeignKey('zones.id'))
+    zone_id = Column(Integer, ForeignKey('zones.id'), index=True)
     irrigation_type = Column(String)
     base_frequency_days = Column(Integer)
     water_amount_ml = Column(Float)
@@ -23,6 +23,10 @@ class WateringSchedule(Base):
 
 class WateringEvent(Base):
     __tablename__ = "watering_events"
+    __table_args__ = (
+        # Covers lookups by schedule alone and "upcoming events for a schedule"
+        Index('ix_watering_events_schedule_id_planned_date', 'schedule_id', 'planned_date'),
+    )
     
     id = Column(Integer, primary_key=True)
     schedule_id = Column(Integer, ForeignKey('watering_schedules.id'))
@@ -1,10 +1,14 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, String
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Date, String, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class WeatherData(Base):
     __tablename__ = "weather_data"
+    __table_args__ = (
+        # Covers lookups by garden alone and "weather for a garden on a date"
+        Index('ix_weather_data_garden_id_date', 'garden_id', 'date'),
+    )
     
     id = Column(Integer, primary_key=True)
     garden_id = Column(Integer, ForeignKey('gardens.id'))
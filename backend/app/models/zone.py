@@ -2,14 +2,17 @@ from datetime import datetime
 from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Text
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.models.geometry import Geometry, spatial_index
+from app.models.mixins import VersionedMixin
 
-class Zone(Base):
+class Zone(VersionedMixin, Base):
     __tablename__ = "zones"
+    __table_args__ = (spatial_index('ix_zones_boundary_gist', 'boundary'),)
     
     id = Column(Integer, primary_key=True)
-    garden_id = Column(Integer, ForeignKey('gardens.id'))
+    garden_id = Column(Integer, ForeignKey('gardens.id'), index=True)
     name = Column(String)
-    boundary = Column(Text)  # GeoJSON string for geometry data
+    boundary = Column(Geometry())  # GeoJSON/WKT string on SQLite, PostGIS geometry on PostgreSQL
     sun_exposure = Column(Float)
     soil_ph = Column(Float)
     soil_moisture = Column(Float)
@@ -0,0 +1,303 @@
+"""
+On-demand profiling of slow requests.
+
+A request is profiled when it carries an X-Profile header equal to
+ADMIN_TOKEN, or when it is picked at random with probability
+PROFILING_SAMPLE_RATE. Header-triggered profiles are always kept and their id
+is returned in an X-Profile-Id response header. Sampled ones are kept only if
+the request took at least PROFILING_THRESHOLD_MS. Kept profiles go to a ring
+of at most PROFILING_MAX_PROFILES in PROFILING_DIR, listed and downloaded
+through /api/admin/profiles.
+
+Profiles are statistical: while any request is being profiled, one sampler
+thread reads every thread's stack each PROFILING_INTERVAL_MS. cProfile only
+sees the thread that enabled it, so it would miss sync endpoints, which run in
+worker threads. A sample is attributed to a request when:
+- the event loop thread is running that request's task, because the stack
+  passes through its ProfilingMiddleware frame, or
+- a worker thread is inside the request's endpoint function.
+Otherwise the sample is counted as <waiting>: awaiting I/O, queued for a
+thread, or another task holding the loop. Two concurrent requests to the same
+sync endpoint cannot be told apart, so each gets the other's samples too.
+
+Stacks are stored in the folded format ("outer;inner;leaf count"), which
+flamegraph.pl, speedscope and similar tools read directly.
+
+With sampling off and no X-Profile header, the middleware costs one attribute
+check per request, and no sampler thread runs.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.instrumentation import route_label
+from app.metrics import registry
+
+# Shared secret for the X-Profile header and the admin endpoints; both are off when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_THRESHOLD_MS = float(os.getenv("PROFILING_THRESHOLD_MS", "500"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "50"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(Path(__file__).resolve().parent / "data" / "profiles"))
+
+WAITING = "<waiting>"
+WORKER_THREAD = "<worker thread>"
+
+_PROFILE_ID = re.compile(r"^[0-9]{13}-[0-9a-f]{6}$")
+
+profiles_taken = registry.counter(
+    "request_profiles_total",
+    "Profiled requests by trigger and whether the profile was kept",
+    labelnames=("trigger", "outcome"),
+)
+
+
+def is_profile_id(value: str) -> bool:
+    return bool(_PROFILE_ID.match(value))
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    # Installed packages by package path, everything else by file name
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack_below(frame, stop) -> Optional[List[str]]:
+    """Labels of the frames under stop, outermost first; None if stop is not on the stack"""
+    labels = []
+    while frame is not None:
+        if stop(frame):
+            labels.append(_label(frame))
+            labels.reverse()
+            return labels
+        labels.append(_label(frame))
+        frame = frame.f_back
+    return None
+
+
+class ProfileSession:
+    """Samples collected for one request"""
+
+    def __init__(self, scope, trigger: str):
+        self.id = f"{int(time.time() * 1000):013d}-{secrets.token_hex(3)}"
+        self.scope = scope
+        self.trigger = trigger
+        self.stacks: Tally = Tally()
+        self.samples = 0
+        self.loop_thread = threading.get_ident()
+        self.anchor = None  # The middleware's frame on the event loop thread
+
+    def sample(self, frames: Dict[int, object], sampler_thread: int):
+        self.samples += 1
+        anchor = self.anchor
+        stack = _stack_below(frames.get(self.loop_thread), lambda frame: frame is anchor)
+        if stack is not None:
+            # The middleware's own frame adds nothing to every stack
+            self.stacks[";".join(stack[1:])] += 1
+            return
+        # The router puts the matched endpoint into the scope; sync ones run in worker threads
+        code = getattr(self.scope.get("endpoint"), "__code__", None)
+        if code is not None:
+            for thread_id, frame in frames.items():
+                if thread_id in (self.loop_thread, sampler_thread):
+                    continue
+                stack = _stack_below(frame, lambda frame: frame.f_code is code)
+                if stack is not None:
+                    self.stacks[";".join([WORKER_THREAD] + stack)] += 1
+                    return
+        self.stacks[WAITING] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Sampler:
+    """One thread sampling stacks for every active session, running only while there are any"""
+
+    def __init__(self, interval_ms: float = PROFILING_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+            frames = sys._current_frames()
+            for session in sessions:
+                session.sample(frames, me)
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Bounded on-disk ring of profiles: metadata JSON plus folded stacks per profile"""
+
+    def __init__(self, directory=PROFILING_DIR, max_profiles: int = PROFILING_MAX_PROFILES):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def _ids(self) -> List[str]:
+        if not self.directory.exists():
+            return []
+        # Ids start with a millisecond timestamp, so name order is age order
+        return sorted(path.stem for path in self.directory.glob("*.json") if is_profile_id(path.stem))
+
+    def save(self, metadata: dict, folded: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = metadata["id"]
+        with self._lock:
+            # Stacks first, so a listed profile always has them
+            for suffix, content in ((".folded", folded), (".json", json.dumps(metadata))):
+                temporary = self.directory / f".{profile_id}{suffix}.tmp"
+                temporary.write_text(content)
+                os.replace(temporary, self.directory / f"{profile_id}{suffix}")
+            ids = self._ids()
+            for stale in ids[:max(len(ids) - self.max_profiles, 0)]:
+                for suffix in (".json", ".folded"):
+                    (self.directory / f"{stale}{suffix}").unlink(missing_ok=True)
+
+    def list(self) -> List[dict]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            try:
+                profiles.append(json.loads((self.directory / f"{profile_id}.json").read_text()))
+            except FileNotFoundError:
+                continue  # Pruned while listing
+        return profiles
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        if not is_profile_id(profile_id):
+            return None
+        try:
+            return json.loads((self.directory / f"{profile_id}.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def folded_path(self, profile_id: str) -> Path:
+        return self.directory / f"{profile_id}.folded"
+
+
+class Profiler:
+    """Decides which requests to profile; settings may be changed at runtime"""
+
+    def __init__(self, token: str = ADMIN_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE,
+                 threshold_ms: float = PROFILING_THRESHOLD_MS, store: Optional[ProfileStore] = None,
+                 sampler: Optional[Sampler] = None):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.threshold_ms = threshold_ms
+        self.store = store or ProfileStore()
+        self.sampler = sampler or Sampler()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def trigger_for(self, scope) -> Optional[str]:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    if secrets.compare_digest(value, self.token.encode()):
+                        return "header"
+                    break
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+
+profiler = Profiler()
+
+
+class ProfilingMiddleware:
+    """Profiles requests picked by the profiler; a pass-through when profiling is off"""
+
+    def __init__(self, app, profiler: Profiler = profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = self.profiler.trigger_for(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope, trigger)
+        session.anchor = sys._getframe()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trigger == "header":
+                    message = dict(message, headers=list(message.get("headers", []))
+                                   + [(b"x-profile-id", session.id.encode())])
+            await send(message)
+
+        self.profiler.sampler.add(session)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            self.profiler.sampler.remove(session)
+            session.anchor = None
+            keep = trigger == "header" or duration_ms >= self.profiler.threshold_ms
+            profiles_taken.inc(trigger=trigger, outcome="kept" if keep else "discarded")
+            if keep:
+                metadata = {
+                    "id": session.id,
+                    "trigger": trigger,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_label(scope),
+                    "status": status,
+                    "duration_ms": round(duration_ms, 3),
+                    "samples": session.samples,
+                    "interval_ms": self.profiler.sampler.interval * 1000,
+                    "created": time.time(),
+                }
+                # Written off the event loop; the response has already been sent
+                await asyncio.to_thread(self.profiler.store.save, metadata, session.folded())
@@ -0,0 +1,73 @@
+"""
+Publish/subscribe used to fan out live updates.
+
+Write paths publish from request threads or the event loop; subscribers are
+callbacks that run on the event loop they subscribed from. InProcessBroker
+only reaches subscribers in the current process. To fan out across workers,
+implement Broker on top of a local message broker (Redis pub/sub, NATS, ...)
+and install it with set_broker() at startup.
+"""
+
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Tuple
+
+Callback = Callable[[object], None]
+
+
+class Broker(ABC):
+    """Topic based fan-out of JSON-serializable messages"""
+
+    @abstractmethod
+    def publish(self, topic: str, message) -> None:
+        """Deliver message to every subscriber of topic; must be safe to call from any thread"""
+
+    @abstractmethod
+    def subscribe(self, topic: str, callback: Callback) -> None:
+        """Call callback(message) on the running event loop for each message published to topic"""
+
+    @abstractmethod
+    def unsubscribe(self, topic: str, callback: Callback) -> None:
+        """Stop calling callback for topic"""
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, Callback]]] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, message) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        for loop, callback in subscribers:
+            try:
+                loop.call_soon_threadsafe(callback, message)
+            except RuntimeError:
+                # Loop already closed (e.g. a test client shut down)
+                self.unsubscribe(topic, callback)
+
+    def subscribe(self, topic: str, callback: Callback) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(topic, []).append((loop, callback))
+
+    def unsubscribe(self, topic: str, callback: Callback) -> None:
+        with self._lock:
+            remaining = [(l, c) for l, c in self._subscribers.get(topic, ()) if c is not callback]
+            if remaining:
+                self._subscribers[topic] = remaining
+            else:
+                self._subscribers.pop(topic, None)
+
+
+_broker: Broker = InProcessBroker()
+
+
+def get_broker() -> Broker:
+    return _broker
+
+
+def set_broker(broker: Broker) -> None:
+    global _broker
+    _broker = broker
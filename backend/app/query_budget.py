@@ -0,0 +1,64 @@
+"""
+Query-count harness for catching N+1 regressions.
+
+    with assert_max_queries(2):
+        client.get("/api/features/?garden_id=1")
+
+Every statement sent through the engine inside the block is counted; exceeding
+the budget raises AssertionError listing the statements that ran.
+"""
+
+from contextlib import contextmanager
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import database
+
+# Expected maximum number of queries per endpoint, shared by tests and benchmarks
+# Each includes the ETag version lookup (app/etag.py)
+QUERY_BUDGETS = {
+    ("GET", "/api/features/"): 2,
+    ("GET", "/api/gardens/{garden_id}/zones/containing"): 2,
+    ("GET", "/api/gardens/{garden_id}/features/intersecting"): 2,
+    ("GET", "/api/gardens/{garden_id}/plants/nearest"): 2,
+    # Compaction watermark, log page, then one load per entity type
+    ("GET", "/api/gardens/{garden_id}/changes"): 6,
+}
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active"""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        # Looked up on use, so a test that swaps the engine is counted on the new one
+        self.engine = engine or database.engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        return False
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, engine: Optional[Engine] = None):
+    """Fail if the block runs more than max_queries statements"""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > max_queries:
+        listing = "\n".join(f"  {i + 1}. {sql}" for i, sql in enumerate(counter.statements))
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, {counter.count} were executed:\n{listing}"
+        )
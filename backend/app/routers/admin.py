@@ -0,0 +1,43 @@
+import secrets
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from app.profiling import profiler
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Admin endpoints need X-Admin-Token; without ADMIN_TOKEN set they do not exist"""
+    if not profiler.token:
+        raise HTTPException(404, "Not found")
+    if x_admin_token is None or not secrets.compare_digest(x_admin_token.encode(), profiler.token.encode()):
+        raise HTTPException(403, "Invalid admin token")
+
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles(limit: int = Query(default=50, ge=1, le=1000)) -> List[dict]:
+    """Stored request profiles, newest first"""
+    return profiler.store.list()[:limit]
+
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(
+    profile_id: str,
+    format: str = Query(default="json", pattern="^(json|folded)$",
+                        description="json: metadata with stacks; folded: stacks for flame graph tools"),
+):
+    """Download one profile"""
+    metadata = profiler.store.get(profile_id)
+    if metadata is None:
+        raise HTTPException(404, "Profile not found")
+    path = profiler.store.folded_path(profile_id)
+    if format == "folded":
+        return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
+    stacks = {}
+    for line in path.read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        stacks[stack] = int(count)
+    return {**metadata, "stacks": stacks}
@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import datetime
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ValidationError
+from typing import Any, List, Optional
 from app.database import get_db
-from app.models.feature import Feature
+from app.etag import conditional_get, garden_scope, mark_changed
+from app.models.feature import Feature, boundary_bbox
+from app.models.geometry import load_geometry
 from app.models.user import User
 from app.models.garden import Garden
+from app.routers.gardens import parse_bbox
+from app.services.change_log_service import record_changes
+from app.services.geometry_cache import geometry_cache
 
 router = APIRouter()
 
@@ -23,14 +31,170 @@ class FeatureOut(BaseModel):
     color: str
     garden_id: int
     user_id: int
-    created_at: str
+    created_at: datetime
 
     class Config:
         from_attributes = True
 
-@router.get("/features/", response_model=List[FeatureOut])
-def list_features(garden_id: int, db: Session = Depends(get_db)):
-    return db.query(Feature).filter(Feature.garden_id == garden_id).all()
+class FeatureListItem(BaseModel):
+    # Every field is optional so ?fields= can project a subset
+    id: int
+    name: Optional[str] = None
+    boundary: Optional[str] = None
+    color: Optional[str] = None
+    garden_id: Optional[int] = None
+    user_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class FeatureBulkUpdate(FeatureCreate):
+    id: int
+
+class FeatureBulkDelete(BaseModel):
+    ids: List[int]
+
+class FeatureBulkResult(BaseModel):
+    index: int
+    ok: bool
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+class FeatureBulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[FeatureBulkResult]
+
+# Keeps IN (...) lists and executemany batches under SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
+def _chunks(values: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def _bulk_items(payload: Any, defaults: dict) -> List[dict]:
+    """Accept a list of features, {"features": [...]} or a GeoJSON FeatureCollection"""
+    if isinstance(payload, dict):
+        payload = payload.get("features")
+    if not isinstance(payload, list):
+        raise HTTPException(400, "Expected a list of features or a FeatureCollection")
+
+    items = []
+    for item in payload:
+        if isinstance(item, dict) and item.get("type") == "Feature":
+            # GeoJSON Feature: attributes live in properties, geometry becomes the boundary
+            properties = item.get("properties") or {}
+            flat = {**properties, "boundary": json.dumps(item.get("geometry"))}
+            if item.get("id") is not None:
+                flat.setdefault("id", item["id"])
+            item = flat
+        if isinstance(item, dict):
+            item = {**{k: v for k, v in defaults.items() if v is not None}, **item}
+        items.append(item)
+    return items
+
+def _validate_bulk_items(items: List[dict], schema, db: Session):
+    """Validate every item in one pass; returns (failed results, [(index, data)])"""
+    failed, valid = [], []
+    for index, item in enumerate(items):
+        try:
+            data = schema(**item).dict()
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            failed.append(FeatureBulkResult(index=index, ok=False, error=error))
+            continue
+        except TypeError:
+            failed.append(FeatureBulkResult(index=index, ok=False, error="Feature must be an object"))
+            continue
+        try:
+            # Bulk statements skip mapper events, so fill the bbox columns here
+            data.update(boundary_bbox(data["boundary"]))
+        except Exception:
+            failed.append(FeatureBulkResult(index=index, ok=False, error="Invalid boundary geometry"))
+            continue
+        valid.append((index, data))
+
+    # One query per chunk for every referenced garden instead of one per item
+    garden_ids = list({data["garden_id"] for _, data in valid})
+    known_gardens = set()
+    for chunk in _chunks(garden_ids):
+        known_gardens.update(gid for (gid,) in db.query(Garden.id).filter(Garden.id.in_(chunk)))
+    checked = []
+    for index, data in valid:
+        if data["garden_id"] in known_gardens:
+            checked.append((index, data))
+        else:
+            failed.append(FeatureBulkResult(index=index, ok=False, error="Garden not found"))
+    return failed, checked
+
+def _bulk_response(results: List[FeatureBulkResult]) -> FeatureBulkResponse:
+    results.sort(key=lambda r: r.index)
+    succeeded = sum(1 for r in results if r.ok)
+    return FeatureBulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+MAX_PAGE_SIZE = 1000
+LIST_FIELDS = tuple(FeatureListItem.model_fields)
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(LIST_FIELDS)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+    # id is always returned, it is the pagination cursor
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+def simplify_tolerance(zoom: int) -> float:
+    """Degrees covered by half a pixel of a 256px web map tile at this zoom level"""
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+def _simplify_boundaries(boundaries: List[Optional[str]], zoom: int) -> List[Optional[str]]:
+    """Simplify boundaries for display at a zoom level, returned as GeoJSON"""
+    import shapely
+
+    geometries = shapely.simplify(
+        [load_geometry(b) for b in boundaries], simplify_tolerance(zoom), preserve_topology=True
+    )
+    return shapely.to_geojson(geometries).tolist()
+
+@router.get(
+    "/features/",
+    response_model=List[FeatureListItem],
+    response_model_exclude_unset=True,
+    dependencies=[conditional_get(garden_scope)]
+)
+def list_features(
+    response: Response,
+    garden_id: int,
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[int] = Query(default=None, description="Return features with id greater than this"),
+    bbox: Optional[str] = Query(default=None, description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: Optional[int] = Query(default=None, ge=0, le=24, description="Simplify boundaries for this map zoom"),
+    fields: Optional[str] = Query(default=None, description="Comma separated fields to return"),
+    db: Session = Depends(get_db)
+):
+    """
+    List a garden's features in id order. With limit, the X-Next-Cursor header
+    holds the cursor for the next page; it is absent on the last page.
+    """
+    columns = _parse_fields(fields)
+    query = db.query(*[getattr(Feature, c) for c in columns]).filter(Feature.garden_id == garden_id)
+    if bbox:
+        query = query.filter(Feature.bbox_overlaps(parse_bbox(bbox)))
+    if cursor is not None:
+        query = query.filter(Feature.id > cursor)
+    query = query.order_by(Feature.id)
+    if limit is not None:
+        # One extra row tells us whether another page exists without a COUNT
+        query = query.limit(limit + 1)
+
+    rows = [dict(zip(columns, row)) for row in query]
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1]["id"])
+    if zoom is not None and "boundary" in columns and rows:
+        for row, boundary in zip(rows, _simplify_boundaries([r["boundary"] for r in rows], zoom)):
+            row["boundary"] = boundary
+    return rows
 
 @router.post("/features/", response_model=FeatureOut)
 def create_feature(feature: FeatureCreate, db: Session = Depends(get_db)):
@@ -40,6 +204,97 @@ def create_feature(feature: FeatureCreate, db: Session = Depends(get_db)):
     db.refresh(db_feature)
     return db_feature
 
+@router.post("/features/bulk", response_model=FeatureBulkResponse)
+def bulk_create_features(
+    payload: Any = Body(...),
+    garden_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """Create many features in one transaction; garden_id/user_id fill in missing values"""
+    items = _bulk_items(payload, {"garden_id": garden_id, "user_id": user_id})
+    results, valid = _validate_bulk_items(items, FeatureCreate, db)
+
+    for chunk in _chunks(valid):
+        ids = db.scalars(
+            insert(Feature).returning(Feature.id, sort_by_parameter_order=True),
+            [data for _, data in chunk]
+        ).all()
+        results.extend(
+            FeatureBulkResult(index=index, ok=True, id=feature_id)
+            for (index, _), feature_id in zip(chunk, ids)
+        )
+        # Bulk statements bypass the flush, so log the changes explicitly
+        record_changes(db, (
+            {"garden_id": data["garden_id"], "entity": "feature", "entity_id": feature_id, "op": "upsert"}
+            for (_, data), feature_id in zip(chunk, ids)
+        ))
+    mark_changed(db, *{("garden", data["garden_id"]) for _, data in valid})
+    db.commit()
+    return _bulk_response(results)
+
+@router.put("/features/bulk", response_model=FeatureBulkResponse)
+def bulk_update_features(payload: Any = Body(...), db: Session = Depends(get_db)):
+    """Replace many features in one transaction"""
+    items = _bulk_items(payload, {})
+    results, valid = _validate_bulk_items(items, FeatureBulkUpdate, db)
+
+    versions, gardens = {}, {}
+    for chunk in _chunks([data["id"] for _, data in valid]):
+        for feature_id, version, feature_garden_id in db.query(
+            Feature.id, Feature.version, Feature.garden_id
+        ).filter(Feature.id.in_(chunk)):
+            versions[feature_id] = version
+            gardens[feature_id] = feature_garden_id
+
+    mappings = []
+    for index, data in valid:
+        if data["id"] not in versions:
+            results.append(FeatureBulkResult(index=index, ok=False, id=data["id"], error="Feature not found"))
+            continue
+        # Bulk UPDATE skips mapper events, so bump the row version here
+        mappings.append({**data, "version": (versions[data["id"]] or 0) + 1})
+        results.append(FeatureBulkResult(index=index, ok=True, id=data["id"]))
+
+    for chunk in _chunks(mappings):
+        db.execute(update(Feature), chunk)
+    changes = []
+    for mapping in mappings:
+        previous = gardens[mapping["id"]]
+        if previous is not None and previous != mapping["garden_id"]:
+            changes.append({"garden_id": previous, "entity": "feature", "entity_id": mapping["id"], "op": "delete"})
+        changes.append({"garden_id": mapping["garden_id"], "entity": "feature", "entity_id": mapping["id"], "op": "upsert"})
+    record_changes(db, changes)
+    # Both the old and the new garden of a moved feature change
+    mark_changed(db, *{("garden", gid) for m in mappings for gid in (m["garden_id"], gardens[m["id"]])})
+    db.commit()
+    for mapping in mappings:
+        geometry_cache.invalidate(Feature.__tablename__, mapping["id"])
+    return _bulk_response(results)
+
+@router.delete("/features/bulk", response_model=FeatureBulkResponse)
+def bulk_delete_features(request: FeatureBulkDelete, db: Session = Depends(get_db)):
+    """Delete many features in one transaction"""
+    existing, gardens, changes = set(), set(), []
+    for chunk in _chunks(list(set(request.ids))):
+        for feature_id, feature_garden_id in db.query(Feature.id, Feature.garden_id).filter(Feature.id.in_(chunk)):
+            existing.add(feature_id)
+            gardens.add(("garden", feature_garden_id))
+            if feature_garden_id is not None:
+                changes.append({"garden_id": feature_garden_id, "entity": "feature",
+                                "entity_id": feature_id, "op": "delete"})
+        db.execute(delete(Feature).where(Feature.id.in_(chunk)))
+    record_changes(db, changes)
+    mark_changed(db, *gardens)
+    db.commit()
+    for feature_id in existing:
+        geometry_cache.invalidate(Feature.__tablename__, feature_id)
+    return _bulk_response([
+        FeatureBulkResult(index=index, ok=feature_id in existing, id=feature_id,
+                          error=None if feature_id in existing else "Feature not found")
+        for index, feature_id in enumerate(request.ids)
+    ])
+
 @router.put("/features/{feature_id}", response_model=FeatureOut)
 def update_feature(feature_id: int, feature: FeatureCreate, db: Session = Depends(get_db)):
     db_feature = db.query(Feature).filter(Feature.id == feature_id).first()
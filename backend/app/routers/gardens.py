@@ -1,9 +1,21 @@
-from datetime import datetime
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from sqlalchemy.orm.exc import StaleDataError
+from pydantic import BaseModel, confloat
 from app.database import get_db
+from app.etag import conditional_get, garden_scope
+from app.models.garden import Garden
+from app.models.zone import Zone
+from app.services.calendar_service import calendars
+from app.services.change_log_service import ChangeLogService
+from app.services.conflict_service import ConflictService
+from app.services.grid_service import CellNotFound, GridError, GridService
+from app.services.layout_service import LAYOUT_TIME_BUDGET_MS, LayoutError, LayoutService
+from app.services.live_updates import serve_garden_updates
+from app.services.recommendation_service import recommendations
+from app.services.spatial_service import SpatialService
 
 router = APIRouter()
 
@@ -11,7 +23,35 @@ class GridResizeRequest(BaseModel):
     rows: int
     cols: int
 
-@router.get("/gardens/{garden_id}")
+class GridCreateRequest(GridResizeRequest):
+    cell_size_feet: float = 1.0
+    origin_lon: Optional[float] = None
+    origin_lat: Optional[float] = None
+
+class GridLineRequest(BaseModel):
+    index: Optional[int] = None  # Position to insert before; append when omitted
+
+class GridCellRequest(BaseModel):
+    species_id: Optional[int] = None
+
+class LayoutPlantRequest(BaseModel):
+    species_id: int
+    quantity: int
+
+class LayoutRequest(BaseModel):
+    plants: List[LayoutPlantRequest]
+    cell_size_feet: float = 0.5  # Lattice pitch: candidate plant centres
+    sun_map: Optional[List[List[float]]] = None  # Sun hours per lattice cell, row 0 north
+    time_budget_ms: Optional[float] = None
+
+Longitude = confloat(ge=-180, le=180, allow_inf_nan=False)
+Latitude = confloat(ge=-90, le=90, allow_inf_nan=False)
+
+class PlacementCheckRequest(BaseModel):
+    points: List[Tuple[Longitude, Latitude]]  # [[lon, lat], ...]
+    nearest: int = 1  # Nearest existing plants to report per point
+
+@router.get("/gardens/{garden_id}", dependencies=[conditional_get(garden_scope)])
 async def get_garden(garden_id: int):
     """Simple garden endpoint for testing"""
     # Return mock data for now
@@ -31,7 +71,7 @@ async def get_garden(garden_id: int):
         "zones": []
     }
 
-@router.get("/gardens/{garden_id}/grid")
+@router.get("/gardens/{garden_id}/grid", dependencies=[conditional_get(garden_scope)])
 async def get_garden_grid(garden_id: int, size: int = 2):
     """Simple grid endpoint for testing"""
     # Create a simple 4x4 grid within the garden boundary
@@ -79,15 +119,244 @@ async def get_garden_grid(garden_id: int, size: int = 2):
         }
     }
 
+def _grid_or_404(service: GridService, garden_id: int, version: Optional[int] = None):
+    grid = service.get_grid(garden_id)
+    if not grid:
+        raise HTTPException(404, "Grid not found")
+    if version is not None and version != grid.version:
+        raise HTTPException(409, f"Grid has changed (version {grid.version})")
+    return grid
+
+def _apply_grid_change(db: Session, change, *args):
+    try:
+        return change(*args)
+    except CellNotFound as e:
+        raise HTTPException(404, str(e))
+    except GridError as e:
+        raise HTTPException(400, str(e))
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(409, "Plantings were changed by another request, retry")
+
+@router.get("/gardens/{garden_id}/grid/state", dependencies=[conditional_get(garden_scope)])
+def get_grid_state(garden_id: int, cells: bool = False, db: Session = Depends(get_db)):
+    """Persisted grid: dimensions, row/column slots and occupied cells (all cells with cells=true)"""
+    service = GridService(db)
+    return service.describe(_grid_or_404(service, garden_id), include_cells=cells)
+
+@router.put("/gardens/{garden_id}/grid/state")
+def create_grid(garden_id: int, request: GridCreateRequest, db: Session = Depends(get_db)):
+    """Create or replace the garden's grid"""
+    service = GridService(db)
+    grid = _apply_grid_change(db, service.create_grid, garden_id, request.rows, request.cols,
+                              request.cell_size_feet, request.origin_lon, request.origin_lat)
+    if grid is None:
+        raise HTTPException(404, "Garden not found")
+    return service.describe(grid)
+
+@router.post("/gardens/{garden_id}/grid/rows")
+def insert_grid_row(garden_id: int, request: GridLineRequest, version: Optional[int] = None,
+                    db: Session = Depends(get_db)):
+    """Insert a row before index (append without one); returns only the new cells"""
+    service = GridService(db)
+    return _apply_grid_change(db, service.insert_row, _grid_or_404(service, garden_id, version), request.index)
+
+@router.delete("/gardens/{garden_id}/grid/rows/{index}")
+def delete_grid_row(garden_id: int, index: int, version: Optional[int] = None, db: Session = Depends(get_db)):
+    """Delete a row; returns its cell IDs and the plantings that were cleared"""
+    service = GridService(db)
+    return _apply_grid_change(db, service.delete_row, _grid_or_404(service, garden_id, version), index)
+
+@router.post("/gardens/{garden_id}/grid/cols")
+def insert_grid_col(garden_id: int, request: GridLineRequest, version: Optional[int] = None,
+                    db: Session = Depends(get_db)):
+    """Insert a column before index (append without one); returns only the new cells"""
+    service = GridService(db)
+    return _apply_grid_change(db, service.insert_col, _grid_or_404(service, garden_id, version), request.index)
+
+@router.delete("/gardens/{garden_id}/grid/cols/{index}")
+def delete_grid_col(garden_id: int, index: int, version: Optional[int] = None, db: Session = Depends(get_db)):
+    """Delete a column; returns its cell IDs and the plantings that were cleared"""
+    service = GridService(db)
+    return _apply_grid_change(db, service.delete_col, _grid_or_404(service, garden_id, version), index)
+
+@router.put("/gardens/{garden_id}/grid/cells/{cell_id}")
+def set_grid_cell(garden_id: int, cell_id: int, request: GridCellRequest, version: Optional[int] = None,
+                  db: Session = Depends(get_db)):
+    """Plant a species in a cell (species_id null clears it)"""
+    service = GridService(db)
+    return _apply_grid_change(db, service.set_cell, _grid_or_404(service, garden_id, version),
+                              cell_id, request.species_id)
+
 @router.put("/gardens/{garden_id}/grid/resize")
-async def resize_garden_grid(garden_id: int, resize_data: GridResizeRequest):
-    """Resize the garden grid"""
-    # Mock implementation - in practice this would regenerate the grid
+def resize_garden_grid(garden_id: int, resize_data: GridResizeRequest, version: Optional[int] = None,
+                       db: Session = Depends(get_db)):
+    """Resize the garden grid at the bottom/right edges, creating it if needed (unless a version is given)"""
+    service = GridService(db)
+    grid = service.get_grid(garden_id) if version is None else _grid_or_404(service, garden_id, version)
+    if grid is None:
+        grid = _apply_grid_change(db, service.create_grid, garden_id, resize_data.rows, resize_data.cols)
+        if grid is None:
+            raise HTTPException(404, "Garden not found")
+        diff = service.describe(grid)
+    else:
+        diff = _apply_grid_change(db, service.resize, grid, resize_data.rows, resize_data.cols)
     return {
         "garden_id": garden_id,
         "message": f"Grid resized to {resize_data.rows}x{resize_data.cols}",
-        "new_dimensions": {
-            "rows": resize_data.rows,
-            "cols": resize_data.cols
-        }
+        **diff
     }
+
+def parse_bbox(bbox: str) -> tuple:
+    try:
+        values = tuple(float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(400, "bbox must be min_lon,min_lat,max_lon,max_lat")
+    if len(values) != 4:
+        raise HTTPException(400, "bbox must be min_lon,min_lat,max_lon,max_lat")
+    return values
+
+@router.get("/gardens/{garden_id}/zones/containing", dependencies=[conditional_get(garden_scope)])
+def get_zone_containing_point(garden_id: int, lon: float, lat: float, db: Session = Depends(get_db)):
+    """Find the zone that contains a point"""
+    zone = SpatialService(db).find_zone_containing(garden_id, lon, lat)
+    if not zone:
+        raise HTTPException(404, "No zone contains this point")
+    return {"id": zone.id, "name": zone.name, "boundary": zone.boundary}
+
+@router.post("/gardens/{garden_id}/zones/{zone_id}/layout")
+def plan_zone_layout(garden_id: int, zone_id: int, request: LayoutRequest, db: Session = Depends(get_db)):
+    """
+    Propose plant positions in a zone that respect spacing and sun needs and
+    keep companions close. Nothing is saved. Without sun_map the zone's
+    sun_exposure applies to every cell; the lattice size is in the response.
+    """
+    zone = db.get(Zone, zone_id)
+    if zone is None or zone.garden_id != garden_id:
+        raise HTTPException(404, "Zone not found")
+    quantities = {}
+    for plant in request.plants:
+        if plant.quantity < 1:
+            raise HTTPException(400, "quantity must be at least 1")
+        quantities[plant.species_id] = quantities.get(plant.species_id, 0) + plant.quantity
+    if not 0.05 <= request.cell_size_feet <= 10:
+        raise HTTPException(400, "cell_size_feet must be between 0.05 and 10")
+    time_budget_ms = min(request.time_budget_ms or LAYOUT_TIME_BUDGET_MS, LAYOUT_TIME_BUDGET_MS)
+    try:
+        return LayoutService(db).plan_zone(zone, quantities, request.cell_size_feet, request.sun_map, time_budget_ms)
+    except LayoutError as e:
+        raise HTTPException(400, str(e))
+
+@router.get("/gardens/{garden_id}/zones/{zone_id}/recommendations")
+def get_zone_recommendations(
+    garden_id: int,
+    zone_id: int,
+    limit: int = Query(default=10, ge=1, le=200),
+    min_score: float = Query(default=0, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Catalog species ranked by how well they suit the zone: the garden's
+    hardiness zone, the zone's sun hours, soil pH and soil moisture
+    """
+    zone = db.get(Zone, zone_id)
+    if zone is None or zone.garden_id != garden_id:
+        raise HTTPException(404, "Zone not found")
+    return recommendations.for_zone(db, zone, limit, min_score)
+
+@router.get("/gardens/{garden_id}/features/intersecting", dependencies=[conditional_get(garden_scope)])
+def get_features_intersecting(garden_id: int, bbox: str, db: Session = Depends(get_db)):
+    """List features intersecting a bounding box (min_lon,min_lat,max_lon,max_lat)"""
+    features = SpatialService(db).features_intersecting_bbox(garden_id, parse_bbox(bbox))
+    return [
+        {"id": f.id, "name": f.name, "boundary": f.boundary, "color": f.color}
+        for f in features
+    ]
+
+@router.get("/gardens/{garden_id}/plants/nearest", dependencies=[conditional_get(garden_scope)])
+def get_nearest_plants(
+    garden_id: int,
+    lon: float,
+    lat: float,
+    limit: int = Query(default=5, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """List the plants closest to a point"""
+    plants = SpatialService(db).nearest_plants(garden_id, lon, lat, limit)
+    return [
+        {"id": p.id, "species_id": p.species_id, "zone_id": p.zone_id, "location": p.location}
+        for p in plants
+    ]
+
+@router.post("/gardens/{garden_id}/plants/placement")
+def check_plant_placements(garden_id: int, request: PlacementCheckRequest, db: Session = Depends(get_db)):
+    """
+    Check many candidate plant locations at once: the zone containing each
+    point, the features it falls on and its nearest existing plants
+    """
+    if not 0 <= request.nearest <= 20:
+        raise HTTPException(400, "nearest must be between 0 and 20")
+    if db.get(Garden, garden_id) is None:
+        raise HTTPException(404, "Garden not found")
+    return SpatialService(db).check_placements(garden_id, request.points, request.nearest)
+
+@router.get("/gardens/{garden_id}/conflicts")
+def get_garden_conflicts(
+    garden_id: int,
+    limit: int = Query(default=1000, ge=1, le=10000),
+    db: Session = Depends(get_db)
+):
+    """
+    Plants closer than their species' spacing allows, overlapping zones,
+    overlapping features and features straddling a zone boundary
+    """
+    if db.get(Garden, garden_id) is None:
+        raise HTTPException(404, "Garden not found")
+    return ConflictService(db).check_garden(garden_id, limit)
+
+@router.get("/gardens/{garden_id}/calendar")
+def get_garden_calendar(
+    garden_id: int,
+    year: Optional[int] = Query(default=None, ge=1900, le=2200, description="Defaults to the current year"),
+    start: Optional[date] = Query(default=None, description="Only plants sowing or harvesting from this day"),
+    end: Optional[date] = Query(default=None, description="... up to this day"),
+    min_concurrent: int = Query(default=2, ge=2, description="Plants harvesting at once to report an overlap"),
+    db: Session = Depends(get_db)
+):
+    """
+    Planting and harvest dates for every plant in the garden, plants sown and
+    harvested per week, and periods when several harvests overlap
+    """
+    if db.get(Garden, garden_id) is None:
+        raise HTTPException(404, "Garden not found")
+    if start and end and start > end:
+        raise HTTPException(400, "start must not be after end")
+    with calendars.use(db, garden_id, year or date.today().year) as calendar:
+        return calendar.summary(start, end, min_concurrent)
+
+@router.get("/gardens/{garden_id}/changes", dependencies=[conditional_get(garden_scope)])
+def get_garden_changes(
+    garden_id: int,
+    since: int = Query(default=0, ge=0, description="Last sequence number the client has applied"),
+    limit: int = Query(default=1000, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Feature, zone and plant changes after a sequence number. Apply the changes,
+    then poll again with since=next (immediately while has_more is true).
+    reset=true means the log was compacted past `since`: reload the garden.
+    """
+    changes = ChangeLogService(db).changes_since(garden_id, since, limit)
+    if changes is None:
+        raise HTTPException(404, "Garden not found")
+    return changes
+
+@router.websocket("/gardens/{garden_id}/live")
+async def garden_live_updates(websocket: WebSocket, garden_id: int):
+    """
+    Push feature, zone and plant changes as they are committed. Frames are
+    {"type": "changes", "next": seq, "changes": [...]} in the same shape as
+    GET /gardens/{garden_id}/changes; on {"type": "resync"} the client fell
+    behind and should catch up from that endpoint.
+    """
+    await serve_garden_updates(websocket, garden_id)
@@ -0,0 +1,108 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from pydantic import BaseModel
+from app.database import get_db
+from app.etag import conditional_get, garden_scope
+from app.services.grid_service import GridError, GridService
+from app.services.planted_cell_service import PlantedCellService
+
+router = APIRouter()
+
+class PlantedCellWrite(BaseModel):
+    id: int
+    species_id: Optional[int] = None
+
+class PlantedCellsRequest(BaseModel):
+    # Either explicit cells or run-length encoded [species_id, count] pairs over region
+    cells: Optional[List[PlantedCellWrite]] = None
+    runs: Optional[List[List[int]]] = None
+    region: Optional[List[int]] = None
+
+class PlantedRegionRequest(BaseModel):
+    region: List[int]  # first row, first col, last row, last col (inclusive)
+    species_id: Optional[int] = None
+
+def _parse_region(region) -> Optional[tuple]:
+    if region is None:
+        return None
+    if isinstance(region, str):
+        try:
+            region = [int(v) for v in region.split(",")]
+        except ValueError:
+            raise HTTPException(400, "region must be first_row,first_col,last_row,last_col")
+    if len(region) != 4:
+        raise HTTPException(400, "region must be first_row,first_col,last_row,last_col")
+    return tuple(region)
+
+def _grid(db: Session, garden_id: int, version: Optional[int] = None):
+    grid = GridService(db).get_grid(garden_id)
+    if not grid:
+        raise HTTPException(404, "Grid not found")
+    if version is not None and version != grid.version:
+        raise HTTPException(409, f"Grid has changed (version {grid.version})")
+    return grid
+
+def _apply(db: Session, change, *args):
+    try:
+        return change(*args)
+    except GridError as e:
+        raise HTTPException(400, str(e))
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(409, "Plantings were changed by another request, retry")
+
+@router.get("/gardens/{garden_id}/grid/planted", dependencies=[conditional_get(garden_scope)])
+def get_planted_cells(
+    garden_id: int,
+    format: str = Query(default="rle", pattern="^(rle|matrix)$"),
+    region: Optional[str] = Query(default=None, description="first_row,first_col,last_row,last_col"),
+    db: Session = Depends(get_db)
+):
+    """Species ID per cell in display order, run-length encoded or as a matrix (0 = empty)"""
+    grid = _grid(db, garden_id)
+    return _apply(db, PlantedCellService(db).read, grid, _parse_region(region), format)
+
+@router.put("/gardens/{garden_id}/grid/planted")
+def write_planted_cells(garden_id: int, request: PlantedCellsRequest, version: Optional[int] = None,
+                        db: Session = Depends(get_db)):
+    """Bulk write: a list of cells by ID, or runs covering a region (the whole grid by default)"""
+    if (request.cells is None) == (request.runs is None):
+        raise HTTPException(400, "Send either cells or runs")
+    grid = _grid(db, garden_id, version)
+    service = PlantedCellService(db)
+    if request.cells is not None:
+        written = _apply(db, service.write_cells, grid, [(c.id, c.species_id) for c in request.cells])
+    else:
+        written = _apply(db, service.write_runs, grid, request.runs, _parse_region(request.region))
+    return {"written": written, "version": grid.version}
+
+@router.post("/gardens/{garden_id}/grid/planted/fill")
+def fill_planted_region(garden_id: int, request: PlantedRegionRequest, version: Optional[int] = None,
+                        db: Session = Depends(get_db)):
+    """Plant one species in every cell of a region"""
+    if request.species_id is None:
+        raise HTTPException(400, "species_id is required, use /clear to empty a region")
+    grid = _grid(db, garden_id, version)
+    changed = _apply(db, PlantedCellService(db).fill, grid, _parse_region(request.region), request.species_id)
+    return {"changed": changed, "version": grid.version}
+
+@router.post("/gardens/{garden_id}/grid/planted/clear")
+def clear_planted_region(garden_id: int, request: PlantedRegionRequest, version: Optional[int] = None,
+                         db: Session = Depends(get_db)):
+    """Empty every cell of a region"""
+    grid = _grid(db, garden_id, version)
+    changed = _apply(db, PlantedCellService(db).fill, grid, _parse_region(request.region), None)
+    return {"changed": changed, "version": grid.version}
+
+@router.get("/gardens/{garden_id}/grid/planted/counts", dependencies=[conditional_get(garden_scope)])
+def get_planted_counts(garden_id: int, db: Session = Depends(get_db)):
+    """Planted cells per species"""
+    grid = _grid(db, garden_id)
+    counts = PlantedCellService(db).counts(grid)
+    return {
+        "garden_id": garden_id,
+        "total": sum(counts.values()),
+        "species": [{"species_id": s, "cells": n} for s, n in sorted(counts.items())],
+    }
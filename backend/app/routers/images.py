@@ -0,0 +1,66 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.plant_image import PlantImage
+from app.services import image_store as image_service
+from app.services.image_store import CONTENT_TYPES, THUMBNAIL_FORMATS, is_digest
+
+router = APIRouter()
+
+# A digest names immutable content: caches may keep it for a year without revalidating
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Seconds a client should wait before asking again for a thumbnail that is not ready
+THUMBNAIL_RETRY_AFTER = "2"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(","))
+
+
+def _negotiate(request: Request, fmt: Optional[str]) -> str:
+    if fmt is not None:
+        return fmt
+    return "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+
+
+@router.get("/images/{digest}")
+def get_image(
+    digest: str,
+    request: Request,
+    size: Optional[int] = Query(default=None, description="Thumbnail size in pixels; the original when omitted"),
+    format: Optional[str] = Query(default=None, description="webp or jpeg; chosen from Accept when omitted"),
+    db: Session = Depends(get_db)
+):
+    """Stream a stored plant image or one of its thumbnails"""
+    # Looked up on the module, so tests can point it at a temporary store
+    store, thumbnails = image_service.image_store, image_service.thumbnails
+    if not is_digest(digest):
+        raise HTTPException(404, "Image not found")
+    if size is not None and size not in thumbnails.sizes:
+        raise HTTPException(400, f"size must be one of {', '.join(map(str, thumbnails.sizes))}")
+    if format is not None and format not in THUMBNAIL_FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(THUMBNAIL_FORMATS)}")
+
+    fmt = None if size is None else _negotiate(request, format)
+    etag = f'"{digest}"' if size is None else f'"{digest}-{size}.{fmt}"'
+    headers = {"Cache-Control": IMMUTABLE, "ETag": etag}
+    if size is not None and format is None:
+        headers["Vary"] = "Accept"
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    # Only images attached to a plant are served, originals and thumbnails alike
+    image = db.query(PlantImage.content_type).filter_by(content_hash=digest).first()
+    if image is None or not store.exists(digest):
+        raise HTTPException(404, "Image not found")
+    if size is None:
+        # FileResponse hands the path to the server (ASGI pathsend) where supported
+        return FileResponse(store.path(digest), media_type=image.content_type, headers=headers)
+    path = thumbnails.ensure(digest, size, fmt)
+    if path is None:
+        # Not cacheable: the thumbnail is served once it has rendered
+        raise HTTPException(503, "Thumbnail is still rendering", headers={"Retry-After": THUMBNAIL_RETRY_AFTER})
+    return FileResponse(path, media_type=CONTENT_TYPES[fmt], headers=headers)
@@ -1,21 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
+from app.etag import catalog_scope, conditional_get, garden_scope
+from app.models.plant_image import PlantImage
+from app.services.image_store import thumbnails
+from app.services.plant_catalog import catalog_store
+from app.services.recommendation_service import SiteBucket, parse_hardiness_zone, recommendations
 
 router = APIRouter()
 
-@router.get("/plants")
-async def get_plants():
-    """Get all available plants"""
-    # Mock response for now
+@router.get("/plants", dependencies=[conditional_get(catalog_scope)])
+def get_plants(
+    response: Response,
+    q: Optional[str] = Query(default=None, description="Prefix or fuzzy match on common and scientific names"),
+    category: Optional[str] = Query(default=None, description="Category or type, e.g. herb, vegetable, perennial"),
+    sun: Optional[str] = Query(default=None, description="full, partial or shade"),
+    water: Optional[str] = Query(default=None, description="low, medium or high"),
+    min_temp: Optional[float] = Query(default=None, description="Coldest temperature the plant must tolerate"),
+    max_temp: Optional[float] = Query(default=None, description="Hottest temperature the plant must tolerate"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Search the plant catalog; best matches first when q is given, otherwise by name"""
+    if min_temp is not None and max_temp is not None and min_temp > max_temp:
+        raise HTTPException(400, "min_temp must not exceed max_temp")
+    catalog = catalog_store.get(db)
+    total, page = catalog.search(q or "", category, sun, water, min_temp, max_temp, limit, offset)
+    response.headers["X-Total-Count"] = str(total)
+    return [record if score is None else {**record, "score": score} for score, record in page]
+
+@router.get("/plants/categories", dependencies=[conditional_get(catalog_scope)])
+def get_plant_categories(db: Session = Depends(get_db)):
+    """Catalog categories with the number of plants in each"""
+    return catalog_store.get(db).categories()
+
+@router.get("/plants/recommendations", dependencies=[conditional_get(catalog_scope)])
+def get_plant_recommendations(
+    climate_zone: Optional[str] = Query(default=None, description="USDA hardiness zone, e.g. 7b"),
+    sun_hours: Optional[float] = Query(default=None, ge=0, le=24),
+    soil_ph: Optional[float] = Query(default=None, ge=0, le=14),
+    soil_moisture: Optional[float] = Query(default=None, ge=0, le=100, description="Fraction or percent"),
+    limit: int = Query(default=10, ge=1, le=200),
+    min_score: float = Query(default=0, ge=0, le=100),
+    db: Session = Depends(get_db)
+):
+    """Catalog species ranked for a growing site; unknown conditions are left out of the score"""
+    if climate_zone and parse_hardiness_zone(climate_zone) is None:
+        raise HTTPException(400, "climate_zone must be a USDA hardiness zone such as 7b")
+    bucket = SiteBucket.of(climate_zone, sun_hours, soil_ph, soil_moisture)
+    return {"site": bucket.as_dict(), "plants": recommendations.recommend(db, bucket, limit, min_score)}
+
+def _known_species(catalog, ids: List[int]) -> List[int]:
+    unknown = catalog.companions.unknown(ids)
+    if unknown:
+        raise HTTPException(400, f"Unknown species: {unknown}")
+    return ids
+
+@router.get("/plants/compatible", dependencies=[conditional_get(catalog_scope)])
+def get_compatible_plants(ids: List[int] = Query(..., description="Repeat for each species, e.g. ids=1&ids=2"),
+                          db: Session = Depends(get_db)):
+    """Species that are companions of every given species and antagonistic to none"""
+    catalog = catalog_store.get(db)
+    return [catalog.get(i) for i in catalog.companions.compatible_with_all(_known_species(catalog, ids))]
+
+@router.get("/plants/conflicts", dependencies=[conditional_get(catalog_scope)])
+def get_planting_conflicts(ids: List[int] = Query(..., description="Species in the planting list"),
+                           db: Session = Depends(get_db)):
+    """Antagonistic and companion pairs within a planting list"""
+    catalog = catalog_store.get(db)
+    graph = catalog.companions
+    ids = _known_species(catalog, ids)
+    return {
+        "conflicts": [list(pair) for pair in graph.pairs_among(ids, "antagonist")],
+        "companion_pairs": [list(pair) for pair in graph.pairs_among(ids, "companion")],
+    }
+
+@router.get("/plants/{species_id}/companions", dependencies=[conditional_get(catalog_scope)])
+def get_plant_companions(species_id: int, db: Session = Depends(get_db)):
+    catalog = catalog_store.get(db)
+    if catalog.get(species_id) is None:
+        raise HTTPException(404, "Plant not found")
+    graph = catalog.companions
+    return {
+        "species_id": species_id,
+        "companions": [catalog.get(i) for i in graph.neighbours(species_id, "companion")],
+        "antagonists": [catalog.get(i) for i in graph.neighbours(species_id, "antagonist")],
+    }
+
+@router.get("/plants/{species_id}/images")
+def get_plant_images(species_id: int, db: Session = Depends(get_db)):
+    """Stored images of a species, primary first, with their thumbnail URLs"""
+    if catalog_store.get(db).get(species_id) is None:
+        raise HTTPException(404, "Plant not found")
+    images = (db.query(PlantImage).filter_by(plant_species_id=species_id)
+              .order_by(PlantImage.is_primary.desc(), PlantImage.id).all())
     return [
-        {"id": 1, "name": "Tomato", "type": "vegetable"},
-        {"id": 2, "name": "Rose", "type": "flower"},
-        {"id": 3, "name": "Basil", "type": "herb"}
+        {
+            "id": image.id,
+            "content_hash": image.content_hash,
+            "url": f"/api/images/{image.content_hash}",
+            "thumbnails": {size: f"/api/images/{image.content_hash}?size={size}" for size in thumbnails.sizes},
+            "content_type": image.content_type,
+            "width": image.width,
+            "height": image.height,
+            "is_primary": image.is_primary,
+            "source": image.source,
+            "copyright_info": image.copyright_info,
+        }
+        for image in images
     ]
 
-@router.get("/gardens/{garden_id}/plants")
+@router.get("/plants/{species_id}", dependencies=[conditional_get(catalog_scope)])
+def get_plant(species_id: int, db: Session = Depends(get_db)):
+    plant = catalog_store.get(db).get(species_id)
+    if plant is None:
+        raise HTTPException(404, "Plant not found")
+    return plant
+
+@router.get("/gardens/{garden_id}/plants", dependencies=[conditional_get(garden_scope)])
 async def get_garden_plants(garden_id: int):
     """Get plants in a specific garden"""
     # Mock response for now
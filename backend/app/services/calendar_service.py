@@ -0,0 +1,503 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.metrics import registry
+from app.models.garden import Garden
+from app.models.garden_change import GardenChange
+from app.models.plant import Plant
+from app.services.plant_catalog import PlantCatalog, catalog_store
+from app.services.recommendation_service import parse_hardiness_zone
+
+# Planting and harvest calendar
+# Every plant becomes a planting interval and a harvest interval in day
+# ordinals. A plant with a planted_date is sown that day and harvested from
+# planted_date + days_to_harvest for harvest_window_days; a plant without one
+# gets the sowing window of its species' first growing season, placed around
+# the garden's frost dates for the calendar year. Frost-tender species
+# (min_temp above freezing) stop producing at the first fall frost. Intervals
+# for a whole batch of plants are computed as array operations, and each
+# garden's intervals go into a static interval index (sorted starts, running
+# maximum of ends) that answers range, per-week and overlap queries with
+# binary searches. Calendars are kept per (garden, year) and catch up from
+# garden_changes like the spatial index, so adding a plant recomputes that
+# plant only; a new catalog build or changed frost dates recompute the garden
+# from the plant rows already in memory.
+
+CALENDAR_MAX_GARDENS = int(os.getenv("CALENDAR_MAX_GARDENS", "10000"))
+DEFAULT_HARVEST_WINDOW_DAYS = int(os.getenv("CALENDAR_HARVEST_WINDOW_DAYS", "14"))
+FREEZING_F = 32.0
+# Used for the fall sowing window when a species has no days_to_harvest
+_FALLBACK_DAYS_TO_HARVEST = 60
+
+# Average (last spring, first fall) frost as (month, day) per USDA zone; None: frost-free
+FROST_BY_ZONE = {
+    1: ((6, 15), (8, 15)), 2: ((5, 22), (9, 10)), 3: ((5, 15), (9, 15)), 4: ((5, 10), (9, 25)),
+    5: ((4, 30), (10, 10)), 6: ((4, 20), (10, 20)), 7: ((4, 10), (10, 30)), 8: ((3, 25), (11, 15)),
+    9: ((2, 28), (12, 5)), 10: ((1, 30), (12, 15)), 11: None, 12: None, 13: None,
+}
+DEFAULT_FROST = FROST_BY_ZONE[6]
+
+SEASONS = ("spring", "summer", "fall", "winter")
+_SEASON_ALIASES = {"autumn": "fall", "cool": "spring", "warm": "summer"}
+
+calendar_builds = registry.counter(
+    "calendar_builds_total",
+    "Garden calendar computations",
+    labelnames=("reason",),
+)
+
+
+@dataclass(frozen=True)
+class FrostDates:
+    last: Optional[Tuple[int, int]]  # (month, day); None in frost-free climates
+    first: Optional[Tuple[int, int]]
+    source: str
+
+    @classmethod
+    def for_garden(cls, climate_zone: Optional[str], last_frost: Optional[date],
+                   first_frost: Optional[date]) -> "FrostDates":
+        if last_frost and first_frost:
+            return cls((last_frost.month, last_frost.day), (first_frost.month, first_frost.day), "garden")
+        zone = parse_hardiness_zone(climate_zone)
+        if zone is not None:
+            frost = FROST_BY_ZONE[zone[0]]
+            return cls(*(frost or (None, None)), "climate_zone")
+        return cls(*DEFAULT_FROST, "default")
+
+    def codes(self) -> Tuple[int, int]:
+        """(last, first) as month * 100 + day; frost-free climates get Jan 1 and 0 (no fall frost)"""
+        last = self.last or (1, 1)
+        return last[0] * 100 + last[1], self.first[0] * 100 + self.first[1] if self.first else 0
+
+    def as_dict(self, year: int) -> dict:
+        def iso(month_day):
+            return None if month_day is None else _safe_date(year, *month_day).isoformat()
+        return {"last_frost": iso(self.last), "first_frost": iso(self.first), "source": self.source}
+
+
+def _safe_date(year: int, month: int, day: int) -> date:
+    # Feb 29 in a common year becomes Feb 28
+    return date(year, month, min(day, 28)) if month == 2 and day == 29 else date(year, month, day)
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _years(ordinals: np.ndarray) -> np.ndarray:
+    days = (ordinals.astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]")
+    return days.astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+def _month_day_ordinals(years: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Day ordinal of month * 100 + day codes in each year; NaN for code 0"""
+    keys = years.astype(np.int64) * 10000 + codes
+    unique, inverse = np.unique(keys, return_inverse=True)
+    values = np.array([np.nan if key % 10000 == 0 else _safe_date(int(key // 10000), int(key % 10000 // 100),
+                                                                   int(key % 100)).toordinal()
+                       for key in unique], dtype=float)
+    return values[inverse]
+
+
+def _season_code(seasons: Iterable[str], tender: bool) -> int:
+    for season in seasons:
+        season = _SEASON_ALIASES.get(season, season)
+        if season in SEASONS:
+            return SEASONS.index(season)
+    # No usable season: tender crops go out after the last frost, hardy ones around it
+    return SEASONS.index("summer" if tender else "spring")
+
+
+class SpeciesTimings:
+    """Per-species calendar attributes of one catalog build, as arrays"""
+
+    def __init__(self, catalog: PlantCatalog):
+        self.catalog = catalog
+        entries = sorted((e for e in catalog.entries if e.id is not None), key=lambda e: e.id)
+        self.ids = np.array([e.id for e in entries], dtype=np.int64)
+        # A trailing row of defaults stands in for plants without a known species
+        self.days_to_harvest = np.array([np.nan if e.days_to_harvest is None else e.days_to_harvest
+                                         for e in entries] + [np.nan], dtype=float)
+        self.harvest_window = np.array([e.harvest_window_days or DEFAULT_HARVEST_WINDOW_DAYS
+                                        for e in entries] + [DEFAULT_HARVEST_WINDOW_DAYS], dtype=float)
+        tender = [e.min_temp is not None and e.min_temp > FREEZING_F for e in entries]
+        self.tender = np.array(tender + [False], dtype=bool)
+        self.season = np.array([_season_code(e.growing_seasons, t) for e, t in zip(entries, tender)]
+                               + [SEASONS.index("spring")], dtype=np.int8)
+
+    def lookup(self, species_ids: np.ndarray) -> np.ndarray:
+        """Row of each species ID; unknown IDs get the defaults row"""
+        positions = np.searchsorted(self.ids, species_ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == species_ids[found]
+        return np.where(found, positions, len(self.ids))
+
+
+_timings: Optional[SpeciesTimings] = None
+_timings_lock = threading.Lock()
+
+
+def species_timings(db: Session) -> SpeciesTimings:
+    global _timings
+    catalog = catalog_store.get(db)
+    with _timings_lock:
+        if _timings is None or _timings.catalog is not catalog:
+            _timings = SpeciesTimings(catalog)
+        return _timings
+
+
+def compute_intervals(timings: SpeciesTimings, species_ids: np.ndarray, planted: np.ndarray,
+                      last_frost: np.ndarray, first_frost: np.ndarray, year: int) -> Dict[str, np.ndarray]:
+    """
+    Planting and harvest intervals (day ordinals, NaN when unknown) for a batch
+    of plants, possibly from many gardens. planted holds planted_date ordinals,
+    NaN for plants not yet sown, which are scheduled in year; last_frost and
+    first_frost are each plant's garden frost codes (FrostDates.codes).
+    """
+    rows = timings.lookup(species_ids.astype(np.int64))
+    days = timings.days_to_harvest[rows]
+    window = timings.harvest_window[rows]
+    tender = timings.tender[rows]
+    season = timings.season[rows]
+
+    sown = ~np.isnan(planted)
+    years = np.where(sown, _years(np.nan_to_num(planted)), year)
+    last = _month_day_ordinals(years, last_frost)
+    first = _month_day_ordinals(years, first_frost)
+    fall_limit = np.where(np.isnan(first), _month_day_ordinals(years, np.full(len(years), 1231)), first)
+    lead = np.where(np.isnan(days), _FALLBACK_DAYS_TO_HARVEST, days)
+
+    # Sowing window per season, relative to the frost dates
+    seasons = [season == 0, season == 1, season == 2]
+    window_start = np.select(seasons, [last - 28, last + 14, fall_limit - lead - 42], fall_limit - 28)
+    window_end = np.select(seasons, [last + 14, last + 56, fall_limit - lead - 14], fall_limit)
+    plant_start = np.where(sown, planted, window_start)
+    plant_end = np.where(sown, planted, window_end)
+    harvest_start = plant_start + days
+    harvest_end = plant_end + days + window
+
+    # Tender crops stop at the first frost; one that would only ripen after it yields nothing
+    with np.errstate(invalid="ignore"):
+        killed = tender & ~np.isnan(first) & (harvest_end > first)
+        harvest_end = np.where(killed, np.minimum(harvest_end, first), harvest_end)
+        lost = killed & (harvest_start >= first)
+    harvest_start = np.where(lost, np.nan, harvest_start)
+    harvest_end = np.where(lost, np.nan, harvest_end)
+    return {
+        "plant_start": plant_start, "plant_end": plant_end,
+        "harvest_start": harvest_start, "harvest_end": harvest_end,
+        "frost_cut": killed, "scheduled": ~sown,
+    }
+
+
+class IntervalIndex:
+    """Static set of closed [start, end] intervals with binary-search queries"""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.order = np.argsort(starts, kind="stable")
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        # Running maximum of ends lets a query skip the prefix that finished before it
+        self._max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+        self._sorted_ends = np.sort(ends)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, low: float, high: float) -> np.ndarray:
+        """Positions (in the input order) of intervals overlapping [low, high]"""
+        stop = int(np.searchsorted(self.starts, high, side="right"))
+        first = int(np.searchsorted(self._max_end[:stop], low, side="left"))
+        candidates = np.arange(first, stop)
+        return self.order[candidates[self.ends[candidates] >= low]]
+
+    def count_overlapping(self, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+        """Number of intervals overlapping each [low, high]"""
+        started = np.searchsorted(self.starts, highs, side="right")
+        finished = np.searchsorted(self._sorted_ends, lows, side="left")
+        return started - finished
+
+    def busy_periods(self, minimum: int) -> List[Tuple[int, int]]:
+        """Maximal [start, end] day ranges during which at least minimum intervals are open"""
+        if len(self) < minimum:
+            return []
+        # The open count only changes on a start day or the day after an end
+        days = np.unique(np.concatenate([self.starts, self._sorted_ends + 1]))
+        busy = self.count_overlapping(days, days) >= minimum
+        edges = np.flatnonzero(np.diff(np.concatenate([[False], busy, [False]]).astype(np.int8)))
+        # Nothing is open after the last event day, so every busy run ends before it
+        return [(int(days[begin]), int(days[end]) - 1) for begin, end in zip(edges[::2], edges[1::2])]
+
+
+def _iso(ordinal: float) -> Optional[str]:
+    return None if np.isnan(ordinal) else date.fromordinal(int(ordinal)).isoformat()
+
+
+class GardenCalendar:
+    """One garden's plant intervals for a calendar year, kept in step with the change log"""
+
+    def __init__(self, garden_id: int, year: int):
+        self.garden_id = garden_id
+        self.year = year
+        self.sequence = -1
+        self.lock = threading.Lock()
+        self._timings: Optional[SpeciesTimings] = None
+        self._frost: Optional[FrostDates] = None
+        # plant id -> (species id, planted ordinal or NaN)
+        self._plants: Dict[int, Tuple[int, float]] = {}
+        self._intervals: Dict[str, np.ndarray] = {}
+        self._ids = np.empty(0, dtype=np.int64)
+        self._species = np.empty(0, dtype=np.int64)
+        self._planting: Optional[IntervalIndex] = None
+        self._harvest: Optional[IntervalIndex] = None
+        self._harvested = np.empty(0, dtype=np.intp)  # Rows with a harvest, in _harvest's input order
+
+    def load(self, plants: Dict[int, Tuple[int, float]], frost: FrostDates, timings: SpeciesTimings,
+             sequence: int, reason: str, intervals: Optional[Dict[str, np.ndarray]] = None):
+        """Replace the calendar's contents; intervals, if given, are already computed in plant ID order"""
+        self._plants = plants
+        self._frost = frost
+        self._timings = timings
+        self.sequence = sequence
+        self._recompute(reason, precomputed=intervals)
+
+    def _recompute(self, reason: str, changed: Optional[Iterable[int]] = None,
+                   precomputed: Optional[Dict[str, np.ndarray]] = None):
+        """Recompute intervals of changed plants (all when None) and rebuild the indexes"""
+        calendar_builds.inc(reason=reason)
+        if precomputed is not None:
+            self._ids = np.array(sorted(self._plants), dtype=np.int64)
+            self._intervals = precomputed
+        elif changed is None or not self._intervals:
+            ids = np.array(sorted(self._plants), dtype=np.int64)
+            self._intervals = self._compute(ids)
+            self._ids = ids
+        else:
+            changed = set(changed)
+            keep = ~np.isin(self._ids, list(changed))
+            fresh_ids = np.array(sorted(i for i in changed if i in self._plants), dtype=np.int64)
+            fresh = self._compute(fresh_ids)
+            ids = np.concatenate([self._ids[keep], fresh_ids])
+            order = np.argsort(ids)
+            self._intervals = {key: np.concatenate([values[keep], fresh[key]])[order]
+                               for key, values in self._intervals.items()}
+            self._ids = ids[order]
+        self._species = np.array([self._plants[i][0] for i in self._ids.tolist()], dtype=np.int64)
+        intervals = self._intervals
+        self._planting = IntervalIndex(intervals["plant_start"], intervals["plant_end"])
+        harvested = ~np.isnan(intervals["harvest_start"])
+        self._harvested = np.flatnonzero(harvested)
+        self._harvest = IntervalIndex(intervals["harvest_start"][harvested], intervals["harvest_end"][harvested])
+
+    def _compute(self, ids: np.ndarray) -> Dict[str, np.ndarray]:
+        species = np.array([self._plants[i][0] for i in ids.tolist()], dtype=np.int64)
+        planted = np.array([self._plants[i][1] for i in ids.tolist()], dtype=float)
+        last, first = self._frost.codes()
+        return compute_intervals(self._timings, species, planted, np.full(len(ids), last),
+                                 np.full(len(ids), first), self.year)
+
+    def build(self, db: Session):
+        sequence = db.execute(
+            select(func.max(GardenChange.id)).where(GardenChange.garden_id == self.garden_id)
+        ).scalar() or 0
+        garden = db.get(Garden, self.garden_id)
+        rows = db.execute(
+            select(Plant.id, Plant.species_id, Plant.planted_date).where(Plant.garden_id == self.garden_id)
+        ).all()
+        self.load({row[0]: _plant_row(row) for row in rows}, _frost_of(garden), species_timings(db),
+                  sequence, "load")
+
+    def sync(self, db: Session):
+        """Apply committed plant changes, catalog rebuilds and frost-date edits since the last sync"""
+        if self.sequence < 0:
+            self.build(db)
+            return
+        garden = db.get(Garden, self.garden_id)
+        if (garden.changes_compacted_seq or 0) > self.sequence:
+            self.build(db)
+            return
+        timings = species_timings(db)
+        frost = _frost_of(garden)
+        if timings is not self._timings or frost != self._frost:
+            reason = "frost" if frost != self._frost else "catalog"
+            self._timings, self._frost = timings, frost
+            self._recompute(reason)
+        rows = db.execute(
+            select(GardenChange.id, GardenChange.entity_id).where(
+                GardenChange.garden_id == self.garden_id,
+                GardenChange.entity == "plant",
+                GardenChange.id > self.sequence
+            ).order_by(GardenChange.id)
+        ).all()
+        if not rows:
+            return
+        changed = sorted({entity_id for _, entity_id in rows})
+        current = {}
+        for start in range(0, len(changed), 500):
+            current.update(
+                (row[0], _plant_row(row)) for row in db.execute(
+                    select(Plant.id, Plant.species_id, Plant.planted_date).where(
+                        Plant.id.in_(changed[start:start + 500]),
+                        Plant.garden_id == self.garden_id
+                    )
+                )
+            )
+        for plant_id in changed:
+            if plant_id in current:
+                self._plants[plant_id] = current[plant_id]
+            else:
+                self._plants.pop(plant_id, None)  # Deleted or moved to another garden
+        self._recompute("change", changed)
+        self.sequence = rows[-1][0]
+
+    def summary(self, start: Optional[date] = None, end: Optional[date] = None,
+                min_concurrent: int = 2) -> dict:
+        """Plant intervals (optionally those touching [start, end]), weekly workload and harvest overlaps"""
+        year_start, year_end = date(self.year, 1, 1), date(self.year, 12, 31)
+        low = (start or year_start).toordinal()
+        high = (end or year_end).toordinal()
+        intervals = self._intervals
+        # Plants sowing or harvesting within the range
+        selected = np.union1d(self._planting.overlapping(low, high),
+                              self._harvested[self._harvest.overlapping(low, high)])
+        plants = [
+            {
+                "plant_id": int(self._ids[i]),
+                "species_id": int(self._species[i]),
+                "planting": [_iso(intervals["plant_start"][i]), _iso(intervals["plant_end"][i])],
+                "harvest": None if np.isnan(intervals["harvest_start"][i]) else
+                [_iso(intervals["harvest_start"][i]), _iso(intervals["harvest_end"][i])],
+                "scheduled": bool(intervals["scheduled"][i]),
+                "frost_cut": bool(intervals["frost_cut"][i]),
+            }
+            for i in selected.tolist()
+        ]
+
+        # Monday-aligned weeks covering the calendar year
+        first_monday = year_start.toordinal() - year_start.weekday()
+        week_starts = np.arange(first_monday, year_end.toordinal() + 1, 7, dtype=float)
+        sowing = self._planting.count_overlapping(week_starts, week_starts + 6)
+        harvesting = self._harvest.count_overlapping(week_starts, week_starts + 6)
+        weeks = [
+            {"week_start": _iso(w), "planting": int(p), "harvesting": int(h)}
+            for w, p, h in zip(week_starts, sowing, harvesting)
+        ]
+
+        overlaps = []
+        for begin, finish in self._harvest.busy_periods(min_concurrent):
+            if finish < year_start.toordinal() or begin > year_end.toordinal():
+                continue
+            members = self._harvested[self._harvest.overlapping(begin, finish)]
+            overlaps.append({
+                "start": _iso(begin), "end": _iso(finish),
+                "plants": len(members),
+                "species_ids": sorted(set(self._species[members].tolist())),
+            })
+        return {
+            "garden_id": self.garden_id,
+            "year": self.year,
+            "frost": self._frost.as_dict(self.year),
+            "plants": plants,
+            "weeks": weeks,
+            "harvest_overlaps": overlaps,
+        }
+
+
+def _plant_row(row) -> Tuple[int, float]:
+    _, species_id, planted_date = row
+    return (species_id or 0, np.nan if planted_date is None else float(planted_date.toordinal()))
+
+
+def _frost_of(garden: Optional[Garden]) -> FrostDates:
+    if garden is None:
+        return FrostDates(*DEFAULT_FROST, "default")
+    return FrostDates.for_garden(garden.climate_zone, garden.last_frost_date, garden.first_frost_date)
+
+
+class CalendarRegistry:
+    """Per (garden, year) calendars, least recently used evicted first"""
+
+    def __init__(self, max_gardens: int = CALENDAR_MAX_GARDENS):
+        self.max_gardens = max_gardens
+        self._calendars: "OrderedDict[Tuple[int, int], GardenCalendar]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, garden_id: int, year: int) -> GardenCalendar:
+        key = (garden_id, year)
+        with self._lock:
+            calendar = self._calendars.get(key)
+            if calendar is None:
+                calendar = GardenCalendar(garden_id, year)
+                self._calendars[key] = calendar
+            self._calendars.move_to_end(key)
+            while len(self._calendars) > self.max_gardens:
+                self._calendars.popitem(last=False)
+        return calendar
+
+    @contextmanager
+    def use(self, db: Session, garden_id: int, year: int):
+        """The garden's calendar for year, synced with committed changes"""
+        calendar = self._get(garden_id, year)
+        with calendar.lock:
+            calendar.sync(db)
+            yield calendar
+
+    def build_all(self, db: Session, year: int) -> int:
+        """Compute calendars for every garden in one pass; returns the number of gardens"""
+        sequences = dict(db.execute(
+            select(GardenChange.garden_id, func.max(GardenChange.id)).group_by(GardenChange.garden_id)
+        ).all())
+        gardens = db.execute(
+            select(Garden.id, Garden.climate_zone, Garden.last_frost_date, Garden.first_frost_date)
+        ).all()
+        rows = db.execute(
+            select(Plant.garden_id, Plant.id, Plant.species_id, Plant.planted_date)
+            .where(Plant.garden_id.is_not(None)).order_by(Plant.garden_id, Plant.id)
+        ).all()
+        frost = {garden_id: FrostDates.for_garden(zone, last, first) for garden_id, zone, last, first in gardens}
+        codes = {garden_id: dates.codes() for garden_id, dates in frost.items()}
+        rows = [row for row in rows if row[0] in frost]
+        garden_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        plant_rows = [_plant_row(row[1:]) for row in rows]
+
+        # One array pass over every plant of every garden
+        timings = species_timings(db)
+        intervals = compute_intervals(
+            timings,
+            np.array([species for species, _ in plant_rows], dtype=np.int64),
+            np.array([planted for _, planted in plant_rows], dtype=float),
+            np.array([codes[g][0] for g in garden_ids.tolist()], dtype=np.int64),
+            np.array([codes[g][1] for g in garden_ids.tolist()], dtype=np.int64),
+            year,
+        )
+        bounds = np.searchsorted(garden_ids, np.array(sorted(frost), dtype=np.int64), side="left")
+        ends = np.searchsorted(garden_ids, np.array(sorted(frost), dtype=np.int64), side="right")
+        for garden_id, start, stop in zip(sorted(frost), bounds.tolist(), ends.tolist()):
+            calendar = self._get(garden_id, year)
+            with calendar.lock:
+                calendar.load(
+                    {rows[i][1]: plant_rows[i] for i in range(start, stop)}, frost[garden_id], timings,
+                    sequences.get(garden_id, 0), "batch",
+                    {key: values[start:stop] for key, values in intervals.items()},
+                )
+        return len(gardens)
+
+    def clear(self):
+        with self._lock:
+            self._calendars.clear()
+
+    def __len__(self):
+        return len(self._calendars)
+
+
+calendars = CalendarRegistry()
+
+registry.gauge("calendar_gardens", "Garden calendars held in memory", callback=lambda: len(calendars))
@@ -0,0 +1,246 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, delete, event, exists, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.metrics import registry
+from app.pubsub import get_broker
+from app.services.live_updates import garden_topic
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.garden_change import GardenChange
+from app.models.plant import Plant
+from app.models.zone import Zone
+
+# Garden change feed
+# Every committed feature/zone/plant write appends (garden, entity, id, op) to
+# garden_changes. Entries carry no payload: readers collapse them to the latest
+# op per entity and load current rows, so a sync costs O(changes since N).
+# Compaction removes entries superseded by a newer one for the same entity
+# (lossless for any client) and drops delete tombstones past their retention,
+# recording the highest dropped sequence so older clients are told to reset.
+# Committed entries are also published per garden for live updates.
+
+CHANGE_LOG_COMPACT_EVERY = int(os.getenv("CHANGE_LOG_COMPACT_EVERY", "500"))
+CHANGE_LOG_TOMBSTONE_DAYS = int(os.getenv("CHANGE_LOG_TOMBSTONE_DAYS", "30"))
+
+ENTITY_MODELS = {"feature": Feature, "zone": Zone, "plant": Plant}
+_ENTITY_BY_TABLE = {model.__tablename__: entity for entity, model in ENTITY_MODELS.items()}
+
+# Serializes change-log appends per garden on PostgreSQL so sequence numbers
+# become visible in commit order; the first key namespaces the advisory lock
+_ADVISORY_LOCK_NAMESPACE = 0x6761
+
+_changes = GardenChange.__table__
+
+appended_entries = registry.counter(
+    "change_log_entries_appended_total",
+    "Entries appended to garden change logs",
+    labelnames=("op",),
+)
+compacted_entries = registry.counter(
+    "change_log_entries_compacted_total",
+    "Change-log entries removed by compaction",
+    labelnames=("reason",),
+)
+
+# Session.info key holding entries to publish once the transaction commits
+_UNPUBLISHED_KEY = "change_log_unpublished"
+
+_appends_since_compaction: Dict[int, int] = {}
+_compaction_lock = threading.Lock()
+
+
+def _serialize(obj) -> dict:
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _entries_for(obj, deleted: bool = False) -> List[dict]:
+    """Change-log entries for a flushed model instance"""
+    entity = _ENTITY_BY_TABLE.get(getattr(obj, "__tablename__", None))
+    if entity is None or obj.id is None:
+        return []
+    history = inspect(obj).attrs.garden_id.history
+    previous = history.deleted[0] if history.deleted else None
+    if deleted:
+        garden_id = previous if previous is not None else obj.garden_id
+        return [] if garden_id is None else [
+            {"garden_id": garden_id, "entity": entity, "entity_id": obj.id, "op": "delete"}
+        ]
+    entries = []
+    if previous is not None and previous != obj.garden_id:
+        # Moved: gone from the old garden's point of view
+        entries.append({"garden_id": previous, "entity": entity, "entity_id": obj.id, "op": "delete"})
+    if obj.garden_id is not None:
+        entries.append({"garden_id": obj.garden_id, "entity": entity, "entity_id": obj.id, "op": "upsert",
+                        "data": _serialize(obj)})
+    return entries
+
+
+def record_changes(session: Session, entries: Iterable[dict]):
+    """
+    Append change-log entries in the session's transaction (for bulk statements
+    and raw SQL). An entry may carry the row's serialized "data" for live updates.
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    connection = session.connection()
+    garden_ids = sorted({entry["garden_id"] for entry in entries})
+    if connection.dialect.name == "postgresql":
+        for garden_id in garden_ids:
+            connection.execute(select(func.pg_advisory_xact_lock(_ADVISORY_LOCK_NAMESPACE, garden_id)))
+    sequences = connection.scalars(
+        insert(_changes).returning(_changes.c.id, sort_by_parameter_order=True),
+        [{key: value for key, value in entry.items() if key != "data"} for entry in entries]
+    ).all()
+    session.info.setdefault(_UNPUBLISHED_KEY, []).extend(
+        {"garden_id": entry["garden_id"], "seq": seq, "entity": entry["entity"],
+         "id": entry["entity_id"], "op": entry["op"], "data": entry.get("data")}
+        for entry, seq in zip(entries, sequences)
+    )
+    for entry in entries:
+        appended_entries.inc(op=entry["op"])
+
+    due = []
+    with _compaction_lock:
+        for entry in entries:
+            count = _appends_since_compaction.get(entry["garden_id"], 0) + 1
+            _appends_since_compaction[entry["garden_id"]] = count
+        for garden_id in garden_ids:
+            if _appends_since_compaction[garden_id] >= CHANGE_LOG_COMPACT_EVERY:
+                _appends_since_compaction[garden_id] = 0
+                due.append(garden_id)
+    for garden_id in due:
+        compact_garden(connection, garden_id)
+
+
+def compact_garden(connection, garden_id: int, now: Optional[datetime] = None):
+    """Drop superseded entries and expired delete tombstones of one garden's change log"""
+    newer = _changes.alias("newer")
+    superseded = exists().where(
+        newer.c.garden_id == _changes.c.garden_id,
+        newer.c.entity == _changes.c.entity,
+        newer.c.entity_id == _changes.c.entity_id,
+        newer.c.id > _changes.c.id,
+    )
+    result = connection.execute(delete(_changes).where(_changes.c.garden_id == garden_id, superseded))
+    compacted_entries.inc(max(result.rowcount, 0), reason="superseded")
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=CHANGE_LOG_TOMBSTONE_DAYS)
+    expired = and_(
+        _changes.c.garden_id == garden_id,
+        _changes.c.op == "delete",
+        _changes.c.created_at < cutoff,
+    )
+    watermark = connection.execute(select(func.max(_changes.c.id)).where(expired)).scalar()
+    if watermark is None:
+        return
+    result = connection.execute(delete(_changes).where(expired))
+    compacted_entries.inc(max(result.rowcount, 0), reason="expired")
+    gardens = Garden.__table__
+    connection.execute(
+        update(gardens).where(gardens.c.id == garden_id).values(
+            changes_compacted_seq=case(
+                (gardens.c.changes_compacted_seq < watermark, watermark),
+                else_=gardens.c.changes_compacted_seq,
+            )
+        )
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session, flush_context):
+    # new/dirty/deleted still describe the flushed objects at this point
+    entries = list(chain.from_iterable(
+        _entries_for(obj) for obj in chain(session.new, session.dirty)
+        if obj in session.new or session.is_modified(obj, include_collections=False)
+    ))
+    entries.extend(chain.from_iterable(_entries_for(obj, deleted=True) for obj in session.deleted))
+    record_changes(session, entries)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_changes(session):
+    changes = session.info.pop(_UNPUBLISHED_KEY, None)
+    if not changes:
+        return
+    by_garden: Dict[int, List[dict]] = {}
+    for change in changes:
+        by_garden.setdefault(change.pop("garden_id"), []).append(change)
+    broker = get_broker()
+    for garden_id, garden_changes in by_garden.items():
+        broker.publish(garden_topic(garden_id), garden_changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_unpublished_changes(session):
+    session.info.pop(_UNPUBLISHED_KEY, None)
+
+
+class ChangeLogService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def latest_sequence(self, garden_id: int) -> int:
+        return self.db.query(func.max(GardenChange.id)).filter(GardenChange.garden_id == garden_id).scalar() or 0
+
+    def changes_since(self, garden_id: int, since: int, limit: int = 1000) -> Optional[dict]:
+        """
+        Changes of a garden after sequence number `since`, collapsed to the latest
+        op per entity. Returns None if the garden does not exist. When `since`
+        predates compacted history the response has reset=True and the client
+        must reload the garden, then continue from `next`.
+        """
+        compacted = self.db.query(Garden.changes_compacted_seq).filter(Garden.id == garden_id).scalar()
+        if compacted is None:
+            return None
+        if since < compacted:
+            # The newest entries may have been expired tombstones, so never resume below the watermark
+            resume_from = max(self.latest_sequence(garden_id), compacted)
+            return {"garden_id": garden_id, "since": since, "next": resume_from,
+                    "has_more": False, "reset": True, "changes": []}
+
+        rows = self.db.query(GardenChange).filter(
+            GardenChange.garden_id == garden_id,
+            GardenChange.id > since
+        ).order_by(GardenChange.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        latest = {}
+        for row in rows:
+            latest[(row.entity, row.entity_id)] = row
+
+        upserts: Dict[str, List[int]] = {}
+        for (entity, entity_id), row in latest.items():
+            if row.op == "upsert":
+                upserts.setdefault(entity, []).append(entity_id)
+        current = {}
+        for entity, ids in upserts.items():
+            model = ENTITY_MODELS[entity]
+            for start in range(0, len(ids), 500):
+                for obj in self.db.query(model).filter(model.id.in_(ids[start:start + 500])):
+                    current[(entity, obj.id)] = obj
+
+        changes = []
+        for key, row in sorted(latest.items(), key=lambda item: item[1].id):
+            obj = current.get(key)
+            if row.op == "upsert" and obj is not None and obj.garden_id == garden_id:
+                changes.append({"seq": row.id, "entity": row.entity, "id": row.entity_id,
+                                "op": "upsert", "data": _serialize(obj)})
+            else:
+                # Deleted, moved away or removed outside the ORM since the entry was written
+                changes.append({"seq": row.id, "entity": row.entity, "id": row.entity_id,
+                                "op": "delete", "data": None})
+
+        return {"garden_id": garden_id, "since": since, "next": rows[-1].id if rows else since,
+                "has_more": has_more, "reset": False, "changes": changes}
+
+    def compact(self, garden_id: int):
+        compact_garden(self.db.connection(), garden_id)
+        self.db.commit()
@@ -0,0 +1,135 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Companion planting graph
+# PlantSpecies.companion_plants lists the IDs of good companions; a negative
+# ID (-7) marks a species to keep apart. Either side listing the other is
+# enough, so both relations are made symmetric, and a pair listed both ways
+# counts as antagonistic. The catalog compiles them once per build into CSR
+# arrays over dense species indexes (sorted neighbour slices), so a species'
+# companions are one slice, a pair check is a binary search in the shorter
+# slice, and "companions of all of X, Y, Z" is a bincount over k slices, all
+# independent of the catalog size.
+
+
+def parse_companions(values) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """(companion IDs, antagonist IDs) from a companion_plants JSON list"""
+    companions, antagonists = set(), set()
+    for value in values or ():
+        try:
+            species_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if species_id > 0:
+            companions.add(species_id)
+        elif species_id < 0:
+            antagonists.add(-species_id)
+    return tuple(sorted(companions - antagonists)), tuple(sorted(antagonists))
+
+
+def _csr(size: int, first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric, de-duplicated adjacency in CSR form"""
+    rows = np.concatenate([first, second])
+    cols = np.concatenate([second, first])
+    keep = rows != cols
+    pairs = np.unique(rows[keep].astype(np.int64) * size + cols[keep])
+    rows, cols = np.divmod(pairs, size)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+    return indptr, cols.astype(np.int32)
+
+
+class CompanionGraph:
+    """Immutable companion/antagonist adjacency over species IDs"""
+
+    def __init__(self, edges: Dict[int, Tuple[Sequence[int], Sequence[int]]]):
+        # Neighbours that are not themselves catalog species are dropped
+        self.ids = np.array(sorted(edges), dtype=np.int64)
+        size = len(self.ids)
+        self._csr = {}
+        for position, relation in enumerate(("companion", "antagonist")):
+            sources = np.fromiter((species_id for species_id, lists in edges.items() for _ in lists[position]),
+                                  dtype=np.int64)
+            targets = np.fromiter((target for lists in edges.values() for target in lists[position]),
+                                  dtype=np.int64)
+            known = self._lookup(targets)
+            self._csr[relation] = _csr(size, self._lookup(sources)[known >= 0], known[known >= 0])
+        # An antagonism overrides a companion listing in the other direction
+        sources, targets = self._edges("companion")
+        enemy_sources, enemy_targets = self._edges("antagonist")
+        conflicting = np.isin(sources * size + targets, enemy_sources * size + enemy_targets)
+        if conflicting.any():
+            self._csr["companion"] = _csr(size, sources[~conflicting], targets[~conflicting])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def edge_count(self, relation: str = "companion") -> int:
+        return len(self._csr[relation][1]) // 2
+
+    def index(self, species_id: int) -> Optional[int]:
+        position = int(np.searchsorted(self.ids, species_id))
+        if position < len(self.ids) and self.ids[position] == species_id:
+            return position
+        return None
+
+    def _lookup(self, wanted: np.ndarray) -> np.ndarray:
+        """Dense index of each species ID, -1 where it is not in the graph"""
+        positions = np.searchsorted(self.ids, wanted)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == wanted[found]
+        return np.where(found, positions, -1)
+
+    def indexes(self, species_ids: Iterable[int]) -> np.ndarray:
+        """Dense indexes of the species IDs that are in the graph"""
+        positions = self._lookup(np.fromiter(species_ids, dtype=np.int64))
+        return positions[positions >= 0]
+
+    def unknown(self, species_ids: Iterable[int]) -> List[int]:
+        return [species_id for species_id in species_ids if self.index(species_id) is None]
+
+    def _edges(self, relation: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Every directed (source, target) index pair of a relation"""
+        indptr, indices = self._csr[relation]
+        return np.repeat(np.arange(len(self.ids), dtype=np.int64), np.diff(indptr)), indices.astype(np.int64)
+
+    def _row(self, relation: str, index: int) -> np.ndarray:
+        indptr, indices = self._csr[relation]
+        return indices[indptr[index]:indptr[index + 1]]
+
+    def neighbours(self, species_id: int, relation: str = "companion") -> List[int]:
+        index = self.index(species_id)
+        return [] if index is None else self.ids[self._row(relation, index)].tolist()
+
+    def related(self, first: int, second: int, relation: str = "companion") -> bool:
+        a, b = self.index(first), self.index(second)
+        if a is None or b is None:
+            return False
+        # Search the shorter of the two rows
+        if len(self._row(relation, a)) > len(self._row(relation, b)):
+            a, b = b, a
+        row = self._row(relation, a)
+        position = int(np.searchsorted(row, b))
+        return position < len(row) and row[position] == b
+
+    def compatible_with_all(self, species_ids: Sequence[int]) -> List[int]:
+        """Species that are companions of every given species and antagonistic to none"""
+        members = np.unique(self.indexes(species_ids))
+        if len(members) == 0:
+            return []
+        # Work in the members' rows only, never over the whole catalog
+        neighbours, hits = np.unique(np.concatenate([self._row("companion", m) for m in members]),
+                                     return_counts=True)
+        # Companion rows already exclude antagonists of each member; also drop the members
+        candidates = set(neighbours[hits == len(members)].tolist()) - set(members.tolist())
+        return self.ids[sorted(candidates)].tolist()
+
+    def pairs_among(self, species_ids: Sequence[int], relation: str = "antagonist") -> List[Tuple[int, int]]:
+        """(a, b) pairs with a < b within a planting list that share the relation"""
+        members = np.unique(self.indexes(species_ids)).tolist()
+        wanted = set(members)
+        return [
+            (int(self.ids[m]), int(self.ids[h]))
+            for m in members for h in self._row(relation, m).tolist() if h > m and h in wanted
+        ]
@@ -0,0 +1,153 @@
+import math
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import shapely
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.plant import Plant, PlantSpecies
+from app.services.geometry_cache import get_transformer, reproject, utm_crs_for
+from app.services.spatial_index import METERS_PER_DEGREE, IndexLayer, spatial_indexes
+
+# Garden conflict detection
+# One pass over a garden's spatial index finds every plant pair closer than
+# (spacing_a + spacing_b) / 2, every pair of overlapping zones or features, and
+# features that straddle a zone boundary. The index only proposes candidate
+# pairs (a dwithin/intersects tree query for all rows at once); exact distances
+# and overlap areas are then computed for all candidates together in the
+# garden's UTM projection, in metres.
+
+# Overlaps smaller than this are shared edges or digitizing noise
+CONFLICT_MIN_OVERLAP_M2 = float(os.getenv("CONFLICT_MIN_OVERLAP_M2", "0.01"))
+
+CONFLICT_TYPES = ("plant_spacing", "zone_overlap", "feature_overlap", "feature_zone_intrusion")
+
+
+def _positions(ids: np.ndarray):
+    """Map row IDs back to their index in ids"""
+    order = np.argsort(ids)
+    return lambda row_ids: order[np.searchsorted(ids, row_ids, sorter=order)]
+
+
+def _self_pairs(layer: IndexLayer, ids: np.ndarray, geometries: np.ndarray,
+                predicate: str, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i < j) of a layer's rows satisfying predicate against each other"""
+    if len(ids) < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    left, right_ids = layer.query(geometries, predicate, **kwargs)
+    right = _positions(ids)(right_ids)
+    keep = left < right
+    return left[keep], right[keep]
+
+
+def _overlap_areas(first: np.ndarray, second: np.ndarray, utm_crs: str) -> np.ndarray:
+    if len(first) == 0:
+        return np.empty(0)
+    intersections = shapely.intersection(first, second)
+    return shapely.area(reproject(intersections, "EPSG:4326", utm_crs))
+
+
+class ConflictService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _spacing_cm(self, garden_id: int) -> Dict[int, float]:
+        rows = self.db.execute(
+            select(Plant.id, PlantSpecies.spacing)
+            .outerjoin(PlantSpecies, Plant.species_id == PlantSpecies.id)
+            .where(Plant.garden_id == garden_id)
+        ).all()
+        return {plant_id: spacing for plant_id, spacing in rows if spacing}
+
+    def check_garden(self, garden_id: int, limit: int = 1000) -> dict:
+        """Every spacing and overlap conflict in a garden, most severe first within each type"""
+        started = time.perf_counter()
+        spacing_cm = self._spacing_cm(garden_id)
+        with spatial_indexes.use(self.db, garden_id) as index:
+            plants = index.layers["plant"]
+            zones = index.layers["zone"]
+            features = index.layers["feature"]
+            plant_ids, plant_geometries = plants.snapshot()
+            zone_ids, zone_geometries = zones.snapshot()
+            feature_ids, feature_geometries = features.snapshot()
+
+            everything = np.concatenate([plant_geometries, zone_geometries, feature_geometries])
+            if len(everything) == 0:
+                conflicts = []
+            else:
+                minx, miny, maxx, maxy = shapely.total_bounds(everything)
+                utm_crs = utm_crs_for((minx + maxx) / 2, (miny + maxy) / 2)
+                conflicts = (
+                    self._plant_spacing(plants, plant_ids, plant_geometries, spacing_cm, utm_crs, max(abs(miny), abs(maxy)))
+                    + self._overlaps("zone_overlap", zones, zone_ids, zone_geometries, utm_crs)
+                    + self._overlaps("feature_overlap", features, feature_ids, feature_geometries, utm_crs)
+                    + self._intrusions(zones, feature_ids, feature_geometries, utm_crs)
+                )
+
+        counts = {kind: 0 for kind in CONFLICT_TYPES}
+        for conflict in conflicts:
+            counts[conflict["type"]] += 1
+        return {
+            "garden_id": garden_id,
+            "checked": {"plants": len(plant_ids), "zones": len(zone_ids), "features": len(feature_ids)},
+            "counts": counts,
+            "truncated": len(conflicts) > limit,
+            "conflicts": conflicts[:limit],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def _plant_spacing(self, layer: IndexLayer, ids: np.ndarray, points: np.ndarray,
+                       spacing_cm: Dict[int, float], utm_crs: str, max_abs_lat: float) -> List[dict]:
+        spacing = np.array([spacing_cm.get(int(i), 0.0) for i in ids], dtype=float) / 100
+        if len(ids) < 2 or not spacing.any():
+            return []
+        # Search radius in degrees covering the widest required separation at this latitude
+        widest = spacing.max()
+        radius = widest / (METERS_PER_DEGREE * max(math.cos(math.radians(min(max_abs_lat, 89.0))), 1e-6)) * 1.01
+        left, right = _self_pairs(layer, ids, points, "dwithin", distance=radius)
+
+        centres = shapely.get_coordinates(shapely.centroid(points))
+        x, y = get_transformer("EPSG:4326", utm_crs).transform(centres[:, 0], centres[:, 1])
+        distance = np.hypot(x[left] - x[right], y[left] - y[right])
+        required = (spacing[left] + spacing[right]) / 2
+        conflict = distance < required - 1e-6
+        left, right, distance, required = left[conflict], right[conflict], distance[conflict], required[conflict]
+        order = np.argsort(distance / required)
+        return [
+            {"type": "plant_spacing", "ids": [int(ids[a]), int(ids[b])],
+             "distance_m": round(float(d), 3), "required_m": round(float(r), 3)}
+            for a, b, d, r in zip(left[order], right[order], distance[order], required[order])
+        ]
+
+    def _overlaps(self, kind: str, layer: IndexLayer, ids: np.ndarray, geometries: np.ndarray,
+                  utm_crs: str) -> List[dict]:
+        left, right = _self_pairs(layer, ids, geometries, "intersects")
+        areas = _overlap_areas(geometries[left], geometries[right], utm_crs)
+        conflict = areas >= CONFLICT_MIN_OVERLAP_M2
+        left, right, areas = left[conflict], right[conflict], areas[conflict]
+        order = np.argsort(-areas)
+        return [
+            {"type": kind, "ids": [int(ids[a]), int(ids[b])], "overlap_m2": round(float(area), 3)}
+            for a, b, area in zip(left[order], right[order], areas[order])
+        ]
+
+    def _intrusions(self, zones: IndexLayer, feature_ids: np.ndarray, features: np.ndarray,
+                    utm_crs: str) -> List[dict]:
+        """Features partly inside and partly outside a zone"""
+        if len(feature_ids) == 0 or len(zones) == 0:
+            return []
+        left, zone_ids = zones.query(features, "intersects")
+        inside = _overlap_areas(features[left], zones.geometries_of(zone_ids), utm_crs)
+        feature_areas = shapely.area(reproject(features, "EPSG:4326", utm_crs))[left]
+        outside = feature_areas - inside
+        conflict = (inside >= CONFLICT_MIN_OVERLAP_M2) & (outside >= CONFLICT_MIN_OVERLAP_M2)
+        left, zone_ids, inside, outside = left[conflict], zone_ids[conflict], inside[conflict], outside[conflict]
+        order = np.argsort(-inside)
+        return [
+            {"type": "feature_zone_intrusion", "feature_id": int(feature_ids[f]), "zone_id": int(z),
+             "overlap_m2": round(float(a), 3), "outside_m2": round(float(o), 3)}
+            for f, z, a, o in zip(left[order], zone_ids[order], inside[order], outside[order])
+        ]
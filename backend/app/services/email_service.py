@@ -1,7 +1,11 @@
 
-import requests
 import os
 from dotenv import load_dotenv
+from app.instrumentation import upstream_call
+from app.lazy_imports import lazy_module
+
+# Imported on the first email sent
+requests = lazy_module("requests")
 load_dotenv()
 
 BREVO_API_KEY = os.getenv('BREVO_API_KEY')
@@ -34,5 +38,7 @@ def send_registration_email(to_email: str, registration_link: str):
             <a href='{registration_link}'>{registration_link}</a>
         """
     }
-    response = requests.post(BREVO_API_URL, headers=headers, json=data)
+    with upstream_call("brevo") as call:
+        response = requests.post(BREVO_API_URL, headers=headers, json=data)
+        call.status = response.status_code
     response.raise_for_status()
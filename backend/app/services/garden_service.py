@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-import geopandas as gpd
 from shapely.geometry import shape, Point, Polygon
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -7,9 +6,27 @@ from app.models.garden import Garden
 from app.models.zone import Zone
 from app.models.plant import Plant, PlantSpecies
 from app.models.weather import WeatherData
+from app.services.geometry_cache import geometry_cache
+from app.services.recommendation_service import SiteBucket, recommendations
 from app.services.us_location_service import USLocationService
 from app.services.usda_service import USDAService
 
+def _parse_date(value):
+    """Frost date from the USDA lookup ("2024-04-15", "04-15" or "Apr 15"), or None"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        pass
+    # Only month and day matter; a leap year keeps Feb 29
+    for fmt in ("%m-%d", "%b %d", "%B %d"):
+        try:
+            return datetime.strptime(f"2000 {value}", f"%Y {fmt}").date()
+        except ValueError:
+            continue
+    return None
+
 class GardenService:
     def __init__(self):
         self.location_service = USLocationService()
@@ -39,6 +56,8 @@ class GardenService:
         try:
             hardiness_data = await self.usda_service.get_hardiness_zone(zip_code)
             garden.climate_zone = hardiness_data["zone"]
+            garden.last_frost_date = _parse_date(hardiness_data.get("last_frost_date"))
+            garden.first_frost_date = _parse_date(hardiness_data.get("first_frost_date"))
         except Exception as e:
             # Log the error but continue without hardiness zone
             print(f"Failed to get hardiness zone: {e}")
@@ -76,16 +95,14 @@ class GardenService:
             soil_moisture=zone_data.get('soil_moisture')
         )
         
-        # If we have the garden's climate zone, get compatible plants
-        if garden.climate_zone:
-            try:
-                # Get native plants for the zone
-                native_plants = await self.usda_service.get_native_plants(garden.climate_zone[:2])  # Use state code from zone
-                
-                # Store this data for plant recommendations
-                zone.recommended_plants = [p['id'] for p in native_plants[:10]]  # Store top 10 recommendations
-            except Exception as e:
-                print(f"Failed to get plant recommendations: {e}")
+        # Rank catalog species for the zone's conditions; zones in the same
+        # climate/sun/soil bucket share one cached ranking
+        bucket = SiteBucket.of(garden.climate_zone, zone.sun_exposure, zone.soil_ph, zone.soil_moisture)
+        try:
+            ranked = await db.run_sync(lambda session: recommendations.recommend(session, bucket, limit=10))
+            zone.recommended_plants = [p['id'] for p in ranked]
+        except Exception as e:
+            print(f"Failed to get plant recommendations: {e}")
         
         db.add(zone)
         await db.commit()
@@ -114,6 +131,6 @@ class GardenService:
         return plant
 
     def _is_point_in_zone(self, point: Point, zone: Zone) -> bool:
-        """Check if a point is within a zone's boundary"""
-        zone_shape = shape(zone.boundary)
-        return zone_shape.contains(point)
+        """Check if a point is within a zone's boundary; a zone without one contains nothing"""
+        cached = geometry_cache.get(zone)
+        return cached is not None and cached.prepared.contains(point)
@@ -0,0 +1,166 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.prepared import prep
+from sqlalchemy import event
+
+from app.lazy_imports import lazy_module
+from app.metrics import registry
+from app.models.geometry import load_geometry
+from app.models.mixins import VersionedMixin
+
+if TYPE_CHECKING:
+    from pyproj import Transformer
+
+# Loaded with the first reprojection
+pyproj = lazy_module("pyproj")
+
+# Parsed-geometry cache
+# Stored boundaries are parsed once per (table, id, row version, column) and kept
+# with their prepared form, UTM projection, centroid and bounds. Entries are
+# evicted least-recently-used once the approximate memory footprint exceeds the cap.
+
+GEOMETRY_CACHE_MAX_BYTES = int(os.getenv("GEOMETRY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Rough per-entry overhead for the Python/GEOS objects around the coordinates
+_ENTRY_OVERHEAD_BYTES = 2048
+_BYTES_PER_COORDINATE = 16
+
+cache_lookups = registry.counter(
+    "geometry_cache_lookups_total",
+    "Parsed-geometry cache lookups",
+    labelnames=("result",),
+)
+
+
+@dataclass(frozen=True)
+class CachedGeometry:
+    geometry: object          # shapely geometry in WGS84
+    prepared: object          # prepared geometry for repeated predicates
+    centroid: object          # shapely Point in WGS84
+    bounds: Tuple[float, float, float, float]
+    utm_crs: str
+    utm_geometry: object      # geometry projected to its local UTM zone (meters)
+    nbytes: int
+
+
+def utm_crs_for(lon: float, lat: float) -> str:
+    """Get the UTM zone CRS for a WGS84 coordinate"""
+    zone_number = min(int((lon + 180) / 6) + 1, 60)
+    prefix = "326" if lat >= 0 else "327"
+    return f"EPSG:{prefix}{zone_number:02d}"
+
+
+@lru_cache(maxsize=64)
+def get_transformer(from_crs: str, to_crs: str) -> "Transformer":
+    return pyproj.Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+
+def reproject(geometry, from_crs: str, to_crs: str):
+    """Reproject a shapely geometry with a cached pyproj transformer"""
+    transformer = get_transformer(from_crs, to_crs)
+    return shapely.transform(
+        geometry,
+        lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1]))
+    )
+
+
+def build_cached_geometry(geometry) -> CachedGeometry:
+    """Precompute everything callers need from a parsed geometry"""
+    centroid = geometry.centroid
+    utm_crs = utm_crs_for(centroid.x, centroid.y)
+    utm_geometry = reproject(geometry, "EPSG:4326", utm_crs)
+    coordinates = int(shapely.get_num_coordinates(geometry))
+    return CachedGeometry(
+        geometry=geometry,
+        prepared=prep(geometry),
+        centroid=centroid,
+        bounds=tuple(geometry.bounds),
+        utm_crs=utm_crs,
+        utm_geometry=utm_geometry,
+        # Original + projected + prepared copies of the coordinates
+        nbytes=_ENTRY_OVERHEAD_BYTES + coordinates * _BYTES_PER_COORDINATE * 3,
+    )
+
+
+class GeometryCache:
+    """LRU cache of parsed geometries with a memory cap"""
+
+    def __init__(self, max_bytes: int = GEOMETRY_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[tuple, CachedGeometry]" = OrderedDict()
+        self._row_keys: dict = {}  # (table, id) -> cache keys for every cached version
+        self._lock = threading.Lock()
+
+    def get(self, obj, column: str = "boundary") -> Optional[CachedGeometry]:
+        """Get the cached geometry for a model instance's geometry column"""
+        value = getattr(obj, column)
+        if value is None:
+            return None
+        if obj.id is None:
+            # Not flushed yet, nothing stable to key on
+            return build_cached_geometry(load_geometry(value))
+
+        key = (obj.__tablename__, obj.id, getattr(obj, "version", None), column)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                cache_lookups.inc(result="hit")
+                return entry
+
+        cache_lookups.inc(result="miss")
+        entry = build_cached_geometry(load_geometry(value))
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._row_keys.setdefault(key[:2], set()).add(key)
+                self.current_bytes += entry.nbytes
+                self._evict()
+        return entry
+
+    def invalidate(self, table: str, row_id: int):
+        """Drop every cached version of a row"""
+        with self._lock:
+            for key in self._row_keys.pop((table, row_id), ()):
+                self.current_bytes -= self._entries.pop(key).nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._row_keys.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and self._entries:
+            key, entry = self._entries.popitem(last=False)
+            self.current_bytes -= entry.nbytes
+            row_keys = self._row_keys.get(key[:2])
+            if row_keys is not None:
+                row_keys.discard(key)
+                if not row_keys:
+                    del self._row_keys[key[:2]]
+
+
+geometry_cache = GeometryCache()
+
+registry.gauge("geometry_cache_entries", "Parsed geometries held in the cache",
+               callback=lambda: len(geometry_cache))
+registry.gauge("geometry_cache_bytes", "Approximate memory held by the geometry cache",
+               callback=lambda: geometry_cache.current_bytes)
+
+
+@event.listens_for(VersionedMixin, "after_update", propagate=True)
+@event.listens_for(VersionedMixin, "after_delete", propagate=True)
+def _invalidate_cached_geometry(mapper, connection, target):
+    geometry_cache.invalidate(target.__tablename__, target.id)
@@ -0,0 +1,203 @@
+import os
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.models.garden import Garden
+from app.models.garden_grid import GardenGrid
+
+# Persisted planning grids
+# A cell ID packs the physical row and column slot: row_slot << 16 | col_slot.
+# Slots never move, only row_order/col_order change, so inserting or deleting
+# a row or column touches one list and the cells of that row/column: O(row
+# length) instead of a rebuild, and every other cell keeps its ID. Freed slots
+# are reused, which keeps IDs and the slot range bounded by the grid size.
+# Occupancy is held by PlantedCells (see planted_cell_service), indexed by the
+# same slots, so it never moves either.
+
+GRID_MAX_DIMENSION = int(os.getenv("GRID_MAX_DIMENSION", "1000"))
+CELL_ID_BITS = 16
+CELL_ID_MASK = (1 << CELL_ID_BITS) - 1
+
+
+class GridError(ValueError):
+    pass
+
+
+class CellNotFound(GridError):
+    pass
+
+
+def cell_id(row_slot: int, col_slot: int) -> int:
+    return (row_slot << CELL_ID_BITS) | col_slot
+
+
+def _allocate_slot(order: List[int]) -> int:
+    """Lowest slot not in use"""
+    used = set(order)
+    return next(slot for slot in range(len(order) + 1) if slot not in used)
+
+
+def _check_dimension(count: int):
+    if not 1 <= count <= GRID_MAX_DIMENSION:
+        raise GridError(f"Grid dimensions must be between 1 and {GRID_MAX_DIMENSION}")
+
+
+class GridService:
+    def __init__(self, db: Session):
+        # Imported here because planted_cell_service builds on this module
+        from app.services.planted_cell_service import PlantedCellService
+
+        self.db = db
+        self.planted = PlantedCellService(db)
+
+    def get_grid(self, garden_id: int) -> Optional[GardenGrid]:
+        return self.db.query(GardenGrid).filter(GardenGrid.garden_id == garden_id).first()
+
+    def create_grid(
+        self,
+        garden_id: int,
+        rows: int,
+        cols: int,
+        cell_size_feet: float = 1.0,
+        origin_lon: Optional[float] = None,
+        origin_lat: Optional[float] = None
+    ) -> Optional[GardenGrid]:
+        """Create or replace a garden's grid; returns None if the garden does not exist"""
+        _check_dimension(rows)
+        _check_dimension(cols)
+        if self.db.get(Garden, garden_id) is None:
+            return None
+        grid = self.get_grid(garden_id) or GardenGrid(garden_id=garden_id)
+        grid.cell_size_feet = cell_size_feet
+        grid.origin_lon = origin_lon
+        grid.origin_lat = origin_lat
+        grid.row_order = list(range(rows))
+        grid.col_order = list(range(cols))
+        grid.planted = None  # Replacing the grid clears its plantings
+        self.db.add(grid)
+        self.db.commit()
+        self.db.refresh(grid)
+        return grid
+
+    def describe(self, grid: GardenGrid, include_cells: bool = False) -> dict:
+        state = {
+            "garden_id": grid.garden_id,
+            "version": grid.version,
+            "rows": len(grid.row_order),
+            "cols": len(grid.col_order),
+            "cell_size_feet": grid.cell_size_feet,
+            "origin": {"lon": grid.origin_lon, "lat": grid.origin_lat},
+            "row_slots": grid.row_order,
+            "col_slots": grid.col_order,
+            "occupied": self.planted.occupied(grid),
+        }
+        if include_cells:
+            species = self.planted.matrix(grid).tolist()
+            state["cells"] = [
+                {"id": cell_id(row_slot, col_slot), "row": r, "col": c,
+                 "species_id": species[r][c] or None}
+                for r, row_slot in enumerate(grid.row_order)
+                for c, col_slot in enumerate(grid.col_order)
+            ]
+        return state
+
+    def _diff(self, grid: GardenGrid, added=(), removed=(), cleared=()) -> dict:
+        return {
+            "version": grid.version,
+            "rows": len(grid.row_order),
+            "cols": len(grid.col_order),
+            "added": list(added),
+            "removed": list(removed),
+            "cleared": list(cleared),
+        }
+
+    def _insert_row(self, grid: GardenGrid, index: int) -> list:
+        _check_dimension(len(grid.row_order) + 1)
+        slot = _allocate_slot(grid.row_order)
+        grid.row_order.insert(index, slot)
+        return [{"id": cell_id(slot, col_slot), "row": index, "col": c}
+                for c, col_slot in enumerate(grid.col_order)]
+
+    def _insert_col(self, grid: GardenGrid, index: int) -> list:
+        _check_dimension(len(grid.col_order) + 1)
+        slot = _allocate_slot(grid.col_order)
+        grid.col_order.insert(index, slot)
+        return [{"id": cell_id(row_slot, slot), "row": r, "col": index}
+                for r, row_slot in enumerate(grid.row_order)]
+
+    def _delete_row(self, grid: GardenGrid, index: int) -> tuple:
+        _check_dimension(len(grid.row_order) - 1)
+        cleared = self.planted.clear_slot(grid, row_slot=grid.row_order[index])
+        slot = grid.row_order.pop(index)
+        removed = [cell_id(slot, col_slot) for col_slot in grid.col_order]
+        return removed, cleared
+
+    def _delete_col(self, grid: GardenGrid, index: int) -> tuple:
+        _check_dimension(len(grid.col_order) - 1)
+        cleared = self.planted.clear_slot(grid, col_slot=grid.col_order[index])
+        slot = grid.col_order.pop(index)
+        removed = [cell_id(row_slot, slot) for row_slot in grid.row_order]
+        return removed, cleared
+
+    def _save(self, grid: GardenGrid):
+        # The JSON columns were edited in place
+        flag_modified(grid, "row_order")
+        flag_modified(grid, "col_order")
+        self.db.commit()
+
+    def _position(self, order: List[int], index: Optional[int], inserting: bool) -> int:
+        size = len(order)
+        if index is None:
+            return size if inserting else size - 1
+        if not 0 <= index <= (size if inserting else size - 1):
+            raise GridError("Index out of range")
+        return index
+
+    def insert_row(self, grid: GardenGrid, index: Optional[int] = None) -> dict:
+        """Insert a row before index (append when None); returns the new cells"""
+        added = self._insert_row(grid, self._position(grid.row_order, index, True))
+        self._save(grid)
+        return self._diff(grid, added=added)
+
+    def insert_col(self, grid: GardenGrid, index: Optional[int] = None) -> dict:
+        added = self._insert_col(grid, self._position(grid.col_order, index, True))
+        self._save(grid)
+        return self._diff(grid, added=added)
+
+    def delete_row(self, grid: GardenGrid, index: Optional[int] = None) -> dict:
+        """Delete a row (the last when None); returns its cell IDs and the plantings removed"""
+        removed, cleared = self._delete_row(grid, self._position(grid.row_order, index, False))
+        self._save(grid)
+        return self._diff(grid, removed=removed, cleared=cleared)
+
+    def delete_col(self, grid: GardenGrid, index: Optional[int] = None) -> dict:
+        removed, cleared = self._delete_col(grid, self._position(grid.col_order, index, False))
+        self._save(grid)
+        return self._diff(grid, removed=removed, cleared=cleared)
+
+    def resize(self, grid: GardenGrid, rows: int, cols: int) -> dict:
+        """Add or remove rows at the bottom and columns at the right"""
+        _check_dimension(rows)
+        _check_dimension(cols)
+        added, removed, cleared = [], [], []
+        while len(grid.row_order) > rows:
+            cells, plants = self._delete_row(grid, len(grid.row_order) - 1)
+            removed.extend(cells)
+            cleared.extend(plants)
+        while len(grid.col_order) > cols:
+            cells, plants = self._delete_col(grid, len(grid.col_order) - 1)
+            removed.extend(cells)
+            cleared.extend(plants)
+        while len(grid.row_order) < rows:
+            added.extend(self._insert_row(grid, len(grid.row_order)))
+        while len(grid.col_order) < cols:
+            added.extend(self._insert_col(grid, len(grid.col_order)))
+        self._save(grid)
+        return self._diff(grid, added=added, removed=removed, cleared=cleared)
+
+    def set_cell(self, grid: GardenGrid, cell: int, species_id: Optional[int]) -> dict:
+        """Plant a species in a cell, or clear it with species_id=None"""
+        self.planted.write_cells(grid, [(cell, species_id)])
+        return {"id": cell, "species_id": species_id, "version": grid.version}
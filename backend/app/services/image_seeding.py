@@ -0,0 +1,225 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import UnidentifiedImageError
+from sqlalchemy import or_
+
+from app.database import SessionLocal
+from app.metrics import registry
+from app.models.plant import PlantSpecies
+from app.services.image_store import add_plant_image
+from app.services.plant_net_service import PlantNetService
+
+# Plant image seeding pipeline
+# A fixed pool of fetch workers takes plants from a queue and downloads each
+# plant's images over the client's shared HTTP session; API calls draw from
+# the client's token bucket, so concurrency never exceeds the PlantNet quota.
+# Results go through a bounded queue to a single writer, which commits them
+# in batches off the event loop and then records the batch's plants in a
+# checkpoint file. A rerun skips checkpointed plants, so an interrupted run
+# continues where it stopped; plants whose API call failed are not
+# checkpointed and are retried next time.
+
+SEED_CONCURRENCY = int(os.getenv("SEED_CONCURRENCY", "8"))
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "25"))
+SEED_IMAGES_PER_PLANT = int(os.getenv("SEED_IMAGES_PER_PLANT", "3"))
+SEED_CHECKPOINT_PATH = os.getenv(
+    "SEED_CHECKPOINT_PATH", str(Path(__file__).resolve().parent.parent / "data" / "seed_checkpoint.json"))
+
+logger = logging.getLogger(__name__)
+
+seeded_plants = registry.counter(
+    "plant_image_seed_plants_total",
+    "Plants processed by the image seeder by outcome",
+    labelnames=("outcome",),
+)
+
+Fetched = Tuple[dict, List[dict]]
+
+
+def load_plant_list(path) -> List[dict]:
+    """Plants of a common_plants.json-style file, all categories in file order"""
+    with open(path, 'r') as f:
+        plant_data = json.load(f)
+    return [plant for plants in plant_data.values() for plant in plants]
+
+
+class SeedCheckpoint:
+    """Scientific names whose images are committed, saved after every batch"""
+
+    def __init__(self, path=SEED_CHECKPOINT_PATH):
+        self.path = Path(path) if path else None
+        self.done = set()
+        if self.path is not None and self.path.exists():
+            self.done = set(json.loads(self.path.read_text())["done"])
+
+    def __contains__(self, scientific_name: str) -> bool:
+        return scientific_name in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def mark(self, scientific_names: Iterable[str]):
+        self.done.update(scientific_names)
+        if self.path is None:
+            return
+        # Replace atomically, so an interrupted run never leaves a truncated file
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"done": sorted(self.done)}))
+        os.replace(temporary, self.path)
+
+    def reset(self):
+        self.done.clear()
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+@dataclass
+class SeedProgress:
+    total: int
+    skipped: int = 0
+    seeded: int = 0
+    failed: int = 0
+    images: int = 0
+    bytes: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def processed(self) -> int:
+        return self.skipped + self.seeded + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def __str__(self):
+        elapsed = max(self.elapsed, 1e-9)
+        megabytes = self.bytes / (1024 * 1024)
+        return (f"{self.processed}/{self.total} plants ({self.seeded} seeded, {self.failed} failed, "
+                f"{self.skipped} already done), {self.images} images, {megabytes:.1f} MB in {elapsed:.1f}s: "
+                f"{(self.seeded + self.failed) / elapsed:.1f} plants/s, {megabytes / elapsed:.2f} MB/s")
+
+
+def _log_progress(progress: SeedProgress):
+    logger.info("Seeding plant images: %s", progress)
+
+
+class ImageSeeder:
+    """Fetches plant images concurrently and writes them in checkpointed batches"""
+
+    def __init__(self, plant_net: PlantNetService, session_factory: Callable = SessionLocal,
+                 concurrency: int = SEED_CONCURRENCY, batch_size: int = SEED_BATCH_SIZE,
+                 images_per_plant: int = SEED_IMAGES_PER_PLANT, checkpoint: Optional[SeedCheckpoint] = None,
+                 report_every: float = 5.0, on_progress: Callable[[SeedProgress], None] = _log_progress):
+        self.plant_net = plant_net
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.images_per_plant = images_per_plant
+        self.checkpoint = checkpoint if checkpoint is not None else SeedCheckpoint(None)
+        self.report_every = report_every
+        self.on_progress = on_progress
+
+    async def run(self, plants: Iterable[dict]) -> SeedProgress:
+        plants = list(plants)
+        progress = SeedProgress(total=len(plants))
+        todo: asyncio.Queue = asyncio.Queue()
+        for plant in plants:
+            if plant['scientific_name'] in self.checkpoint:
+                progress.skipped += 1
+                seeded_plants.inc(outcome="skipped")
+            else:
+                todo.put_nowait(plant)
+        # Bounded, so fetch workers wait for the writer rather than buffering every image
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size * 2)
+
+        async def fetch_all():
+            await asyncio.gather(*(self._fetch(todo, results, progress) for _ in range(self.concurrency)))
+            await results.put(None)
+
+        tasks = [asyncio.create_task(fetch_all()), asyncio.create_task(self._write(results, progress)),
+                 asyncio.create_task(self._report(progress))]
+        try:
+            # A failed write ends the run; the checkpoint keeps every batch committed so far
+            await asyncio.gather(*tasks[:2])
+        finally:
+            for task in tasks:
+                task.cancel()
+        self.on_progress(progress)
+        return progress
+
+    async def _fetch(self, todo: asyncio.Queue, results: asyncio.Queue, progress: SeedProgress):
+        while not todo.empty():
+            plant = todo.get_nowait()
+            images = await self.plant_net.fetch_species_images(plant['scientific_name'], self.images_per_plant)
+            if images is None:
+                progress.failed += 1
+                seeded_plants.inc(outcome="failed")
+                continue
+            await results.put((plant, images))
+
+    async def _write(self, results: asyncio.Queue, progress: SeedProgress):
+        batch: List[Fetched] = []
+        while True:
+            item = await results.get()
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= self.batch_size):
+                # Committed in a worker thread, so downloads carry on meanwhile
+                await asyncio.to_thread(self._commit, batch)
+                self.checkpoint.mark(plant['scientific_name'] for plant, _ in batch)
+                progress.seeded += len(batch)
+                progress.images += sum(len(images) for _, images in batch)
+                progress.bytes += sum(len(image['image_data']) for _, images in batch for image in images)
+                seeded_plants.inc(len(batch), outcome="seeded")
+                batch = []
+            if item is None:
+                return
+
+    def _commit(self, batch: List[Fetched]):
+        db = self.session_factory()
+        try:
+            names = [plant['scientific_name'] for plant, _ in batch]
+            common_names = [plant['common_name'] for plant, _ in batch]
+            by_scientific: Dict[str, PlantSpecies] = {}
+            by_name: Dict[str, PlantSpecies] = {}
+            existing = db.query(PlantSpecies).filter(or_(PlantSpecies.scientific_name.in_(names),
+                                                         PlantSpecies.name.in_(common_names)))
+            for species in existing:
+                by_scientific[species.scientific_name] = species
+                by_name[species.name] = species
+            rows = []
+            for plant, _ in batch:
+                species = by_scientific.get(plant['scientific_name']) or by_name.get(plant['common_name'])
+                if species is None:
+                    species = PlantSpecies(name=plant['common_name'], scientific_name=plant['scientific_name'])
+                    by_scientific[species.scientific_name] = by_name[species.name] = species
+                    db.add(species)
+                rows.append(species)
+            db.flush()
+            for species, (plant, images) in zip(rows, batch):
+                for index, image in enumerate(images):
+                    try:
+                        add_plant_image(db, species.id, image['image_data'], content_type=image['content_type'],
+                                        source=image['source'], copyright_info=image['copyright_info'],
+                                        is_primary=(index == 0))  # First image is primary
+                    except UnidentifiedImageError:
+                        logger.error(f"Skipping non-image response for {plant['scientific_name']}")
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _report(self, progress: SeedProgress):
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.on_progress(progress)
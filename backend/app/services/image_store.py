@@ -0,0 +1,247 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.lazy_imports import lazy_module
+from app.metrics import registry
+from app.models.plant_image import PlantImage
+
+# Content-addressed plant image store
+# Originals are stored once under their SHA-256 digest, sharded two levels
+# deep by the digest's leading hex pairs (ab/cd/abcd...) so no directory grows
+# past a few hundred entries. Writing bytes that are already stored is a stat,
+# not a write, so re-downloading an image never duplicates it. Thumbnails at
+# a few fixed sizes, as WebP and JPEG, sit beside them under thumbs/ and are
+# rendered with Pillow in a process pool, off the event loop and outside the
+# GIL. A digest names immutable content, so everything is served with
+# year-long immutable cache headers.
+
+logger = logging.getLogger(__name__)
+
+# Pillow is only needed to add images and render thumbnails, not to serve them
+Image = lazy_module("PIL.Image")
+ImageOps = lazy_module("PIL.ImageOps")
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", str(Path(__file__).resolve().parent.parent / "data" / "image_store"))
+THUMBNAIL_SIZES = tuple(sorted(int(size) for size in os.getenv("THUMBNAIL_SIZES", "128,256,512").split(",")))
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+# How long a request waits for thumbnails to render before answering 503
+THUMBNAIL_WAIT_SECONDS = float(os.getenv("THUMBNAIL_WAIT_SECONDS", "5"))
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+THUMBNAIL_QUALITY = {"webp": 80, "jpeg": 85}
+
+CONTENT_TYPES = {"webp": "image/webp", "jpeg": "image/jpeg"}
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+image_writes = registry.counter(
+    "image_store_writes_total",
+    "Images written to the content-addressed store by outcome",
+    labelnames=("outcome",),
+)
+thumbnail_renders = registry.counter(
+    "image_thumbnail_renders_total",
+    "Thumbnail render jobs by outcome",
+    labelnames=("outcome",),
+)
+
+
+def is_digest(value: str) -> bool:
+    return _DIGEST.fullmatch(value) is not None
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write via a temporary file in the same directory, so readers never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+class ImageStore:
+    """Originals and thumbnails on disk, keyed by SHA-256 digest"""
+
+    def __init__(self, root=IMAGE_STORE_DIR):
+        self.root = Path(root)
+
+    @staticmethod
+    def relative_path(digest: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def path(self, digest: str) -> Path:
+        return self.root / self.relative_path(digest)
+
+    def thumbnail_path(self, digest: str, size: int, fmt: str) -> Path:
+        return self.root / "thumbs" / str(size) / f"{self.relative_path(digest)}.{fmt}"
+
+    def put(self, data: bytes) -> Tuple[str, bool]:
+        """(digest, written); written is False when the content was already stored"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            image_writes.inc(outcome="deduplicated")
+            return digest, False
+        _write_atomic(path, data)
+        image_writes.inc(outcome="stored")
+        return digest, True
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+
+def render_thumbnails(source: str, targets: Sequence[Tuple[int, str, str]]) -> int:
+    """Render (size, format, path) thumbnails of one image; runs in a worker process"""
+    with Image.open(source) as image:
+        # JPEG can decode straight at a reduced scale, far cheaper than a full decode
+        largest = max(size for size, _, _ in targets)
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        # Largest first, so each size is downscaled from the previous one
+        for size in sorted({size for size, _, _ in targets}, reverse=True):
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for target_size, fmt, path in targets:
+                if target_size != size:
+                    continue
+                buffer = io.BytesIO()
+                frame = image.convert("RGB") if fmt == "jpeg" else image
+                frame.save(buffer, format=fmt.upper(), quality=THUMBNAIL_QUALITY[fmt])
+                _write_atomic(Path(path), buffer.getvalue())
+    return len(targets)
+
+
+class ThumbnailPipeline:
+    """Renders missing thumbnails in a process pool, one job per image in flight"""
+
+    def __init__(self, store: ImageStore, sizes: Sequence[int] = THUMBNAIL_SIZES,
+                 formats: Sequence[str] = THUMBNAIL_FORMATS, workers: int = THUMBNAIL_WORKERS,
+                 wait_seconds: float = THUMBNAIL_WAIT_SECONDS):
+        self.store = store
+        self.sizes = tuple(sizes)
+        self.formats = tuple(formats)
+        self.workers = workers
+        self.wait_seconds = wait_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started on first use; spawn rather than fork, as the server has threads
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def missing(self, digest: str) -> List[Tuple[int, str, str]]:
+        return [
+            (size, fmt, str(path))
+            for size in self.sizes for fmt in self.formats
+            if not (path := self.store.thumbnail_path(digest, size, fmt)).exists()
+        ]
+
+    def submit(self, digest: str) -> Future:
+        """Queue rendering of an image's missing thumbnails; the future resolves once they exist"""
+        with self._lock:
+            pending = self._pending.get(digest)
+            if pending is not None:
+                return pending
+            targets = self.missing(digest)
+            if not targets:
+                done = Future()
+                done.set_result(0)
+                return done
+            future = self._pool().submit(render_thumbnails, str(self.store.path(digest)), targets)
+            self._pending[digest] = future
+        future.add_done_callback(lambda f: self._finished(digest, f))
+        return future
+
+    def _finished(self, digest: str, future: Future):
+        with self._lock:
+            self._pending.pop(digest, None)
+        if future.cancelled() or future.exception() is not None:
+            thumbnail_renders.inc(outcome="failed")
+            if not future.cancelled():
+                logger.warning("Thumbnails for %s failed: %s", digest, future.exception())
+        else:
+            thumbnail_renders.inc(outcome="rendered")
+
+    def ensure(self, digest: str, size: int, fmt: str) -> Optional[Path]:
+        """Path of a thumbnail, waiting up to wait_seconds for it to render; None if it is not ready"""
+        path = self.store.thumbnail_path(digest, size, fmt)
+        if not path.exists():
+            try:
+                self.submit(digest).result(timeout=self.wait_seconds)
+            except Exception:
+                # Timed out, or the render failed (logged by _finished); the job carries on either way
+                return None
+        return path
+
+    def drain(self):
+        """Wait for every queued render to finish"""
+        with self._lock:
+            pending = list(self._pending.values())
+        wait(pending)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def add_plant_image(db: Session, species_id: int, data: bytes, content_type: Optional[str] = None,
+                    source: Optional[str] = None, copyright_info: Optional[str] = None,
+                    is_primary: bool = False) -> PlantImage:
+    """Store an image for a species, reusing the row if the same content is already attached"""
+    # Reads only the header: validates the bytes are an image and gets its size
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+        content_type = content_type or Image.MIME.get(image.format, "application/octet-stream")
+    digest, _ = image_store.put(data)
+    # Batched writers add many images before flushing, so check pending rows too
+    for pending in db.new:
+        if isinstance(pending, PlantImage) and (pending.plant_species_id, pending.content_hash) == (species_id, digest):
+            return pending
+    existing = db.query(PlantImage).filter_by(plant_species_id=species_id, content_hash=digest).first()
+    if existing is not None:
+        return existing
+    plant_image = PlantImage(
+        plant_species_id=species_id,
+        content_hash=digest,
+        file_path=ImageStore.relative_path(digest),
+        content_type=content_type,
+        is_primary=is_primary,
+        source=source,
+        copyright_info=copyright_info,
+        file_size_bytes=len(data),
+        width=width,
+        height=height,
+    )
+    db.add(plant_image)
+    thumbnails.submit(digest)
+    return plant_image
+
+
+image_store = ImageStore()
+thumbnails = ThumbnailPipeline(image_store)
+
+registry.gauge("image_thumbnail_jobs_pending", "Images with thumbnail renders in flight",
+               callback=lambda: len(thumbnails))
@@ -0,0 +1,318 @@
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from sqlalchemy.orm import Session
+
+from app.models.plant import PlantSpecies
+from app.models.zone import Zone
+from app.services.companion_graph import parse_companions
+from app.services.geometry_cache import geometry_cache, get_transformer
+
+# Planting layout solver
+# A zone is rasterized into a lattice of cells (one plant centre per cell).
+# Two plants of species a and b must be at least (spacing_a + spacing_b) / 2
+# apart, a cell's sun hours must suit the species, and the objective is the
+# number of companion pairs within COMPANION_REACH times their spacing.
+# Constraints and companion attraction are folded into one score grid per
+# species: placing or removing a plant stamps small precomputed disks into
+# them, so finding the best cell for a species is one argmax over the
+# lattice. A greedy pass interleaves species by quantity, then a local
+# search relocates single plants to better cells until no move helps or the
+# time budget runs out.
+
+LAYOUT_TIME_BUDGET_MS = float(os.getenv("LAYOUT_TIME_BUDGET_MS", "500"))
+LAYOUT_MAX_CELLS = int(os.getenv("LAYOUT_MAX_CELLS", "250000"))
+COMPANION_REACH = 1.5
+FEET_TO_METERS = 0.3048
+
+# Hours of direct sun per day suiting each PlantSpecies.sun_requirement
+SUN_HOURS = {
+    "full": (6.0, math.inf),
+    "partial": (3.0, 6.0),
+    "shade": (0.0, 3.0),
+}
+
+
+class LayoutError(ValueError):
+    pass
+
+
+def sun_range(requirement: Optional[str]) -> Tuple[float, float]:
+    """Accepted sun hours for a requirement such as "full", "Full sun" or "partial_shade" """
+    text = (requirement or "").lower()
+    if "full" in text and "shade" not in text:
+        return SUN_HOURS["full"]
+    if "part" in text:
+        return SUN_HOURS["partial"]
+    if "shade" in text:
+        return SUN_HOURS["shade"]
+    return (0.0, math.inf)
+
+
+@dataclass
+class LayoutSpecies:
+    species_id: int
+    quantity: int
+    spacing_m: float
+    min_sun: float = 0.0
+    max_sun: float = math.inf
+    companions: FrozenSet[int] = frozenset()
+    antagonists: FrozenSet[int] = frozenset()
+
+
+@dataclass
+class LayoutResult:
+    placements: List[Tuple[int, int, int]]  # (species_id, row, col)
+    unplaced: Dict[int, int]
+    companion_pairs: int
+    greedy_companion_pairs: int
+    moves: int
+    seconds: float
+    stats: Dict[str, float] = field(default_factory=dict)
+
+
+@lru_cache(maxsize=256)
+def _disk(radius_cells: float, inclusive: bool) -> np.ndarray:
+    """Kernel of offsets closer than (or, inclusive, within) radius_cells; always covers the centre"""
+    reach = max(int(math.ceil(radius_cells)), 0)
+    dy, dx = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    distance = np.hypot(dy, dx)
+    kernel = distance <= radius_cells + 1e-9 if inclusive else distance < radius_cells - 1e-9
+    kernel[reach, reach] = True
+    return kernel.astype(np.int32)
+
+
+def _stamp(grid: np.ndarray, row: int, col: int, kernel: np.ndarray, sign: int):
+    reach = kernel.shape[0] // 2
+    rows, cols = grid.shape
+    top, left = row - reach, col - reach
+    r0, c0 = max(top, 0), max(left, 0)
+    r1, c1 = min(top + kernel.shape[0], rows), min(left + kernel.shape[1], cols)
+    if sign > 0:
+        grid[r0:r1, c0:c1] += kernel[r0 - top:r1 - top, c0 - left:c1 - left]
+    else:
+        grid[r0:r1, c0:c1] -= kernel[r0 - top:r1 - top, c0 - left:c1 - left]
+
+
+class LayoutSolver:
+    """
+    usable: rows x cols bool lattice of cells inside the zone
+    sun: rows x cols hours of direct sun per cell (NaN = unknown, suits anything)
+    """
+
+    def __init__(self, usable: np.ndarray, sun: np.ndarray, cell_size_m: float,
+                 species: Sequence[LayoutSpecies], seed: int = 0):
+        if usable.shape != sun.shape:
+            raise LayoutError("Sun map must match the lattice")
+        self.shape = usable.shape
+        self.species = list(species)
+        self.random = random.Random(seed)
+        count = len(self.species)
+
+        unknown = np.isnan(sun)
+        self.allowed = np.stack([
+            usable & (unknown | ((sun >= s.min_sun) & (sun <= s.max_sun))) for s in self.species
+        ]) if count else np.zeros((0,) + self.shape, dtype=bool)
+
+        ids = [s.species_id for s in self.species]
+        self.companions: List[List[int]] = [[] for _ in range(count)]
+        self.block_kernels = [[None] * count for _ in range(count)]
+        self.reach_kernels = [[None] * count for _ in range(count)]
+        for a, first in enumerate(self.species):
+            for b, second in enumerate(self.species):
+                # Never closer than half a cell, so one cell holds at most one plant
+                separation = max((first.spacing_m + second.spacing_m) / 2, cell_size_m / 2)
+                self.block_kernels[a][b] = _disk(round(separation / cell_size_m, 6), False)
+                # Either side listing the other is enough, but an antagonism on either side overrides it
+                if (a != b and (ids[b] in first.companions or ids[a] in second.companions)
+                        and ids[b] not in first.antagonists and ids[a] not in second.antagonists):
+                    self.companions[a].append(b)
+                    self.reach_kernels[a][b] = _disk(round(separation * COMPANION_REACH / cell_size_m, 6), True)
+
+        # score[kind] = attract * scale - tie break - blocking * penalty, maintained
+        # incrementally so the best cell for a species is a single argmax. Among
+        # equally attracted cells the first in row-major order wins, which packs
+        # plants densely; the penalty outweighs any attraction, so a blocked or
+        # unsuitable cell always scores below every free one.
+        size = usable.size
+        most_plants = sum(s.quantity for s in self.species) + 1
+        self._scale = np.int64(size)
+        self._penalty = np.int64(size) * (most_plants + 1) * 4
+        tie_break = np.arange(size, dtype=np.int64).reshape(self.shape)
+        self.score = np.stack([
+            np.where(allowed, -tie_break, -tie_break - self._penalty) for allowed in self.allowed
+        ]) if count else np.zeros((0,) + self.shape, dtype=np.int64)
+        self.attract = np.zeros((count,) + self.shape, dtype=np.int32)
+        self.block_kernels = [[-kernel.astype(np.int64) * self._penalty for kernel in row]
+                              for row in self.block_kernels]
+        self.score_kernels = [[None if kernel is None else kernel.astype(np.int64) * self._scale
+                               for kernel in row] for row in self.reach_kernels]
+        self.plants: List[List[int]] = []  # [species index, row, col]
+
+    def _apply(self, kind: int, row: int, col: int, sign: int):
+        for other in range(len(self.species)):
+            _stamp(self.score[other], row, col, self.block_kernels[other][kind], sign)
+        for other in self.companions[kind]:
+            _stamp(self.score[other], row, col, self.score_kernels[other][kind], sign)
+            _stamp(self.attract[other], row, col, self.reach_kernels[other][kind], sign)
+
+    def best_cell(self, kind: int) -> Optional[Tuple[int, int]]:
+        flat = self.score[kind].reshape(-1)
+        index = int(np.argmax(flat))
+        if flat[index] < -self._scale:
+            return None  # Free cells score at least -(size - 1); every cell is blocked or unsuitable
+        return divmod(index, self.shape[1])
+
+    def companion_pairs(self) -> int:
+        return int(sum(self.attract[kind, row, col] for kind, row, col in self.plants)) // 2
+
+    def _greedy_order(self) -> List[int]:
+        # Interleave species in proportion to their quantities, wider plants first within a round
+        order = [
+            ((k + 0.5) / s.quantity, -s.spacing_m, kind)
+            for kind, s in enumerate(self.species) for k in range(s.quantity)
+        ]
+        return [kind for *_, kind in sorted(order)]
+
+    def solve(self, time_budget_ms: float = LAYOUT_TIME_BUDGET_MS) -> LayoutResult:
+        started = time.perf_counter()
+        deadline = started + time_budget_ms / 1000
+        unplaced = [0] * len(self.species)
+        for kind in self._greedy_order():
+            cell = self.best_cell(kind)
+            if cell is None:
+                unplaced[kind] += 1
+                continue
+            self._apply(kind, *cell, 1)
+            self.plants.append([kind, *cell])
+        greedy_pairs = self.companion_pairs()
+        greedy_seconds = time.perf_counter() - started
+
+        # Local search: lift one plant out and put it back on the best cell for its species
+        moves, improved = 0, True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for index in self.random.sample(range(len(self.plants)), len(self.plants)):
+                if time.perf_counter() >= deadline:
+                    break
+                kind, row, col = self.plants[index]
+                self._apply(kind, row, col, -1)
+                cell = self.best_cell(kind)  # Never None: the current cell is free again
+                if self.attract[kind][cell] > self.attract[kind, row, col]:
+                    row, col = cell
+                    self.plants[index] = [kind, row, col]
+                    moves += 1
+                    improved = True
+                self._apply(kind, row, col, 1)
+            # Moves may have opened room for plants the greedy pass could not fit
+            for kind in range(len(self.species)):
+                while unplaced[kind] and time.perf_counter() < deadline:
+                    cell = self.best_cell(kind)
+                    if cell is None:
+                        break
+                    self._apply(kind, *cell, 1)
+                    self.plants.append([kind, *cell])
+                    unplaced[kind] -= 1
+                    improved = True
+
+        return LayoutResult(
+            placements=[(self.species[kind].species_id, row, col) for kind, row, col in self.plants],
+            unplaced={self.species[kind].species_id: n for kind, n in enumerate(unplaced) if n},
+            companion_pairs=self.companion_pairs(),
+            greedy_companion_pairs=greedy_pairs,
+            moves=moves,
+            seconds=time.perf_counter() - started,
+            stats={"greedy_seconds": greedy_seconds},
+        )
+
+
+def zone_lattice(zone: Zone, cell_size_m: float):
+    """
+    Cell centres covering a zone in its UTM projection, row 0 at the north edge.
+    Returns (usable mask, x centres, y centres, UTM CRS).
+    """
+    cached = geometry_cache.get(zone)
+    if cached is None:
+        raise LayoutError("Zone has no boundary")
+    minx, miny, maxx, maxy = cached.utm_geometry.bounds
+    cols = max(int(math.ceil((maxx - minx) / cell_size_m)), 1)
+    rows = max(int(math.ceil((maxy - miny) / cell_size_m)), 1)
+    if rows * cols > LAYOUT_MAX_CELLS:
+        raise LayoutError(f"Zone needs {rows * cols} cells at this cell size (limit {LAYOUT_MAX_CELLS})")
+    xs = minx + (np.arange(cols) + 0.5) * cell_size_m
+    ys = maxy - (np.arange(rows) + 0.5) * cell_size_m
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    usable = shapely.contains_xy(cached.utm_geometry, grid_x, grid_y)
+    return usable, xs, ys, cached.utm_crs
+
+
+class LayoutService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _species(self, quantities: Dict[int, int], spacing_default_m: float) -> List[LayoutSpecies]:
+        rows = self.db.query(PlantSpecies).filter(PlantSpecies.id.in_(quantities)).all()
+        missing = set(quantities) - {row.id for row in rows}
+        if missing:
+            raise LayoutError(f"Unknown species: {sorted(missing)}")
+        species = []
+        for row in rows:
+            low, high = sun_range(row.sun_requirement)
+            companions, antagonists = parse_companions(row.companion_plants)
+            species.append(LayoutSpecies(
+                species_id=row.id,
+                quantity=quantities[row.id],
+                # PlantSpecies.spacing is in centimetres
+                spacing_m=row.spacing / 100 if row.spacing else spacing_default_m,
+                min_sun=low,
+                max_sun=high,
+                companions=frozenset(companions),
+                antagonists=frozenset(antagonists),
+            ))
+        return species
+
+    def plan_zone(
+        self,
+        zone: Zone,
+        quantities: Dict[int, int],
+        cell_size_feet: float = 0.5,
+        sun_map: Optional[List[List[float]]] = None,
+        time_budget_ms: float = LAYOUT_TIME_BUDGET_MS,
+    ) -> dict:
+        """Propose positions for the requested plants in a zone; nothing is saved"""
+        cell_size_m = cell_size_feet * FEET_TO_METERS
+        usable, xs, ys, utm_crs = zone_lattice(zone, cell_size_m)
+        if sun_map is not None:
+            sun = np.asarray(sun_map, dtype=float)
+            if sun.shape != usable.shape:
+                raise LayoutError(f"sun_map must be {usable.shape[0]} rows x {usable.shape[1]} columns")
+        else:
+            sun = np.full(usable.shape, np.nan if zone.sun_exposure is None else zone.sun_exposure)
+
+        solver = LayoutSolver(usable, sun, cell_size_m, self._species(quantities, cell_size_m))
+        result = solver.solve(time_budget_ms)
+
+        rows = np.array([row for _, row, _ in result.placements], dtype=np.intp)
+        cols = np.array([col for _, _, col in result.placements], dtype=np.intp)
+        lons, lats = get_transformer(utm_crs, "EPSG:4326").transform(xs[cols], ys[rows])
+        return {
+            "zone_id": zone.id,
+            "lattice": {"rows": usable.shape[0], "cols": usable.shape[1],
+                        "cell_size_feet": cell_size_feet, "usable_cells": int(usable.sum())},
+            "placements": [
+                {"species_id": species_id, "row": row, "col": col, "lon": float(lon), "lat": float(lat)}
+                for (species_id, row, col), lon, lat in zip(result.placements, np.atleast_1d(lons), np.atleast_1d(lats))
+            ],
+            "unplaced": [{"species_id": s, "quantity": n} for s, n in result.unplaced.items()],
+            "companion_pairs": result.companion_pairs,
+            "greedy_companion_pairs": result.greedy_companion_pairs,
+            "moves": result.moves,
+            "solve_ms": round(result.seconds * 1000, 2),
+        }
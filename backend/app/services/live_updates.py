@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+
+from app.metrics import registry
+from app.pubsub import get_broker
+
+# Live garden updates
+# Committed change-log entries are published per garden (see change_log_service).
+# Each process subscribes to a garden topic once, while it has connected
+# clients, coalesces bursts into one frame per LIVE_UPDATES_COALESCE_MS and
+# encodes it once for every subscriber. Each client has a bounded frame queue:
+# when it overflows the backlog is replaced by a single resync frame telling
+# the client to catch up from GET /gardens/{id}/changes, and a client that
+# cannot take a frame within LIVE_UPDATES_SEND_TIMEOUT seconds is disconnected.
+
+LIVE_UPDATES_COALESCE_MS = float(os.getenv("LIVE_UPDATES_COALESCE_MS", "50"))
+LIVE_UPDATES_QUEUE_FRAMES = int(os.getenv("LIVE_UPDATES_QUEUE_FRAMES", "32"))
+LIVE_UPDATES_SEND_TIMEOUT = float(os.getenv("LIVE_UPDATES_SEND_TIMEOUT", "10"))
+
+frames_sent = registry.counter(
+    "live_updates_frames_total",
+    "Frames queued for live-update subscribers",
+    labelnames=("type",),
+)
+subscribers_dropped = registry.counter(
+    "live_updates_disconnects_total",
+    "Live-update subscribers disconnected by the server",
+    labelnames=("reason",),
+)
+
+
+def garden_topic(garden_id: int) -> str:
+    return f"garden:{garden_id}"
+
+
+class Subscriber:
+    """One connected client and its bounded queue of encoded frames"""
+
+    def __init__(self, garden_id: int, max_frames: int = LIVE_UPDATES_QUEUE_FRAMES):
+        self.garden_id = garden_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_frames)
+
+    def offer(self, frame: str):
+        try:
+            self.queue.put_nowait(frame)
+            frames_sent.inc(type="changes")
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog, the client catches up over REST
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(json.dumps({"type": "resync", "garden_id": self.garden_id}))
+            frames_sent.inc(type="resync")
+
+
+class GardenChannel:
+    """Coalesces published changes of one garden and fans them out to local subscribers"""
+
+    def __init__(self, garden_id: int, coalesce_seconds: float):
+        self.garden_id = garden_id
+        self.coalesce_seconds = coalesce_seconds
+        self.subscribers: Set[Subscriber] = set()
+        self._pending: Dict[tuple, dict] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def on_message(self, changes: List[dict]):
+        for change in changes:
+            key = (change["entity"], change["id"])
+            current = self._pending.get(key)
+            if current is None or change["seq"] > current["seq"]:
+                self._pending[key] = change
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.coalesce_seconds, self.flush)
+
+    def flush(self):
+        self._flush_handle = None
+        if not self._pending:
+            return
+        changes = sorted(self._pending.values(), key=lambda change: change["seq"])
+        self._pending = {}
+        frame = json.dumps(jsonable_encoder({
+            "type": "changes",
+            "garden_id": self.garden_id,
+            "next": changes[-1]["seq"],
+            "changes": changes,
+        }))
+        for subscriber in list(self.subscribers):
+            subscriber.offer(frame)
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+
+class LiveUpdateHub:
+    """Tracks the gardens this process has subscribers for"""
+
+    def __init__(self, coalesce_seconds: float = LIVE_UPDATES_COALESCE_MS / 1000):
+        self.coalesce_seconds = coalesce_seconds
+        self.channels: Dict[int, GardenChannel] = {}
+
+    def join(self, garden_id: int) -> Subscriber:
+        channel = self.channels.get(garden_id)
+        if channel is None:
+            channel = GardenChannel(garden_id, self.coalesce_seconds)
+            self.channels[garden_id] = channel
+            get_broker().subscribe(garden_topic(garden_id), channel.on_message)
+        subscriber = Subscriber(garden_id)
+        channel.subscribers.add(subscriber)
+        return subscriber
+
+    def leave(self, subscriber: Subscriber):
+        channel = self.channels.get(subscriber.garden_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers:
+            get_broker().unsubscribe(garden_topic(subscriber.garden_id), channel.on_message)
+            channel.close()
+            del self.channels[subscriber.garden_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(channel.subscribers) for channel in self.channels.values())
+
+
+hub = LiveUpdateHub()
+
+registry.gauge("live_updates_subscribers", "Connected live-update subscribers",
+               callback=lambda: hub.subscriber_count())
+
+
+async def _send_frames(websocket: WebSocket, subscriber: Subscriber):
+    while True:
+        frame = await subscriber.queue.get()
+        try:
+            await asyncio.wait_for(websocket.send_text(frame), LIVE_UPDATES_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            subscribers_dropped.inc(reason="send_timeout")
+            await websocket.close(code=1013)  # Try again later
+            return
+
+
+async def _receive_until_closed(websocket: WebSocket):
+    # Clients do not send anything yet; reading is how a disconnect is noticed
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+async def serve_garden_updates(websocket: WebSocket, garden_id: int):
+    """Stream a garden's change frames to a WebSocket until either side closes"""
+    await websocket.accept()
+    subscriber = hub.join(garden_id)
+    try:
+        await websocket.send_text(json.dumps({"type": "subscribed", "garden_id": garden_id}))
+        tasks = [
+            asyncio.create_task(_send_frames(websocket, subscriber)),
+            asyncio.create_task(_receive_until_closed(websocket)),
+        ]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.leave(subscriber)
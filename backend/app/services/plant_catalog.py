@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import threading
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.etag import CATALOG_SCOPE, resource_versions
+from app.metrics import registry
+from app.models.plant import PlantSpecies
+from app.services.companion_graph import CompanionGraph, parse_companions
+
+# In-memory plant catalog
+# plant_species rows, enriched with categories from app/data/common_plants.json
+# (reference plants missing from the table are listed with id null), compiled
+# into an immutable PlantCatalog: a sorted token list for prefix search, trigram
+# posting lists for fuzzy search, category masks and attribute arrays for
+# filters, and the companion graph (app/services/companion_graph.py). Searches
+# are answered from memory and memoized per catalog. The catalog records the
+# marker it was built from: the catalog cache-scope version row, which every
+# worker's writes bump (see app/etag.py), plus the species count and highest
+# ID, which also move when a script or SQL session adds or deletes rows
+# without going through the app. Once the marker changes, the next request
+# rebuilds the catalog and swaps it in with a single assignment, so readers
+# always see either the old or the new catalog, never a mix.
+
+REFERENCE_PLANTS_PATH = Path(__file__).resolve().parent.parent / "data" / "common_plants.json"
+CATALOG_SEARCH_CACHE_SIZE = int(os.getenv("CATALOG_SEARCH_CACHE_SIZE", "2048"))
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+logger = logging.getLogger(__name__)
+
+catalog_builds = registry.counter(
+    "plant_catalog_builds_total",
+    "Plant catalog builds",
+    labelnames=("reason",),
+)
+
+# Reference file group -> plant type
+_GROUP_TYPES = {"vegetables": "vegetable", "herbs": "herb", "fruits": "fruit", "flowers": "flower"}
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase, accents stripped, punctuation collapsed to single spaces"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _sun_class(value: Optional[str]) -> Optional[str]:
+    text = normalize(value)
+    if "part" in text:
+        return "partial"
+    if "shade" in text:
+        return "shade"
+    if "full" in text or text == "sun":
+        return "full"
+    return None
+
+
+def water_level(value: Optional[str]) -> Optional[str]:
+    text = normalize(value)
+    for level in ("low", "medium", "high"):
+        if level in text:
+            return level
+    return {"moderate": "medium", "average": "medium"}.get(text, text or None)
+
+
+def _encode(values: List[Optional[str]]) -> Tuple[Dict[str, int], np.ndarray]:
+    """Small integer codes for a categorical attribute; -1 marks unknown"""
+    codes = {value: code for code, value in enumerate(sorted(set(filter(None, values))))}
+    return codes, np.array([codes.get(value, -1) for value in values], dtype=np.int16)
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: Optional[int]
+    name: str
+    scientific_name: Optional[str]
+    type: Optional[str]
+    categories: Tuple[str, ...]
+    sun_requirement: Optional[str]
+    water_requirement: Optional[str]
+    min_temp: Optional[float]
+    max_temp: Optional[float]
+    mature_height: Optional[float]
+    mature_spread: Optional[float]
+    spacing: Optional[float]
+    days_to_harvest: Optional[int]
+    companion_plants: Tuple[int, ...]
+    antagonists: Tuple[int, ...] = ()
+    soil_ph: Optional[Tuple[float, float]] = None
+    growing_seasons: Tuple[str, ...] = ()
+    harvest_window_days: Optional[int] = None
+
+    def as_dict(self) -> dict:
+        return {**self.__dict__, "categories": list(self.categories),
+                "companion_plants": list(self.companion_plants), "antagonists": list(self.antagonists),
+                "soil_ph": None if self.soil_ph is None else list(self.soil_ph),
+                "growing_seasons": list(self.growing_seasons)}
+
+
+def _ph_range(reference: dict) -> Optional[Tuple[float, float]]:
+    value = reference.get("soil_ph")
+    return (float(value[0]), float(value[1])) if value else None
+
+
+def _seasons(value) -> Tuple[str, ...]:
+    """growing_seasons as a tuple of lowercase names ("spring", "summer", ...)"""
+    if isinstance(value, str):
+        value = [value]
+    return tuple(normalize(str(season)) for season in value or [] if season)
+
+
+def load_reference_plants(path: Path = REFERENCE_PLANTS_PATH) -> List[dict]:
+    try:
+        with open(path) as f:
+            groups = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Reference plant list unavailable: %s", e)
+        return []
+    return [
+        {**plant, "type": _GROUP_TYPES.get(group, group.rstrip("s"))}
+        for group, plants in groups.items() for plant in plants
+    ]
+
+
+def build_entries(species: List[PlantSpecies], reference: List[dict]) -> List[CatalogEntry]:
+    by_scientific = {normalize(r.get("scientific_name")): r for r in reference if r.get("scientific_name")}
+    by_name = {normalize(r.get("common_name")): r for r in reference if r.get("common_name")}
+    entries, matched = [], set()
+    for row in species:
+        ref = by_scientific.get(normalize(row.scientific_name)) or by_name.get(normalize(row.name)) or {}
+        if ref:
+            matched.add(id(ref))
+        companions, antagonists = parse_companions(row.companion_plants)
+        entries.append(CatalogEntry(
+            id=row.id,
+            name=row.name or ref.get("common_name") or row.scientific_name or f"Species {row.id}",
+            scientific_name=row.scientific_name or ref.get("scientific_name"),
+            type=ref.get("type"),
+            categories=tuple(ref.get("categories", ())),
+            sun_requirement=row.sun_requirement,
+            water_requirement=row.water_requirement,
+            min_temp=row.min_temp,
+            max_temp=row.max_temp,
+            mature_height=row.mature_height,
+            mature_spread=row.mature_spread,
+            spacing=row.spacing,
+            days_to_harvest=row.days_to_harvest,
+            companion_plants=companions,
+            antagonists=antagonists,
+            soil_ph=_ph_range(ref),
+            growing_seasons=_seasons(row.growing_seasons),
+            harvest_window_days=row.harvest_window_days,
+        ))
+    for ref in reference:
+        if id(ref) not in matched:
+            entries.append(CatalogEntry(
+                id=None, name=ref["common_name"], scientific_name=ref.get("scientific_name"),
+                type=ref.get("type"), categories=tuple(ref.get("categories", ())),
+                sun_requirement=None, water_requirement=None, min_temp=None, max_temp=None,
+                mature_height=None, mature_spread=None, spacing=None, days_to_harvest=None,
+                companion_plants=(), soil_ph=_ph_range(ref),
+            ))
+    return entries
+
+
+class PlantCatalog:
+    """Immutable, indexed snapshot of the plant catalog"""
+
+    def __init__(self, entries: List[CatalogEntry], marker: tuple = ()):
+        self.marker = marker
+        self.entries = tuple(sorted(entries, key=lambda e: (normalize(e.name), e.id or 0)))
+        self.records = tuple(entry.as_dict() for entry in self.entries)
+        self.by_id: Dict[int, int] = {e.id: i for i, e in enumerate(self.entries) if e.id is not None}
+        names = [normalize(e.name) for e in self.entries]
+        scientific = [normalize(e.scientific_name) for e in self.entries]
+        self._names = names
+        self._scientific = scientific
+        self.companions = CompanionGraph({
+            e.id: (e.companion_plants, e.antagonists) for e in self.entries if e.id is not None
+        })
+
+        # Prefix index: every whole name and every word of it, sorted for bisect
+        tokens = set()
+        for i, (name, sci) in enumerate(zip(names, scientific)):
+            for text in (name, sci):
+                if text:
+                    tokens.add((text, i))
+                    tokens.update((word, i) for word in text.split())
+        self._tokens = sorted(tokens)
+        self._token_keys = [token for token, _ in self._tokens]
+
+        # Trigram posting lists over names: common and scientific names are scored
+        # separately so a short query is not diluted by the other name
+        postings: Dict[str, List[int]] = {}
+        name_entry, counts = [], []
+        for i, (name, sci) in enumerate(zip(names, scientific)):
+            for text in filter(None, (name, sci)):
+                grams = trigrams(text)
+                for gram in grams:
+                    postings.setdefault(gram, []).append(len(counts))
+                name_entry.append(i)
+                counts.append(len(grams))
+        self._name_entry = np.array(name_entry, dtype=np.int32)
+        self._trigram_counts = np.array(counts, dtype=np.int32)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+        # Filters
+        self._categories: Dict[str, np.ndarray] = {}
+        for i, entry in enumerate(self.entries):
+            for category in set(entry.categories) | ({entry.type} if entry.type else set()):
+                self._categories.setdefault(normalize(category), np.zeros(len(self.entries), dtype=bool))[i] = True
+        self._sun_codes, self._sun = _encode([_sun_class(e.sun_requirement) for e in self.entries])
+        self._water_codes, self._water = _encode([water_level(e.water_requirement) for e in self.entries])
+        self._min_temp = np.array([np.nan if e.min_temp is None else e.min_temp for e in self.entries], dtype=float)
+        self._max_temp = np.array([np.nan if e.max_temp is None else e.max_temp for e in self.entries], dtype=float)
+
+        self.search = lru_cache(maxsize=CATALOG_SEARCH_CACHE_SIZE)(self._search)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, species_id: int) -> Optional[dict]:
+        index = self.by_id.get(species_id)
+        return None if index is None else self.records[index]
+
+    def categories(self) -> Dict[str, int]:
+        return {name: int(mask.sum()) for name, mask in sorted(self._categories.items())}
+
+    def _prefix_matches(self, query: str) -> set:
+        start = bisect_left(self._token_keys, query)
+        matches = set()
+        for token, index in self._tokens[start:]:
+            if not token.startswith(query):
+                break
+            matches.add(index)
+        return matches
+
+    def _filter_mask(self, category, sun, water, min_temp, max_temp) -> np.ndarray:
+        mask = np.ones(len(self.entries), dtype=bool)
+        if category:
+            mask &= self._categories.get(normalize(category), np.zeros(len(self.entries), dtype=bool))
+        if sun:
+            mask &= self._sun == self._sun_codes.get(_sun_class(sun) or normalize(sun), -1)
+        if water:
+            mask &= self._water == self._water_codes.get(water_level(water), -1)
+        # A plant qualifies if it tolerates the whole requested range; unknown limits do not
+        with np.errstate(invalid="ignore"):
+            if min_temp is not None:
+                mask &= self._min_temp <= min_temp
+            if max_temp is not None:
+                mask &= self._max_temp >= max_temp
+        return mask
+
+    def _search(self, q: str = "", category: Optional[str] = None, sun: Optional[str] = None,
+                water: Optional[str] = None, min_temp: Optional[float] = None,
+                max_temp: Optional[float] = None, limit: int = 50, offset: int = 0) -> Tuple[int, tuple]:
+        """(total matches, page of (score, record)) ranked best first; name order without q"""
+        mask = self._filter_mask(category, sun, water, min_temp, max_temp)
+        query = normalize(q)
+        if not query:
+            matches = np.flatnonzero(mask)
+            return len(matches), tuple((None, self.records[i]) for i in matches[offset:offset + limit])
+
+        scores = np.zeros(len(self.entries))
+        # Fuzzy: Jaccard similarity of trigram sets, best of the two names
+        grams = trigrams(query)
+        lists = [self._postings[g] for g in grams if g in self._postings]
+        if lists:
+            shared = np.bincount(np.concatenate(lists), minlength=len(self._trigram_counts))
+            similarity = shared / (len(grams) + self._trigram_counts - shared)
+            np.maximum.at(scores, self._name_entry, np.where(similarity >= MIN_TRIGRAM_SIMILARITY, similarity * 50, 0.0))
+        for index in self._prefix_matches(query):
+            whole = query == self._names[index] or query == self._scientific[index]
+            starts = self._names[index].startswith(query) or self._scientific[index].startswith(query)
+            scores[index] += 100 if whole else 80 if starts else 60
+        scores[~mask] = 0
+        matches = np.flatnonzero(scores)
+        # Highest score first; the catalog is name-sorted, so a stable sort keeps ties alphabetical
+        matches = matches[np.argsort(-scores[matches], kind="stable")]
+        return len(matches), tuple(
+            (round(float(scores[i]), 2), self.records[i]) for i in matches[offset:offset + limit]
+        )
+
+
+def catalog_marker(db: Session) -> tuple:
+    """Database state the catalog is built from: (scope version, species count, highest species ID)"""
+    connection = db.connection()
+    count, highest = connection.execute(select(func.count(PlantSpecies.id), func.max(PlantSpecies.id))).one()
+    return resource_versions.get(connection, CATALOG_SCOPE), count, highest
+
+
+class CatalogStore:
+    """Holds the current catalog and rebuilds it after committed plant_species writes"""
+
+    def __init__(self):
+        self._catalog: Optional[PlantCatalog] = None
+        self._lock = threading.Lock()
+
+    def load(self, db: Session, reason: str = "load") -> PlantCatalog:
+        with self._lock:
+            # Read the marker first: a write committed during the build triggers another one
+            marker = catalog_marker(db)
+            current = self._catalog
+            if current is not None and current.marker == marker and reason != "reload":
+                return current
+            species = db.query(PlantSpecies).order_by(PlantSpecies.id).all()
+            catalog = PlantCatalog(build_entries(species, load_reference_plants()), marker)
+            self._catalog = catalog
+            catalog_builds.inc(reason=reason)
+            return catalog
+
+    def get(self, db: Session) -> PlantCatalog:
+        catalog = self._catalog
+        if catalog is None:
+            return self.load(db)
+        if catalog.marker != catalog_marker(db):
+            return self.load(db, reason="changed")
+        return catalog
+
+    def clear(self):
+        with self._lock:
+            self._catalog = None
+
+
+catalog_store = CatalogStore()
+
+registry.gauge("plant_catalog_entries", "Species in the in-memory plant catalog",
+               callback=lambda: len(catalog_store._catalog or ()))
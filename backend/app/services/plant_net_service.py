@@ -1,44 +1,149 @@
 import aiohttp
 import json
+import math
 import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Optional
 import asyncio
-from pathlib import Path
 import logging
-from app.models.plant_image import PlantImage
-from app.models.plant import PlantSpecies
+import time
+
+from app.instrumentation import upstream_trace
 
 logger = logging.getLogger(__name__)
 
+PLANTNET_BASE_URL = os.getenv("PLANTNET_BASE_URL", "https://my-api.plantnet.org/v2")
+# API calls allowed per second, and how many may be spent at once after a pause
+PLANTNET_RATE_PER_SECOND = float(os.getenv("PLANTNET_RATE_PER_SECOND", "2"))
+PLANTNET_BURST = int(os.getenv("PLANTNET_BURST", "5"))
+PLANTNET_MAX_RETRIES = int(os.getenv("PLANTNET_MAX_RETRIES", "3"))
+
+
+def retry_after_delay(value: Optional[str], default: float) -> float:
+    """Seconds to wait from a Retry-After header, in seconds or as an HTTP date; default if unparseable"""
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return default
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)  # HTTP dates are always GMT
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return max(0.0, seconds) if math.isfinite(seconds) else default
+
+
+class TokenBucket:
+    """Async token bucket: refills at rate tokens per second up to capacity"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Callers queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 1.0
+                self._updated = time.monotonic()
+            self._tokens -= 1
+
+    def drain(self):
+        """Spend every token, e.g. after the server reports the quota exhausted"""
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+
+
 class PlantNetService:
-    def __init__(self, api_key: str):
+    """PlantNet client sharing one HTTP session; API calls go through a token bucket"""
+
+    def __init__(self, api_key: str, base_url: str = PLANTNET_BASE_URL,
+                 rate_limiter: Optional[TokenBucket] = None, max_connections: int = 16,
+                 max_retries: int = PLANTNET_MAX_RETRIES):
         self.api_key = api_key
-        self.base_url = "https://my-api.plantnet.org/v2"
-        self.image_cache_dir = Path("data/plant_images")
-        self.image_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.base_url = base_url.rstrip("/")
+        self.rate_limiter = rate_limiter or TokenBucket(PLANTNET_RATE_PER_SECOND, PLANTNET_BURST)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=60),
+            trace_configs=[upstream_trace("plantnet")],
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._session.close()
+        self._session = None
+
+    async def _get(self, url: str, params: Optional[Dict] = None, rate_limited: bool = False):
+        """Response body, retrying 429 and 5xx responses with backoff; None on failure"""
+        for attempt in range(self.max_retries + 1):
+            if rate_limited:
+                await self.rate_limiter.acquire()
+            async with self._session.get(url, params=params) as response:
+                if response.status == 200:
+                    return await response.read()
+                retryable = response.status == 429 or response.status >= 500
+                if not retryable or attempt == self.max_retries:
+                    logger.error(f"PlantNet request {url} failed: {response.status} {await response.text()}")
+                    return None
+                delay = retry_after_delay(response.headers.get("Retry-After"), 2 ** attempt)
+                if response.status == 429:
+                    self.rate_limiter.drain()
+            await asyncio.sleep(delay)
 
     async def search_species(self, scientific_name: str) -> Optional[Dict]:
-        """Search for a plant species and get its images"""
-        async with aiohttp.ClientSession() as session:
-            params = {
-                'api-key': self.api_key,
-                'scientific-name': scientific_name
-            }
-            
-            try:
-                async with session.get(
-                    f"{self.base_url}/species/search",
-                    params=params
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return self._extract_species_data(data)
-                    else:
-                        logger.error(f"Error searching species: {await response.text()}")
-                        return None
-            except Exception as e:
-                logger.error(f"Error in PlantNet API call: {e}")
-                return None
+        """Search for a plant species and get its images; None if the API call failed"""
+        params = {
+            'api-key': self.api_key,
+            'scientific-name': scientific_name
+        }
+        try:
+            body = await self._get(f"{self.base_url}/species/search", params=params, rate_limited=True)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error in PlantNet API call: {e}")
+            return None
+        return None if body is None else self._extract_species_data(json.loads(body))
+
+    async def _download(self, image_url: str, scientific_name: str) -> Optional[Dict]:
+        try:
+            async with self._session.get(image_url) as response:
+                if response.status == 200:
+                    return {
+                        'image_data': await response.read(),
+                        'content_type': response.headers.get('content-type', 'image/jpeg'),
+                        'source': 'plantnet',
+                        'copyright_info': f'Image provided by PlantNet - {scientific_name}'
+                    }
+                logger.error(f"Error fetching image {image_url}: {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.error(f"Error fetching image {image_url}: {e}")
+        return None
+
+    async def fetch_species_images(self, scientific_name: str, limit: int = 3) -> Optional[List[Dict]]:
+        """Downloaded images for a species, fetched concurrently; None if the search failed"""
+        species_data = await self.search_species(scientific_name)
+        if species_data is None:
+            return None
+        downloads = await asyncio.gather(*(
+            self._download(url, scientific_name) for url in species_data.get('images', [])[:limit]
+        ))
+        return [image for image in downloads if image is not None]
 
     async def fetch_plant_images(
         self,
@@ -47,82 +152,16 @@ class PlantNetService:
         limit: int = 3
     ) -> List[Dict]:
         """Fetch images for a plant species"""
-        species_data = await self.search_species(scientific_name)
-        if not species_data:
-            return []
-
-        images = []
-        for image_url in species_data.get('images', [])[:limit]:
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(image_url) as response:
-                        if response.status == 200:
-                            image_data = await response.read()
-                            image_info = {
-                                'image_data': image_data,
-                                'content_type': response.headers.get('content-type', 'image/jpeg'),
-                                'source': 'plantnet',
-                                'copyright_info': f'Image provided by PlantNet - {scientific_name}'
-                            }
-                            images.append(image_info)
-            except Exception as e:
-                logger.error(f"Error fetching image {image_url}: {e}")
-
-        return images
+        return await self.fetch_species_images(scientific_name, limit) or []
 
     def _extract_species_data(self, api_response: Dict) -> Dict:
         """Extract relevant species data from API response"""
         if not api_response.get('results'):
             return {}
-            
+
         result = api_response['results'][0]
         return {
             'scientific_name': result.get('scientificName'),
             'family': result.get('family'),
             'images': [img['url'] for img in result.get('images', [])]
         }
-
-async def seed_plant_images(db_session, plant_list_path: str):
-    """Seed the database with plant images"""
-    with open(plant_list_path, 'r') as f:
-        plant_data = json.load(f)
-    
-    plant_net = PlantNetService(os.getenv('PLANTNET_API_KEY'))
-    
-    for category, plants in plant_data.items():
-        for plant in plants:
-            images = await plant_net.fetch_plant_images(
-                plant['scientific_name'],
-                plant['common_name']
-            )
-            
-            # Create PlantSpecies if it doesn't exist
-            plant_species = await db_session.query(PlantSpecies).filter_by(
-                scientific_name=plant['scientific_name']
-            ).first()
-            
-            if not plant_species:
-                plant_species = PlantSpecies(
-                    scientific_name=plant['scientific_name'],
-                    common_name=plant['common_name'],
-                    categories=plant['categories']
-                )
-                db_session.add(plant_species)
-                await db_session.flush()
-            
-            # Add images
-            for idx, image in enumerate(images):
-                plant_image = PlantImage(
-                    plant_species_id=plant_species.id,
-                    image_data=image['image_data'],
-                    content_type=image['content_type'],
-                    is_primary=(idx == 0),  # First image is primary
-                    source=image['source'],
-                    copyright_info=image['copyright_info']
-                )
-                db_session.add(plant_image)
-            
-            await db_session.commit()
-            
-            # Rate limiting to be nice to the API
-            await asyncio.sleep(1)
@@ -0,0 +1,171 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.garden_grid import GardenGrid
+from app.models.planted_cell import OCCUPANCY_DTYPE, PlantedCells
+from app.services.grid_service import CELL_ID_BITS, CELL_ID_MASK, CellNotFound, GridError, cell_id
+
+# Planted-cell occupancy
+# One species-ID array per garden (PlantedCells), indexed by physical grid
+# slots. Reads and region edits are NumPy fancy-indexing over the slots of the
+# requested rows/columns, counts are one np.unique over the array, and the array
+# is written back as one blob per transaction.
+
+Region = Tuple[int, int, int, int]  # first row, first col, last row, last col (inclusive)
+
+MAX_SPECIES_ID = int(np.iinfo(OCCUPANCY_DTYPE).max)
+
+
+def _check_species(species_ids: np.ndarray):
+    """Species IDs must fit the occupancy array; 0 clears a cell"""
+    if species_ids.size and (species_ids.min() < 0 or species_ids.max() > MAX_SPECIES_ID):
+        raise GridError(f"Species IDs must be between 1 and {MAX_SPECIES_ID}")
+
+
+def run_length_encode(values: np.ndarray) -> List[List[int]]:
+    """[[value, run length], ...] of a flat array"""
+    if values.size == 0:
+        return []
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+    lengths = np.diff(np.concatenate((starts, [values.size])))
+    return [[int(v), int(n)] for v, n in zip(values[starts], lengths)]
+
+
+def run_length_decode(runs: Iterable, size: int) -> np.ndarray:
+    runs = [(int(value), int(length)) for value, length in runs]
+    if any(length < 0 for _, length in runs):
+        raise GridError("Runs must be non-negative [species_id, length] pairs")
+    _check_species(np.array([value for value, _ in runs], dtype=np.int64))
+    if sum(length for _, length in runs) != size:
+        raise GridError(f"Runs must cover exactly {size} cells")
+    return np.repeat(
+        np.array([value for value, _ in runs], dtype=OCCUPANCY_DTYPE),
+        [length for _, length in runs]
+    )
+
+
+class PlantedCellService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _load(self, grid: GardenGrid, create: bool = True) -> Tuple[Optional[PlantedCells], np.ndarray]:
+        """The garden's occupancy record and array, sized to cover every slot in use"""
+        planted = grid.planted
+        if planted is None and create:
+            planted = PlantedCells(garden_id=grid.garden_id, grid=grid)
+            self.db.add(planted)
+        array = planted.load() if planted is not None else np.zeros((0, 0), dtype=OCCUPANCY_DTYPE)
+        rows_needed = max(grid.row_order, default=-1) + 1
+        cols_needed = max(grid.col_order, default=-1) + 1
+        if rows_needed > array.shape[0] or cols_needed > array.shape[1]:
+            # Geometric growth keeps repeated inserts amortized O(1) per cell
+            rows, cols = array.shape
+            grown = np.zeros((
+                rows if rows_needed <= rows else max(rows_needed, rows * 2),
+                cols if cols_needed <= cols else max(cols_needed, cols * 2),
+            ), dtype=OCCUPANCY_DTYPE)
+            grown[:array.shape[0], :array.shape[1]] = array
+            array = grown
+        return planted, array
+
+    def _slots(self, grid: GardenGrid, region: Optional[Region]) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.asarray(grid.row_order, dtype=np.intp)
+        cols = np.asarray(grid.col_order, dtype=np.intp)
+        if region is None:
+            return rows, cols
+        row0, col0, row1, col1 = region
+        if not (0 <= row0 <= row1 < len(rows) and 0 <= col0 <= col1 < len(cols)):
+            raise GridError("Region out of range")
+        return rows[row0:row1 + 1], cols[col0:col1 + 1]
+
+    def matrix(self, grid: GardenGrid, region: Optional[Region] = None) -> np.ndarray:
+        """Species IDs in display order, rows x cols"""
+        _, array = self._load(grid, create=False)
+        rows, cols = self._slots(grid, region)
+        return array[np.ix_(rows, cols)]
+
+    def read(self, grid: GardenGrid, region: Optional[Region] = None, fmt: str = "rle") -> dict:
+        matrix = self.matrix(grid, region)
+        result = {"rows": matrix.shape[0], "cols": matrix.shape[1], "region": region}
+        if fmt == "matrix":
+            result["species"] = matrix.tolist()
+        else:
+            result["runs"] = run_length_encode(matrix.ravel())
+        return result
+
+    def _save(self, planted: PlantedCells, array: np.ndarray):
+        planted.store(array)
+        self.db.commit()
+
+    def write_cells(self, grid: GardenGrid, cells: List[Tuple[int, Optional[int]]]) -> int:
+        """Set many cells by ID in one write; None clears a cell"""
+        planted, array = self._load(grid)
+        ids = np.fromiter((cell for cell, _ in cells), dtype=np.int64, count=len(cells))
+        species = np.fromiter((s or 0 for _, s in cells), dtype=np.int64, count=len(cells))
+        _check_species(species)
+        rows, cols = ids >> CELL_ID_BITS, ids & CELL_ID_MASK
+        valid = np.isin(rows, grid.row_order) & np.isin(cols, grid.col_order)
+        if not valid.all():
+            raise CellNotFound(f"Cell not found: {int(ids[~valid][0])}")
+        array[rows, cols] = species
+        self._save(planted, array)
+        return len(cells)
+
+    def write_runs(self, grid: GardenGrid, runs: list, region: Optional[Region] = None) -> int:
+        """Replace a region (the whole grid by default) from run-length encoded species IDs"""
+        planted, array = self._load(grid)
+        rows, cols = self._slots(grid, region)
+        array[np.ix_(rows, cols)] = run_length_decode(runs, rows.size * cols.size).reshape(rows.size, cols.size)
+        self._save(planted, array)
+        return rows.size * cols.size
+
+    def fill(self, grid: GardenGrid, region: Region, species_id: Optional[int]) -> int:
+        """Plant (or clear, with None) every cell of a region; returns how many cells changed"""
+        _check_species(np.array([species_id or 0], dtype=np.int64))
+        planted, array = self._load(grid)
+        rows, cols = self._slots(grid, region)
+        block = np.ix_(rows, cols)
+        changed = int(np.count_nonzero(array[block] != (species_id or 0)))
+        if changed:
+            array[block] = species_id or 0
+            self._save(planted, array)
+        return changed
+
+    def counts(self, grid: GardenGrid) -> Dict[int, int]:
+        """Planted cells per species"""
+        matrix = self.matrix(grid)
+        species, counts = np.unique(matrix[matrix != 0], return_counts=True)
+        return {int(s): int(n) for s, n in zip(species, counts)}
+
+    def occupied(self, grid: GardenGrid) -> List[dict]:
+        matrix = self.matrix(grid)
+        rows, cols = np.nonzero(matrix)
+        return [
+            {"id": cell_id(grid.row_order[r], grid.col_order[c]), "species_id": int(matrix[r, c])}
+            for r, c in zip(rows.tolist(), cols.tolist())
+        ]
+
+    def clear_slot(self, grid: GardenGrid, row_slot: Optional[int] = None,
+                   col_slot: Optional[int] = None) -> List[dict]:
+        """
+        Empty a physical row or column before the grid drops it, so a reused
+        slot starts empty. Returns the plantings removed; nothing is written
+        when the line was already empty. The caller commits.
+        """
+        if grid.planted is None:
+            return []
+        planted, array = self._load(grid)
+        line = array[row_slot, :] if row_slot is not None else array[:, col_slot]
+        filled = np.flatnonzero(line)
+        if filled.size == 0:
+            return []
+        cleared = [
+            {"id": cell_id(row_slot, int(i)) if row_slot is not None else cell_id(int(i), col_slot),
+             "species_id": int(line[i])}
+            for i in filled
+        ]
+        line[:] = 0
+        planted.store(array)
+        return cleared
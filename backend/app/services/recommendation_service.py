@@ -0,0 +1,236 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.metrics import registry
+from app.models.garden import Garden
+from app.models.zone import Zone
+from app.services.layout_service import sun_range
+from app.services.plant_catalog import PlantCatalog, catalog_store, normalize, water_level
+
+# Climate-aware plant recommendations
+# Every species with a plant_species row is scored against a growing site:
+# the garden's USDA hardiness zone (its coldest winters) against min_temp
+# (annuals, which only live through the frost-free season, skip it), an
+# estimated summer high for that zone against max_temp, the zone's sun hours
+# against sun_requirement, soil moisture against water_requirement and soil pH
+# against the species' preferred range. Each criterion is a 0..1 array over
+# the whole catalog; the weighted sum is the score (0..100). Sites are
+# bucketed (hardiness zone, whole sun hours, pH to 0.5, moisture to 0.1) and
+# each bucket's ranking is computed once per catalog build and cached, so
+# zones with similar conditions share one ranked list.
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096"))
+
+# Criterion weights, summing to 1
+WEIGHTS = {"cold": 0.35, "sun": 0.25, "water": 0.15, "soil_ph": 0.15, "heat": 0.10}
+# Soil moisture (volume fraction) each water_requirement does best in
+IDEAL_MOISTURE = {"low": 0.25, "medium": 0.45, "high": 0.65}
+# Temperatures are in °F, like the hardiness zones
+COLD_TOLERANCE_F = 20.0
+HEAT_TOLERANCE_F = 15.0
+SUN_TOLERANCE_HOURS = 4.0
+MOISTURE_TOLERANCE = 0.4
+PH_TOLERANCE = 1.5
+# Catalog categories of species grown for one season and replanted each year
+ANNUAL_CATEGORIES = {"annual", "vegetable"}
+
+recommendation_cache = registry.counter(
+    "plant_recommendation_cache_total",
+    "Recommendation lookups by bucket cache outcome",
+    labelnames=("outcome",),
+)
+
+_ZONE_PATTERN = re.compile(r"(\d{1,2})\s*([ab])?", re.IGNORECASE)
+
+
+def parse_hardiness_zone(value: Optional[str]) -> Optional[Tuple[int, str]]:
+    """(number, half) from "7b", "Zone 7b" or "10"; None when unknown"""
+    match = _ZONE_PATTERN.search(value or "")
+    if match is None or not 1 <= int(match.group(1)) <= 13:
+        return None
+    return int(match.group(1)), (match.group(2) or "a").lower()
+
+
+def zone_winter_low_f(zone: Tuple[int, str]) -> float:
+    """Lower bound of the zone's average extreme minimum temperature"""
+    number, half = zone
+    return -60.0 + 10 * (number - 1) + (5 if half == "b" else 0)
+
+
+def zone_summer_high_f(zone: Tuple[int, str]) -> float:
+    # Rough: hardiness zones track winter lows, and summers get hotter with them
+    number, half = zone
+    return 78.0 + 2.0 * (number + (0.5 if half == "b" else 0))
+
+
+def _normalize_moisture(value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return None
+    # Accept percentages as well as fractions
+    return value / 100 if value > 1 else value
+
+
+@dataclass(frozen=True)
+class SiteBucket:
+    climate_zone: Optional[Tuple[int, str]]
+    sun_hours: Optional[int]
+    soil_ph: Optional[float]
+    soil_moisture: Optional[float]
+
+    @classmethod
+    def of(cls, climate_zone: Optional[str], sun_hours: Optional[float],
+           soil_ph: Optional[float], soil_moisture: Optional[float]) -> "SiteBucket":
+        moisture = _normalize_moisture(soil_moisture)
+        return cls(
+            climate_zone=parse_hardiness_zone(climate_zone),
+            sun_hours=None if sun_hours is None else int(round(min(max(sun_hours, 0), 24))),
+            soil_ph=None if soil_ph is None else round(soil_ph * 2) / 2,
+            soil_moisture=None if moisture is None else round(min(max(moisture, 0), 1), 1),
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "climate_zone": None if self.climate_zone is None else f"{self.climate_zone[0]}{self.climate_zone[1]}",
+            "sun_hours": self.sun_hours,
+            "soil_ph": self.soil_ph,
+            "soil_moisture": self.soil_moisture,
+        }
+
+
+def _closeness(value, low, high, tolerance) -> np.ndarray:
+    """1 inside [low, high], falling linearly to 0 at tolerance outside; 0.5 where a limit is unknown"""
+    with np.errstate(invalid="ignore"):
+        shortfall = np.maximum(low - value, 0) + np.maximum(value - high, 0)
+        score = np.clip(1 - shortfall / tolerance, 0, 1)
+    return np.where(np.isnan(score), 0.5, score)
+
+
+class CatalogScorer:
+    """Species attribute arrays of one catalog build, scored against site buckets"""
+
+    def __init__(self, catalog: PlantCatalog):
+        self.catalog = catalog
+        self.positions = np.array([i for i, e in enumerate(catalog.entries) if e.id is not None], dtype=np.intp)
+        entries = [catalog.entries[i] for i in self.positions]
+
+        def column(values):
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+        self.min_temp = column(e.min_temp for e in entries)
+        categories = [{normalize(c) for c in e.categories} for e in entries]
+        self.annual = np.array([bool(c & ANNUAL_CATEGORIES) and "perennial" not in c for c in categories],
+                               dtype=bool)
+        self.max_temp = column(e.max_temp for e in entries)
+        sun = [sun_range(e.sun_requirement) if e.sun_requirement else (np.nan, np.nan) for e in entries]
+        self.sun_min = column(low for low, _ in sun)
+        self.sun_max = column(high for _, high in sun)
+        self.ideal_moisture = column(IDEAL_MOISTURE.get(water_level(e.water_requirement)) for e in entries)
+        self.ph_min = column(e.soil_ph[0] if e.soil_ph else 6.0 for e in entries)
+        self.ph_max = column(e.soil_ph[1] if e.soil_ph else 7.0 for e in entries)
+
+    def score(self, bucket: SiteBucket) -> Tuple[np.ndarray, dict]:
+        """Total score and per-criterion scores (0..1) for every species"""
+        count = len(self.positions)
+        parts = {}
+        if bucket.climate_zone is not None:
+            # A plant is hardy when it survives the zone's coldest nights; annuals never see them
+            cold = _closeness(zone_winter_low_f(bucket.climate_zone), self.min_temp, np.inf, COLD_TOLERANCE_F)
+            parts["cold"] = np.where(self.annual, 1.0, cold)
+            parts["heat"] = _closeness(zone_summer_high_f(bucket.climate_zone), -np.inf, self.max_temp,
+                                       HEAT_TOLERANCE_F)
+        if bucket.sun_hours is not None:
+            parts["sun"] = _closeness(bucket.sun_hours, self.sun_min, self.sun_max, SUN_TOLERANCE_HOURS)
+        if bucket.soil_moisture is not None:
+            parts["water"] = _closeness(bucket.soil_moisture, self.ideal_moisture, self.ideal_moisture,
+                                        MOISTURE_TOLERANCE)
+        if bucket.soil_ph is not None:
+            parts["soil_ph"] = _closeness(bucket.soil_ph, self.ph_min, self.ph_max, PH_TOLERANCE)
+        # Unknown site conditions neither help nor hurt
+        total = np.full(count, 0.0)
+        for name, weight in WEIGHTS.items():
+            total += weight * parts.get(name, np.full(count, 1.0))
+        return total * 100, parts
+
+
+@dataclass(frozen=True)
+class Ranking:
+    order: np.ndarray
+    scores: np.ndarray
+    parts: dict
+
+
+class RecommendationEngine:
+    """Ranked species per site bucket, cached for the current catalog build"""
+
+    def __init__(self, max_buckets: int = RECOMMENDATION_CACHE_SIZE):
+        self.max_buckets = max_buckets
+        self._scorer: Optional[CatalogScorer] = None
+        self._rankings: "OrderedDict[SiteBucket, Ranking]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _ranking(self, catalog: PlantCatalog, bucket: SiteBucket) -> Tuple[CatalogScorer, Ranking]:
+        with self._lock:
+            if self._scorer is None or self._scorer.catalog is not catalog:
+                self._scorer = CatalogScorer(catalog)
+                self._rankings.clear()
+            scorer = self._scorer
+            ranking = self._rankings.get(bucket)
+            if ranking is not None:
+                self._rankings.move_to_end(bucket)
+                recommendation_cache.inc(outcome="hit")
+                return scorer, ranking
+        recommendation_cache.inc(outcome="miss")
+        scores, parts = scorer.score(bucket)
+        # Best first; ties keep catalog (name) order
+        order = np.argsort(-scores, kind="stable")
+        ranking = Ranking(order, scores, parts)
+        with self._lock:
+            if self._scorer is scorer:
+                self._rankings[bucket] = ranking
+                while len(self._rankings) > self.max_buckets:
+                    self._rankings.popitem(last=False)
+        return scorer, ranking
+
+    def recommend(self, db: Session, bucket: SiteBucket, limit: int = 10,
+                  min_score: float = 0.0) -> List[dict]:
+        scorer, ranking = self._ranking(catalog_store.get(db), bucket)
+        results = []
+        for index in ranking.order:
+            score = float(ranking.scores[index])
+            if score < min_score or len(results) >= limit:
+                break
+            record = scorer.catalog.records[scorer.positions[index]]
+            results.append({
+                **record,
+                "score": round(score, 1),
+                "criteria": {name: round(float(part[index]), 2) for name, part in ranking.parts.items()},
+            })
+        return results
+
+    def for_zone(self, db: Session, zone: Zone, limit: int = 10, min_score: float = 0.0) -> dict:
+        garden = db.get(Garden, zone.garden_id)
+        bucket = SiteBucket.of(garden.climate_zone if garden else None, zone.sun_exposure,
+                               zone.soil_ph, zone.soil_moisture)
+        return {"zone_id": zone.id, "site": bucket.as_dict(),
+                "plants": self.recommend(db, bucket, limit, min_score)}
+
+    def clear(self):
+        with self._lock:
+            self._scorer = None
+            self._rankings.clear()
+
+    def __len__(self):
+        return len(self._rankings)
+
+
+recommendations = RecommendationEngine()
+
+registry.gauge("plant_recommendation_buckets", "Site buckets with a cached recommendation ranking",
+               callback=lambda: len(recommendations))
@@ -0,0 +1,344 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.metrics import registry
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.garden_change import GardenChange
+from app.models.geometry import load_geometry
+from app.models.plant import Plant
+from app.models.zone import Zone
+from app.services.geometry_cache import reproject
+
+# In-memory spatial index per garden
+# One STRtree per layer (zones, features, plants) answers point-in-zone,
+# overlap and k-nearest queries for whole batches of geometries at once.
+# An index remembers the change-log sequence it reflects and catches up from
+# garden_changes before each use, so writes from any worker or bulk statement
+# are picked up by reloading only the changed rows. Changed rows go to a small
+# delta tree and their old entries are masked; the main tree is rebuilt from
+# the in-memory geometries once the delta outgrows SPATIAL_INDEX_REBUILD_FRACTION
+# of the layer. Least recently used gardens are dropped past SPATIAL_INDEX_MAX_GARDENS.
+
+SPATIAL_INDEX_MAX_GARDENS = int(os.getenv("SPATIAL_INDEX_MAX_GARDENS", "64"))
+SPATIAL_INDEX_REBUILD_FRACTION = float(os.getenv("SPATIAL_INDEX_REBUILD_FRACTION", "0.05"))
+_MIN_DELTA = 64
+METERS_PER_DEGREE = 111_320
+
+# Change-log entity -> (model, geometry column)
+LAYERS = {
+    "zone": (Zone, "boundary"),
+    "feature": (Feature, "boundary"),
+    "plant": (Plant, "location"),
+}
+
+index_builds = registry.counter(
+    "spatial_index_builds_total",
+    "Spatial index tree builds",
+    labelnames=("layer", "reason"),
+)
+index_build_seconds = registry.histogram(
+    "spatial_index_build_seconds",
+    "Time to build a garden's spatial index from the database",
+)
+
+
+def parse_geometries(values: Iterable) -> np.ndarray:
+    """Parse stored WKT/GeoJSON values into an array of shapely geometries"""
+    values = list(values)
+    geometries = np.empty(len(values), dtype=object)
+    wkt = [i for i, value in enumerate(values) if isinstance(value, str) and not value.lstrip().startswith("{")]
+    if wkt:
+        geometries[wkt] = shapely.from_wkt([values[i] for i in wkt], on_invalid="ignore")
+    for i, value in enumerate(values):
+        if geometries[i] is None and value is not None:
+            geometries[i] = load_geometry(value)
+    return geometries
+
+
+class IndexLayer:
+    """STRtree over one kind of geometry, with a delta for rows changed since the last build"""
+
+    def __init__(self, name: str, ids: Iterable[int], geometries: Iterable):
+        self.name = name
+        self._geometries: Dict[int, object] = {
+            row_id: geometry for row_id, geometry in zip(ids, geometries)
+            if geometry is not None and not geometry.is_empty
+        }
+        self._build("load")
+
+    def __len__(self):
+        return len(self._geometries)
+
+    def _build(self, reason: str):
+        self.ids = np.fromiter(self._geometries, dtype=np.int64, count=len(self._geometries))
+        self.tree = STRtree(np.array(list(self._geometries.values()), dtype=object))
+        self._bounds = shapely.total_bounds(self.tree.geometries) if len(self.ids) else np.zeros(4)
+        self._stale = np.zeros(len(self.ids), dtype=bool)
+        self._position = {int(row_id): i for i, row_id in enumerate(self.ids)}
+        self._delta: Dict[int, object] = {}
+        self._delta_tree: Optional[Tuple[np.ndarray, STRtree]] = None
+        index_builds.inc(layer=self.name, reason=reason)
+
+    def upsert(self, row_id: int, geometry):
+        if geometry is None or geometry.is_empty:
+            self.remove(row_id)
+            return
+        self._geometries[row_id] = geometry
+        self._mask(row_id)
+        self._delta[row_id] = geometry
+        self._delta_tree = None
+
+    def remove(self, row_id: int):
+        self._geometries.pop(row_id, None)
+        self._mask(row_id)
+        if self._delta.pop(row_id, None) is not None:
+            self._delta_tree = None
+
+    def _mask(self, row_id: int):
+        position = self._position.get(row_id)
+        if position is not None:
+            self._stale[position] = True
+
+    def compact(self):
+        """Rebuild the main tree once the delta is no longer small"""
+        pending = len(self._delta) + int(self._stale.sum())
+        if pending > max(_MIN_DELTA, len(self.ids) * SPATIAL_INDEX_REBUILD_FRACTION):
+            self._build("delta")
+
+    def _trees(self):
+        yield self.ids, self.tree, self._stale if self._stale.any() else None
+        if self._delta:
+            if self._delta_tree is None:
+                ids = np.fromiter(self._delta, dtype=np.int64, count=len(self._delta))
+                self._delta_tree = (ids, STRtree(np.array(list(self._delta.values()), dtype=object)))
+            yield self._delta_tree[0], self._delta_tree[1], None
+
+    def query(self, geometries: np.ndarray, predicate: str, **kwargs) -> Tuple[np.ndarray, np.ndarray]:
+        """(input index, row id) pairs where predicate(input, row geometry) holds"""
+        inputs, ids = [], []
+        for tree_ids, tree, stale in self._trees():
+            if len(tree_ids) == 0:
+                continue
+            left, right = tree.query(geometries, predicate=predicate, **kwargs)
+            if stale is not None:
+                keep = ~stale[right]
+                left, right = left[keep], right[keep]
+            inputs.append(left)
+            ids.append(tree_ids[right])
+        if not inputs:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+        return np.concatenate(inputs), np.concatenate(ids)
+
+    def snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        """IDs and geometries of every current row"""
+        ids = np.fromiter(self._geometries, dtype=np.int64, count=len(self._geometries))
+        return ids, np.array(list(self._geometries.values()), dtype=object)
+
+    def geometries_of(self, ids: np.ndarray) -> np.ndarray:
+        return np.array([self._geometries[int(row_id)] for row_id in ids], dtype=object)
+
+    def nearest(self, points: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """The k nearest rows to each point as (row id, distance), closest first"""
+        results: List[List[Tuple[int, float]]] = [[] for _ in range(len(points))]
+        if not self._geometries or len(points) == 0:
+            return results
+        k = min(k, len(self._geometries))
+        # Start from the radius expected to hold k rows at uniform density,
+        # then double it for the points that found fewer
+        minx, miny, maxx, maxy = self._bounds
+        radius = max(np.sqrt((maxx - minx) * (maxy - miny) * k / len(self._geometries)),
+                     np.hypot(maxx - minx, maxy - miny) * 1e-3, 1e-9)
+        pending = np.arange(len(points))
+        while len(pending):
+            left, ids = self.query(points[pending], "dwithin", distance=radius)
+            found = np.bincount(left, minlength=len(pending))
+            done = found >= k
+            selected = done[left]
+            left, ids = left[selected], ids[selected]
+            distances = shapely.distance(points[pending][left], self.geometries_of(ids))
+            order = np.lexsort((distances, left))
+            for i, row_id, distance in zip(left[order].tolist(), ids[order].tolist(), distances[order].tolist()):
+                hits = results[pending[i]]
+                if len(hits) < k:
+                    hits.append((row_id, distance))
+            pending = pending[~done]
+            radius *= 2
+        return results
+
+    def nearest_meters(self, points: np.ndarray, k: int, utm_crs: str) -> List[List[Tuple[int, float]]]:
+        """The k nearest rows to each point as (row id, metres in utm_crs), closest first"""
+        results: List[List[Tuple[int, float]]] = [[] for _ in range(len(points))]
+        by_degrees = self.nearest(points, k)
+        if not any(by_degrees):
+            return results
+        # A degree of longitude shrinks with latitude, so the degree ranking is only
+        # a first guess: the metric k nearest lie within the farthest of these
+        projected = reproject(points, "EPSG:4326", utm_crs)
+        left = np.array([i for i, hits in enumerate(by_degrees) for _ in hits], dtype=np.intp)
+        ids = np.array([row_id for hits in by_degrees for row_id, _ in hits], dtype=np.int64)
+        farthest = np.zeros(len(points))
+        np.maximum.at(farthest, left, self._distances_m(projected[left], ids, utm_crs))
+        lat = np.abs(shapely.get_y(points)) + farthest / METERS_PER_DEGREE
+        radius = farthest / (METERS_PER_DEGREE * np.maximum(np.cos(np.radians(np.minimum(lat, 89.0))), 1e-6)) * 1.01
+        left, ids = self.query(points, "dwithin", distance=radius)
+        distances = self._distances_m(projected[left], ids, utm_crs)
+        order = np.lexsort((distances, left))
+        for i, row_id, distance in zip(left[order].tolist(), ids[order].tolist(), distances[order].tolist()):
+            if len(results[i]) < k:
+                results[i].append((row_id, distance))
+        return results
+
+    def _distances_m(self, projected_points: np.ndarray, ids: np.ndarray, utm_crs: str) -> np.ndarray:
+        return shapely.distance(projected_points, reproject(self.geometries_of(ids), "EPSG:4326", utm_crs))
+
+
+class GardenSpatialIndex:
+    def __init__(self, garden_id: int):
+        self.garden_id = garden_id
+        self.sequence = -1  # Change-log position this index reflects
+        self.layers: Dict[str, IndexLayer] = {}
+        self.lock = threading.Lock()
+
+    def build(self, db: Session):
+        started = time.perf_counter()
+        # Read the log position first: changes committed while loading are replayed by the next sync
+        self.sequence = self._latest_sequence(db)
+        for entity, (model, column) in LAYERS.items():
+            rows = db.execute(
+                select(model.id, getattr(model, column)).where(model.garden_id == self.garden_id)
+            ).all()
+            self.layers[entity] = IndexLayer(entity, [row[0] for row in rows], parse_geometries(row[1] for row in rows))
+        index_build_seconds.observe(time.perf_counter() - started)
+
+    def _latest_sequence(self, db: Session) -> int:
+        return db.execute(
+            select(GardenChange.id).where(GardenChange.garden_id == self.garden_id)
+            .order_by(GardenChange.id.desc()).limit(1)
+        ).scalar() or 0
+
+    def sync(self, db: Session):
+        """Apply committed changes since the last build or sync"""
+        if self.sequence < 0:
+            self.build(db)
+            return
+        compacted = db.execute(
+            select(Garden.changes_compacted_seq).where(Garden.id == self.garden_id)
+        ).scalar() or 0
+        if compacted > self.sequence:
+            # Tombstones we never saw were compacted away
+            self.build(db)
+            return
+        rows = db.execute(
+            select(GardenChange.id, GardenChange.entity, GardenChange.entity_id).where(
+                GardenChange.garden_id == self.garden_id,
+                GardenChange.id > self.sequence
+            ).order_by(GardenChange.id)
+        ).all()
+        if not rows:
+            return
+        changed: Dict[str, set] = {}
+        for _, entity, entity_id in rows:
+            if entity in LAYERS:
+                changed.setdefault(entity, set()).add(entity_id)
+        for entity, ids in changed.items():
+            model, column = LAYERS[entity]
+            layer = self.layers[entity]
+            ids = sorted(ids)
+            current = {}
+            for start in range(0, len(ids), 500):
+                current.update(
+                    (row[0], row[1]) for row in db.execute(
+                        select(model.id, getattr(model, column)).where(
+                            model.id.in_(ids[start:start + 500]),
+                            model.garden_id == self.garden_id
+                        )
+                    )
+                )
+            geometries = parse_geometries(current.get(row_id) for row_id in ids)
+            for row_id, geometry in zip(ids, geometries):
+                layer.upsert(row_id, geometry)  # Missing rows were deleted or moved away
+            layer.compact()
+        self.sequence = rows[-1][0]
+
+    # Batch queries; inputs are arrays of shapely geometries (WGS84)
+
+    def zones_containing(self, points: np.ndarray) -> List[Optional[int]]:
+        """ID of a zone containing each point (the lowest ID when zones overlap), or None"""
+        inputs, ids = self.layers["zone"].query(points, "within")
+        zone_ids: List[Optional[int]] = [None] * len(points)
+        for i, zone_id in sorted(zip(inputs.tolist(), ids.tolist()), reverse=True):
+            zone_ids[i] = zone_id
+        return zone_ids
+
+    def intersecting(self, layer: str, geometries: np.ndarray) -> List[List[int]]:
+        """IDs of the layer's rows intersecting each geometry"""
+        inputs, ids = self.layers[layer].query(geometries, "intersects")
+        hits: List[List[int]] = [[] for _ in range(len(geometries))]
+        for i, row_id in sorted(zip(inputs.tolist(), ids.tolist())):
+            hits[i].append(row_id)
+        return hits
+
+    def nearest(self, layer: str, points: np.ndarray, k: int = 1,
+                utm_crs: Optional[str] = None) -> List[List[Tuple[int, float]]]:
+        """k nearest rows per point; distances in metres when utm_crs is given, else degrees"""
+        if utm_crs is not None:
+            return self.layers[layer].nearest_meters(points, k, utm_crs)
+        return self.layers[layer].nearest(points, k)
+
+
+class SpatialIndexRegistry:
+    """Per-garden indexes, least recently used evicted first"""
+
+    def __init__(self, max_gardens: int = SPATIAL_INDEX_MAX_GARDENS):
+        self.max_gardens = max_gardens
+        self._indexes: "OrderedDict[int, GardenSpatialIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def use(self, db: Session, garden_id: int):
+        """
+        The garden's index, synced with committed changes and locked against
+        concurrent syncs for the duration of the block:
+
+            with spatial_indexes.use(db, garden_id) as index:
+                index.zones_containing(points)
+        """
+        with self._lock:
+            index = self._indexes.get(garden_id)
+            if index is None:
+                index = GardenSpatialIndex(garden_id)
+                self._indexes[garden_id] = index
+            self._indexes.move_to_end(garden_id)
+            while len(self._indexes) > self.max_gardens:
+                self._indexes.popitem(last=False)
+        with index.lock:
+            index.sync(db)
+            yield index
+
+    def discard(self, garden_id: int):
+        with self._lock:
+            self._indexes.pop(garden_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def __len__(self):
+        return len(self._indexes)
+
+
+spatial_indexes = SpatialIndexRegistry()
+
+registry.gauge("spatial_index_gardens", "Gardens with a loaded spatial index",
+               callback=lambda: len(spatial_indexes))
@@ -1,18 +1,27 @@
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
-import aiohttp
-import mercantile
-import rasterio
-from rasterio.warp import transform_bounds, calculate_default_transform
-from rasterio.features import geometry_mask
-from pysolar.solar import get_altitude_azimuth
+from typing import Dict, List, Optional, Tuple
+import shapely
 from shapely.geometry import shape, box, Polygon, Point
 from shapely.ops import transform
-import geopandas as gpd
-from sqlalchemy.orm import Session
+from shapely.prepared import prep
+from sqlalchemy import func
+from sqlalchemy.orm import Session, contains_eager
+from app.models.feature import Feature
 from app.models.garden import Garden
+from app.models.geometry import SRID
+from app.models.plant import Plant
 from app.models.zone import Zone
+from app.instrumentation import upstream_trace
+from app.lazy_imports import lazy_module
+from app.services.geometry_cache import (
+    CachedGeometry, build_cached_geometry, geometry_cache, reproject, utm_crs_for
+)
+from app.services.spatial_index import spatial_indexes
+
+# Only the sun and imagery endpoints need these
+aiohttp = lazy_module("aiohttp")
+pysolar_solar = lazy_module("pysolar.solar")
 
 class SpatialService:
     def __init__(self, db: Session):
@@ -20,17 +29,23 @@ class SpatialService:
         self.usgs_imagery_url = "https://imagery.nationalmap.gov/arcgis/rest/services/USGSNAIPImagery/ImageServer/exportImage"
         self.grid_size_feet = 1  # Default 1 foot grid squares
 
+    async def get_garden(self, garden_id: int) -> Optional[Garden]:
+        """Get garden by ID"""
+        return self.db.query(Garden).filter(Garden.id == garden_id).first()
+
     async def calculate_sunlight_exposure(self, zone_id: int, date: datetime = None) -> dict:
         """Calculate sunlight exposure for a zone throughout the day"""
         if date is None:
             date = datetime.now()
 
-        zone = self.db.query(Zone).join(Garden).filter(Zone.id == zone_id).first()
+        zone = self.db.query(Zone).join(Garden).options(
+            contains_eager(Zone.garden)  # Populate zone.garden from the join instead of a lazy load
+        ).filter(Zone.id == zone_id).first()
         garden = zone.garden
         
         # Get zone center coordinates
-        zone_shape = shape(zone.boundary)
-        center = zone_shape.centroid
+        zone_geometry = geometry_cache.get(zone)
+        center = zone_geometry.centroid
         lat, lon = center.y, center.x
         
         # Calculate sun positions throughout the day
@@ -39,7 +54,7 @@ class SpatialService:
         
         for hour in hours:
             time = date.replace(hour=hour)
-            altitude, azimuth = get_altitude_azimuth(lat, lon, time)
+            azimuth, altitude = pysolar_solar.get_position(lat, lon, time)
             sun_positions.append({
                 'hour': hour,
                 'altitude': altitude,
@@ -47,7 +62,7 @@ class SpatialService:
             })
         
         # Calculate effective sun hours considering obstacles
-        total_sun_hours = self._calculate_effective_sunlight(zone_shape, sun_positions)
+        total_sun_hours = self._calculate_effective_sunlight(zone_geometry.geometry, sun_positions)
         
         return {
             'date': date.date(),
@@ -79,7 +94,7 @@ class SpatialService:
             "f": "image"
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("usgs")]) as session:
             async with session.get(self.usgs_imagery_url, params=params) as response:
                 if response.status != 200:
                     raise Exception("Failed to fetch satellite imagery")
@@ -91,21 +106,23 @@ class SpatialService:
                     "resolution": self._calculate_resolution(bounds, zoom)
                 }
 
-    def create_grid_system(self, boundary: Polygon, grid_size_feet: float = None) -> Dict:
+    def create_grid_system(self, boundary, grid_size_feet: float = None) -> Dict:
         """
         Create a grid system within the given boundary
+        boundary: shapely Polygon, or a CachedGeometry to reuse its UTM projection
         Returns grid cells and their real-world dimensions
         """
         if grid_size_feet:
             self.grid_size_feet = grid_size_feet
             
-        # Convert boundary to local UTM projection for accurate measurements
-        boundary_gdf = gpd.GeoDataFrame(geometry=[boundary], crs="EPSG:4326")
-        utm_crs = self._get_utm_crs(boundary.centroid.y, boundary.centroid.x)
-        boundary_utm = boundary_gdf.to_crs(utm_crs)
+        # Use the local UTM projection for accurate measurements
+        if not isinstance(boundary, CachedGeometry):
+            boundary = build_cached_geometry(boundary)
+        utm_crs = boundary.utm_crs
+        boundary_utm = prep(boundary.utm_geometry)
         
-        # Get boundary extent in feet
-        minx, miny, maxx, maxy = boundary_utm.total_bounds
+        # Get boundary extent in meters
+        minx, miny, maxx, maxy = boundary.utm_geometry.bounds
         
         # Create grid cells
         grid_cells = []
@@ -115,15 +132,14 @@ class SpatialService:
         for x in x_coords:
             for y in y_coords:
                 cell = box(x, y, x + self.grid_size_feet * 0.3048, y + self.grid_size_feet * 0.3048)
-                if cell.intersects(boundary_utm.geometry.iloc[0]):
+                if boundary_utm.intersects(cell):
                     grid_cells.append(cell)
         
-        # Convert grid cells back to WGS84
-        grid_gdf = gpd.GeoDataFrame(geometry=grid_cells, crs=utm_crs)
-        grid_wgs84 = grid_gdf.to_crs("EPSG:4326")
+        # Convert grid cells back to WGS84 in one batch
+        grid_wgs84 = reproject(np.array(grid_cells, dtype=object), utm_crs, "EPSG:4326")
         
         return {
-            "grid_cells": [cell.__geo_interface__ for cell in grid_wgs84.geometry],
+            "grid_cells": [cell.__geo_interface__ for cell in grid_wgs84],
             "cell_size_feet": self.grid_size_feet,
             "total_cells": len(grid_cells),
             "dimensions": {
@@ -140,9 +156,7 @@ class SpatialService:
 
     def _get_utm_crs(self, lat: float, lon: float) -> str:
         """Get the appropriate UTM CRS for given coordinates"""
-        zone_number = int((lon + 180) / 6) + 1
-        zone_letter = 'N' if lat >= 0 else 'S'
-        return f"EPSG:326{zone_number:02d}"  # Northern hemisphere UTM zones
+        return utm_crs_for(lon, lat)
 
     def get_cell_at_coordinates(self, lat: float, lon: float, boundary: Polygon) -> int:
         """Get the grid cell ID at given coordinates"""
@@ -153,3 +167,118 @@ class SpatialService:
             if shape(cell).contains(point):
                 return idx
         return None
+
+    # Spatial queries
+    # On PostgreSQL these run in the database against GiST-indexed geometry columns.
+    # On SQLite they fall back to loading the garden's rows and testing them with shapely.
+
+    def _uses_postgis(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def find_zone_containing(self, garden_id: int, lon: float, lat: float) -> Optional[Zone]:
+        """Find the zone of a garden that contains a point"""
+        if self._uses_postgis():
+            return self._find_zone_containing_postgis(garden_id, lon, lat)
+        return self._find_zone_containing_python(garden_id, lon, lat)
+
+    def _find_zone_containing_postgis(self, garden_id: int, lon: float, lat: float) -> Optional[Zone]:
+        point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), SRID)
+        return self.db.query(Zone).filter(
+            Zone.garden_id == garden_id,
+            func.ST_Contains(Zone.boundary, point)
+        ).first()
+
+    def _find_zone_containing_python(self, garden_id: int, lon: float, lat: float) -> Optional[Zone]:
+        point = Point(lon, lat)
+        for zone in self.db.query(Zone).filter(Zone.garden_id == garden_id):
+            if zone.boundary and geometry_cache.get(zone).prepared.contains(point):
+                return zone
+        return None
+
+    def features_intersecting_bbox(
+        self,
+        garden_id: int,
+        bbox: Tuple[float, float, float, float]
+    ) -> List[Feature]:
+        """Get features of a garden intersecting a (min_lon, min_lat, max_lon, max_lat) box"""
+        if self._uses_postgis():
+            return self._features_intersecting_bbox_postgis(garden_id, bbox)
+        return self._features_intersecting_bbox_python(garden_id, bbox)
+
+    def _features_intersecting_bbox_postgis(self, garden_id: int, bbox) -> List[Feature]:
+        envelope = func.ST_MakeEnvelope(*bbox, SRID)
+        return self.db.query(Feature).filter(
+            Feature.garden_id == garden_id,
+            Feature.boundary.op("&&")(envelope),  # Index-only bounding box pre-filter
+            func.ST_Intersects(Feature.boundary, envelope)
+        ).all()
+
+    def _features_intersecting_bbox_python(self, garden_id: int, bbox) -> List[Feature]:
+        query_box = box(*bbox)
+        return [
+            feature for feature in self.db.query(Feature).filter(
+                Feature.garden_id == garden_id,
+                Feature.bbox_overlaps(bbox)  # Indexed bbox columns narrow the candidates
+            )
+            if feature.boundary and geometry_cache.get(feature).prepared.intersects(query_box)
+        ]
+
+    def nearest_plants(self, garden_id: int, lon: float, lat: float, limit: int = 5) -> List[Plant]:
+        """Get the plants of a garden closest to a point"""
+        if self._uses_postgis():
+            return self._nearest_plants_postgis(garden_id, lon, lat, limit)
+        return self._nearest_plants_python(garden_id, lon, lat, limit)
+
+    def _nearest_plants_postgis(self, garden_id: int, lon: float, lat: float, limit: int) -> List[Plant]:
+        point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), SRID)
+        return self.db.query(Plant).filter(
+            Plant.garden_id == garden_id
+        ).order_by(
+            Plant.location.op("<->")(point)  # KNN ordering served by the GiST index
+        ).limit(limit).all()
+
+    def _nearest_plants_python(self, garden_id: int, lon: float, lat: float, limit: int) -> List[Plant]:
+        point = Point(lon, lat)
+        plants = [
+            plant for plant in self.db.query(Plant).filter(Plant.garden_id == garden_id)
+            if plant.location
+        ]
+        plants.sort(key=lambda plant: geometry_cache.get(plant, "location").geometry.distance(point))
+        return plants[:limit]
+
+    # Batch placement checks, served from the in-memory per-garden index
+
+    def check_placements(
+        self,
+        garden_id: int,
+        points: List[Tuple[float, float]],
+        nearest: int = 1
+    ) -> List[dict]:
+        """Zone, intersecting features and nearest plants (by metres) for each candidate (lon, lat)"""
+        geometries = shapely.points(np.asarray(points, dtype=float).reshape(-1, 2))
+        with spatial_indexes.use(self.db, garden_id) as index:
+            zones = index.zones_containing(geometries)
+            features = index.intersecting("feature", geometries)
+            if nearest and len(points):
+                plants = index.nearest("plant", geometries, nearest, self._placement_utm_crs(garden_id, geometries))
+            else:
+                plants = [[] for _ in points]
+        return [
+            {
+                "lon": lon,
+                "lat": lat,
+                "zone_id": zone_id,
+                "feature_ids": feature_ids,
+                "nearest_plants": [{"id": plant_id, "distance_m": round(distance, 3)} for plant_id, distance in near],
+            }
+            for (lon, lat), zone_id, feature_ids, near in zip(points, zones, features, plants)
+        ]
+
+    def _placement_utm_crs(self, garden_id: int, points: np.ndarray) -> str:
+        """The garden's UTM zone, or the candidates' when the garden has no boundary"""
+        garden = self.db.get(Garden, garden_id)
+        cached = geometry_cache.get(garden) if garden is not None else None
+        if cached is not None:
+            return cached.utm_crs
+        minx, miny, maxx, maxy = shapely.total_bounds(points)
+        return utm_crs_for((minx + maxx) / 2, (miny + maxy) / 2)
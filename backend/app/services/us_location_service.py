@@ -1,6 +1,7 @@
 from typing import Dict, Optional, Tuple
 import aiohttp
 from fastapi import HTTPException
+from app.instrumentation import upstream_trace
 
 class USLocationService:
     """Service for US-specific location and geocoding operations"""
@@ -17,7 +18,7 @@ class USLocationService:
             "format": "json"
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("census")]) as session:
             async with session.get(self.census_geocoding_url, params=params) as response:
                 if response.status != 200:
                     raise HTTPException(status_code=400, detail="Geocoding failed")
@@ -47,7 +48,7 @@ class USLocationService:
             "output": "json"
         }
         
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("usgs")]) as session:
             async with session.get(self.usgs_elevation_url, params=params) as response:
                 if response.status != 200:
                     raise HTTPException(status_code=400, detail="Elevation lookup failed")
@@ -1,6 +1,7 @@
 from typing import Dict, List, Optional
 import aiohttp
 from fastapi import HTTPException
+from app.instrumentation import upstream_trace
 
 class USDAService:
     """Service for USDA plant and growing zone data"""
@@ -21,7 +22,7 @@ class USDAService:
         if self.api_key:
             params["api_key"] = self.api_key
             
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("usda")]) as session:
             async with session.get(url, params=params) as response:
                 if response.status != 200:
                     raise HTTPException(status_code=400, detail="USDA plant lookup failed")
@@ -40,7 +41,7 @@ class USDAService:
         if self.api_key:
             params["api_key"] = self.api_key
         
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("usda")]) as session:
             async with session.get(url, params=params) as response:
                 if response.status != 200:
                     raise HTTPException(status_code=400, detail="Hardiness zone lookup failed")
@@ -64,7 +65,7 @@ class USDAService:
         if self.api_key:
             params["api_key"] = self.api_key
             
-        async with aiohttp.ClientSession() as session:
+        async with aiohttp.ClientSession(trace_configs=[upstream_trace("usda")]) as session:
             async with session.get(url, params=params) as response:
                 if response.status != 200:
                     raise HTTPException(status_code=400, detail="Native plants lookup failed")
@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.models.watering import WateringSchedule, WateringEvent
 from app.models.weather import WeatherData
 from app.services.weather_service import WeatherService
@@ -37,7 +37,10 @@ class WateringService:
         days: int = 7
     ) -> List[WateringEvent]:
         """Get upcoming watering events for a schedule"""
-        schedule = self.db.query(WateringSchedule).filter(
+        # schedule.zone.garden_id is needed below; load the zone in the same query
+        schedule = self.db.query(WateringSchedule).options(
+            joinedload(WateringSchedule.zone)
+        ).filter(
             WateringSchedule.id == schedule_id
         ).first()
         
@@ -4,6 +4,8 @@ import requests
 from sqlalchemy.orm import Session
 from app.models.weather import WeatherData
 from app.models.garden import Garden
+from app.instrumentation import upstream_call
+from app.services.geometry_cache import geometry_cache
 
 class WeatherService:
     def __init__(self, db: Session):
@@ -21,8 +23,7 @@ class WeatherService:
         garden = self.db.query(Garden).filter(Garden.id == garden_id).first()
         
         # Get garden center coordinates
-        garden_shape = shape(garden.boundary)
-        center = garden_shape.centroid
+        center = geometry_cache.get(garden).centroid
         lat, lon = center.y, center.x
         
         # Fetch forecast from weather API
@@ -66,7 +67,9 @@ class WeatherService:
         }
         
         try:
-            response = requests.get(url, params=params)
+            with upstream_call("weather") as call:
+                response = requests.get(url, params=params)
+                call.status = response.status_code
             response.raise_for_status()
             return response.json()['forecast']
         except Exception as e:
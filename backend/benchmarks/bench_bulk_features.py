@@ -0,0 +1,82 @@
+"""
+Throughput of bulk feature writes versus one request per feature.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bulk_features --features 10000
+
+Uses a temporary SQLite database unless DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_bulk.db"
+
+from fastapi.testclient import TestClient
+
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.garden import Garden
+
+GARDEN_ID = 9_000_002
+
+
+def make_feature(i: int) -> dict:
+    lon, lat = -74.006 + (i % 100) * 1e-5, 40.7128 + (i // 100) * 1e-5
+    ring = [[lon, lat], [lon + 1e-5, lat], [lon + 1e-5, lat + 1e-5], [lon, lat + 1e-5], [lon, lat]]
+    return {
+        "name": f"Bed {i}",
+        "boundary": f'{{"type": "Polygon", "coordinates": [{ring}]}}',
+        "color": "#3a7d44",
+        "garden_id": GARDEN_ID,
+        "user_id": 1,
+    }
+
+
+def report(label: str, count: int, elapsed: float):
+    print(f"  {label:<28} {count:>6} features  {elapsed:8.2f} s  {count / elapsed:10.0f} features/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--features", type=int, default=10_000)
+    parser.add_argument("--single", type=int, default=500, help="features to create one request at a time")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if not db.query(Garden).filter(Garden.id == GARDEN_ID).first():
+        db.add(Garden(id=GARDEN_ID, name="Benchmark Garden"))
+        db.commit()
+    db.close()
+
+    client = TestClient(app)
+    print(f"Dialect: {engine.dialect.name}")
+
+    start = time.perf_counter()
+    for i in range(args.single):
+        client.post("/api/features/", json=make_feature(i)).raise_for_status()
+    report("POST /features/ (each)", args.single, time.perf_counter() - start)
+
+    features = [make_feature(i) for i in range(args.features)]
+    start = time.perf_counter()
+    response = client.post("/api/features/bulk", json=features)
+    response.raise_for_status()
+    report("POST /features/bulk", args.features, time.perf_counter() - start)
+    ids = [r["id"] for r in response.json()["results"]]
+
+    updates = [{**feature, "id": feature_id, "color": "#8c564b"} for feature, feature_id in zip(features, ids)]
+    start = time.perf_counter()
+    client.put("/api/features/bulk", json=updates).raise_for_status()
+    report("PUT /features/bulk", len(updates), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    client.request("DELETE", "/api/features/bulk", json={"ids": ids}).raise_for_status()
+    report("DELETE /features/bulk", len(ids), time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
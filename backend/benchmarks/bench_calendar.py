@@ -0,0 +1,93 @@
+"""
+Benchmark garden calendar builds: all gardens at once, one at a time, and
+incrementally after adding a plant.
+
+Run from the backend directory:
+    python -m benchmarks.bench_calendar --gardens 1000 --plants 50 --species 500
+
+Creates the gardens, species and plants in a temporary SQLite database
+(unless DATABASE_URL is set), then times CalendarRegistry.build_all for the
+whole set against building each garden's calendar separately, and the
+sync of one garden after a plant is added to it.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_calendar.db"
+
+from sqlalchemy import insert
+
+from app.database import Base, SessionLocal, engine
+from app.models import feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+from app.models.garden import Garden
+from app.models.plant import Plant, PlantSpecies
+from app.models.user import User
+# change_log_service registers the session hooks the calendar syncs from
+from app.services import change_log_service  # noqa: F401
+from app.services.calendar_service import CalendarRegistry
+
+
+def populate(db, gardens: int, plants: int, species: int, rng: random.Random):
+    db.add(User(id=1, email="bench@example.com", username="bench"))
+    db.execute(insert(PlantSpecies), [
+        {"id": i, "name": f"Species {i}", "min_temp": rng.choice([20, 40, 50]),
+         "days_to_harvest": rng.randint(30, 120), "harvest_window_days": rng.randint(7, 45),
+         "growing_seasons": [rng.choice(["spring", "summer", "fall"])]}
+        for i in range(1, species + 1)
+    ])
+    db.execute(insert(Garden), [
+        {"id": g, "name": f"Garden {g}", "user_id": 1, "climate_zone": f"{rng.randint(3, 10)}a"}
+        for g in range(1, gardens + 1)
+    ])
+    # Bulk inserts bypass the change log, as a restore would
+    db.execute(insert(Plant), [
+        {"garden_id": g, "species_id": rng.randint(1, species),
+         "planted_date": date(2026, 3, 1) + timedelta(days=rng.randint(0, 150)) if rng.random() < 0.7 else None}
+        for g in range(1, gardens + 1) for _ in range(plants)
+    ])
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gardens", type=int, default=1000)
+    parser.add_argument("--plants", type=int, default=50, help="Plants per garden")
+    parser.add_argument("--species", type=int, default=500)
+    parser.add_argument("--year", type=int, default=2026)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    populate(db, args.gardens, args.plants, args.species, random.Random(args.gardens))
+    print(f"Calendar: {args.gardens} gardens x {args.plants} plants, {args.species} species")
+
+    batch = CalendarRegistry()
+    started = time.perf_counter()
+    batch.build_all(db, args.year)
+    print(f"  build_all          {(time.perf_counter() - started) * 1000:>9.0f} ms")
+
+    single = CalendarRegistry()
+    started = time.perf_counter()
+    for garden_id in range(1, args.gardens + 1):
+        with single.use(db, garden_id, args.year):
+            pass
+    print(f"  one by one         {(time.perf_counter() - started) * 1000:>9.0f} ms")
+
+    db.add(Plant(garden_id=1, species_id=1, planted_date=date(args.year, 5, 1)))
+    db.commit()
+    started = time.perf_counter()
+    with batch.use(db, 1, args.year) as calendar:
+        summary = calendar.summary()
+    print(f"  sync after 1 add   {(time.perf_counter() - started) * 1000:>9.2f} ms "
+          f"({len(summary['plants'])} plants, {len(summary['harvest_overlaps'])} harvest overlaps)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark companion queries on the compiled graph against decoding JSON.
+
+Run from the backend directory:
+    python -m benchmarks.bench_companion_graph --species 10000 --degree 12
+
+Builds a random companion_plants list for every species (about one in ten
+entries an antagonist, as a negative ID), stored as JSON strings the way
+the database returns them. Reports the graph build time, then per-query
+times for companions of one species, species compatible with all of three,
+and conflicts within a 20-species planting list, once by decoding every
+row's JSON (what a query without the graph must do) and once on the graph.
+No database is used; a temporary SQLite URL is set unless DATABASE_URL is.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_companions.db"
+
+from app.services.companion_graph import CompanionGraph, parse_companions
+
+
+def make_rows(count: int, degree: int, rng: random.Random):
+    rows = {}
+    for species_id in range(1, count + 1):
+        targets = rng.sample(range(1, count + 1), degree)
+        rows[species_id] = json.dumps([-t if rng.random() < 0.1 else t for t in targets if t != species_id])
+    return rows
+
+
+def decoded(rows):
+    return {species_id: parse_companions(json.loads(raw)) for species_id, raw in rows.items()}
+
+
+def naive_companions(rows, species_id):
+    edges = decoded(rows)
+    return sorted({other for other, (companions, antagonists) in edges.items()
+                   if species_id in companions and species_id not in antagonists}
+                  | (set(edges[species_id][0]) - {o for o, (_, a) in edges.items() if species_id in a}))
+
+
+def naive_conflicts(rows, planting):
+    edges = decoded(rows)
+    members = set(planting)
+    return sorted({tuple(sorted((a, b))) for a in members for b in edges[a][1] if b in members})
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--species", type=int, default=10000)
+    parser.add_argument("--degree", type=int, default=12, help="Entries per companion_plants list")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(args.species)
+    rows = make_rows(args.species, args.degree, rng)
+    edges = decoded(rows)
+    started = time.perf_counter()
+    graph = CompanionGraph(edges)
+    build = time.perf_counter() - started
+    print(f"Companion graph: {len(graph)} species, {graph.edge_count()} companion and "
+          f"{graph.edge_count('antagonist')} antagonist pairs, built in {build * 1000:.0f} ms")
+
+    species_id = rng.randrange(1, args.species + 1)
+    trio = rng.sample(range(1, args.species + 1), 3)
+    planting = rng.sample(range(1, args.species + 1), 20)
+    queries = [
+        ("companions of one", lambda: naive_companions(rows, species_id), lambda: graph.neighbours(species_id)),
+        ("compatible with 3", None, lambda: graph.compatible_with_all(trio)),
+        ("conflicts in 20", lambda: naive_conflicts(rows, planting), lambda: graph.pairs_among(planting)),
+    ]
+    print(f"  {'query':<18} {'decode JSON':>12} {'graph':>10}")
+    for name, naive, compiled in queries:
+        graph_seconds, result = timed(compiled, args.repeat)
+        if naive is None:
+            naive_text = "-"
+        else:
+            naive_seconds, expected = timed(naive, 3)
+            assert expected == result, name
+            naive_text = f"{naive_seconds * 1000:.1f} ms"
+        print(f"  {name:<18} {naive_text:>12} {graph_seconds * 1e6:>7.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Overhead of request instrumentation on the hot path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_instrumentation --requests 50000 --queries 20000
+
+Sends requests straight through the ASGI interface of a minimal app: bare,
+wrapped in MetricsMiddleware, and wrapped in ProfilingMiddleware with
+profiling off and with only ADMIN_TOKEN set, so requests without an
+X-Profile header pass through. Also runs SELECT 1 with and without the
+per-query engine hooks. Reports the added cost per request and per query in
+microseconds.
+
+Uses a temporary SQLite database unless DATABASE_URL is set.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_instrumentation.db"
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from app import instrumentation
+from app.database import engine
+from app.instrumentation import MetricsMiddleware
+from app.profiling import Profiler, ProfilingMiddleware
+
+SCOPE = {"type": "http", "method": "GET", "path": "/ping", "headers": []}
+BODY = b'{"ok": true}'
+
+
+async def ping(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def time_requests(app, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        await app(dict(SCOPE), receive, send)
+    return time.perf_counter() - started
+
+
+def time_queries(count: int) -> float:
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        started = time.perf_counter()
+        for _ in range(count):
+            conn.execute(statement).scalar()
+        return time.perf_counter() - started
+
+
+def set_query_hooks(enabled: bool):
+    hooks = (("before_cursor_execute", instrumentation._start_query_timer),
+             ("after_cursor_execute", instrumentation._record_query))
+    for name, hook in hooks:
+        if enabled and not event.contains(Engine, name, hook):
+            event.listen(Engine, name, hook)
+        elif not enabled and event.contains(Engine, name, hook):
+            event.remove(Engine, name, hook)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20000)
+    args = parser.parse_args()
+
+    instrumented = MetricsMiddleware(ping)
+    # Warm up both paths, including the label series the middleware creates
+    asyncio.run(time_requests(ping, 1000))
+    asyncio.run(time_requests(instrumented, 1000))
+    bare = asyncio.run(time_requests(ping, args.requests))
+    wrapped = asyncio.run(time_requests(instrumented, args.requests))
+    per_request = (wrapped - bare) / args.requests * 1e6
+    print(f"Requests: {args.requests} bare {bare:.3f}s, instrumented {wrapped:.3f}s "
+          f"-> {per_request:.1f}us added per request")
+    for name, profiler in (("off", Profiler(token="", sample_rate=0)),
+                           ("token set, no header", Profiler(token="secret", sample_rate=0))):
+        profiled = asyncio.run(time_requests(ProfilingMiddleware(ping, profiler), args.requests))
+        print(f"Profiling {name}: {profiled:.3f}s -> {(profiled - bare) / args.requests * 1e6:.1f}us added per request")
+
+    set_query_hooks(False)
+    time_queries(1000)
+    unhooked = time_queries(args.queries)
+    set_query_hooks(True)
+    hooked = time_queries(args.queries)
+    per_query = (hooked - unhooked) / args.queries * 1e6
+    print(f"Queries: {args.queries} without hooks {unhooked:.3f}s, with hooks {hooked:.3f}s "
+          f"-> {per_query:.1f}us added per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark the planting layout solver against lattice size.
+
+Run from the backend directory:
+    python -m benchmarks.bench_layout_solver --sizes 20 50 100 200 --species 12
+
+For each square lattice (0.15 m cells, a shaded strip along one edge) asks
+for enough plants of a random species mix to fill it, with random companion
+pairs, and reports the greedy and total solve time, how many plants fit and
+how many companion pairs local search added. The solver itself does not
+touch the database; a temporary SQLite URL is set unless DATABASE_URL is.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_layout.db"
+
+import numpy as np
+
+from app.services.layout_service import LayoutSolver, LayoutSpecies
+
+CELL_SIZE_M = 0.15
+
+
+def make_species(count: int, cells: int, rng: random.Random):
+    spacings = [rng.choice([0.15, 0.3, 0.3, 0.45, 0.6, 0.9]) for _ in range(count)]
+    ids = list(range(1, count + 1))
+    companions = {i: set() for i in ids}
+    for _ in range(count * 2):
+        a, b = rng.sample(ids, 2)
+        companions[a].add(b)
+        companions[b].add(a)
+    # Ask for about as many plants as the lattice could hold
+    share = cells / count
+    return [
+        LayoutSpecies(
+            species_id=i,
+            quantity=max(int(share * (CELL_SIZE_M / spacing) ** 2), 1),
+            spacing_m=spacing,
+            **rng.choice([{"min_sun": 6.0}, {"min_sun": 6.0}, {"min_sun": 3.0, "max_sun": 6.0},
+                          {"max_sun": 3.0}, {}]),
+            companions=frozenset(companions[i]),
+        )
+        for i, spacing in zip(ids, spacings)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 50, 100, 200])
+    parser.add_argument("--species", type=int, default=12)
+    parser.add_argument("--budget-ms", type=float, default=500)
+    args = parser.parse_args()
+
+    print(f"Layout solver: {args.species} species, {CELL_SIZE_M} m cells, budget {args.budget_ms:.0f} ms")
+    print(f"  {'lattice':>9} {'cells':>7} {'asked':>6} {'placed':>7} {'greedy ms':>10} {'total ms':>9} "
+          f"{'pairs':>13} {'moves':>6}")
+    for size in args.sizes:
+        rng = random.Random(size)
+        usable = np.ones((size, size), dtype=bool)
+        sun = np.full((size, size), 8.0)
+        sun[:, -max(size // 5, 1):] = 2.0
+        species = make_species(args.species, size * size, rng)
+        result = LayoutSolver(usable, sun, CELL_SIZE_M, species, seed=size).solve(args.budget_ms)
+        asked = sum(s.quantity for s in species)
+        print(f"  {size:>4}x{size:<4} {size * size:>7} {asked:>6} {len(result.placements):>7} "
+              f"{result.stats['greedy_seconds'] * 1000:>10.1f} {result.seconds * 1000:>9.1f} "
+              f"{result.greedy_companion_pairs:>6} -> {result.companion_pairs:<4} {result.moves:>6}")
+
+
+if __name__ == "__main__":
+    main()
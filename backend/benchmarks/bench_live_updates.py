@@ -0,0 +1,159 @@
+"""
+Load test for live garden updates: many WebSocket subscribers on one worker.
+
+Run from the backend directory:
+    python -m benchmarks.bench_live_updates --subscribers 1000 --writes 50
+
+Starts uvicorn in-process on a free port (one worker), connects the
+subscribers to one garden, then commits features through the REST API in
+bursts. Reports how long each write takes to reach every subscriber and how
+many frames coalescing saved. --slow adds subscribers that never read, to
+show they do not hold back the others.
+
+Uses a temporary SQLite database unless DATABASE_URL is set.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_live.db"
+
+import httpx
+import uvicorn
+from websockets.asyncio.client import connect
+
+from app.database import Base, SessionLocal, engine
+from app.main import app
+from app.models.garden import Garden
+from app.services.live_updates import hub
+
+GARDEN_ID = 9_000_003
+SQUARE = "POLYGON((0 0,0 1,1 1,1 0,0 0))"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                           ws="websockets", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+class Client:
+    def __init__(self):
+        self.received = {}  # feature name -> arrival time
+        self.frames = 0
+        self.resyncs = 0
+
+    async def listen(self, websocket):
+        async for message in websocket:
+            frame = json.loads(message)
+            if frame["type"] == "resync":
+                self.resyncs += 1
+            elif frame["type"] == "changes":
+                self.frames += 1
+                now = time.perf_counter()
+                for change in frame["changes"]:
+                    if change["data"]:
+                        self.received.setdefault(change["data"]["name"], now)
+
+
+async def run(args, port: int):
+    url = f"ws://127.0.0.1:{port}/api/gardens/{GARDEN_ID}/live"
+    clients = [Client() for _ in range(args.subscribers)]
+    sockets, tasks = [], []
+    slow = set(clients[:args.slow])
+    semaphore = asyncio.Semaphore(100)
+
+    async def open_socket(client):
+        async with semaphore:
+            # A one-frame queue makes a non-reading client stop reading its socket
+            websocket = await connect(url, max_queue=1 if client in slow else 16, open_timeout=60)
+            await websocket.recv()  # subscribed
+            sockets.append(websocket)
+            if client not in slow:
+                tasks.append(asyncio.create_task(client.listen(websocket)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(open_socket(client) for client in clients))
+    print(f"  connected {len(sockets)} subscribers in {time.perf_counter() - started:.2f} s "
+          f"(server sees {hub.subscriber_count()})")
+
+    sent = {}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as http:
+        for burst in range(0, args.writes, args.burst):
+            for i in range(burst, min(burst + args.burst, args.writes)):
+                name = f"Bed {i}"
+                sent[name] = time.perf_counter()
+                await http.post("/api/features/", json={
+                    "name": name, "boundary": SQUARE, "color": "#3a7d44",
+                    "garden_id": GARDEN_ID, "user_id": 1,
+                })
+            await asyncio.sleep(args.pause)
+
+    readers = [c for c in clients if c not in slow]
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline and any(len(c.received) < len(sent) for c in readers):
+        await asyncio.sleep(0.05)
+
+    fan_out = sorted(
+        max(c.received.get(name, float("inf")) for c in readers) - sent_at
+        for name, sent_at in sent.items()
+    )
+    delivered = sum(len(c.received) for c in readers)
+    frames = sum(c.frames for c in readers)
+    print(f"  delivered {delivered}/{len(readers) * len(sent)} changes in {frames} frames "
+          f"({len(sent)} writes, {frames / max(len(readers), 1):.1f} frames per subscriber)")
+    print(f"  write -> all subscribers   p50 {statistics.median(fan_out) * 1000:7.1f} ms   "
+          f"p99 {fan_out[int(len(fan_out) * 0.99) - 1] * 1000:7.1f} ms   max {fan_out[-1] * 1000:7.1f} ms")
+    if args.slow:
+        print(f"  {args.slow} non-reading subscribers did not delay the rest "
+              f"(resyncs seen by readers: {sum(c.resyncs for c in readers)})")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*(websocket.close() for websocket in sockets), return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--writes", type=int, default=50)
+    parser.add_argument("--burst", type=int, default=10, help="writes committed back to back")
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds between bursts")
+    parser.add_argument("--slow", type=int, default=0, help="extra subscribers that never read")
+    args = parser.parse_args()
+    args.subscribers += args.slow
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    if not db.get(Garden, GARDEN_ID):
+        db.add(Garden(id=GARDEN_ID, name="Live benchmark garden", user_id=1))
+        db.commit()
+    db.close()
+
+    server = start_server(free_port())
+    print(f"Live updates: {args.subscribers} subscribers, one worker")
+    try:
+        asyncio.run(run(args, server.config.port))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark plant-image seeding against the local fake PlantNet server.
+
+Run from the backend directory:
+    python -m benchmarks.bench_seeding --plants 200 --latency 0.05
+
+Seeds the same generated plant list twice into fresh tables: once the way
+the old seeder did (one plant at a time, a commit per plant, a fixed pause
+between plants, scaled down by --pause) and once through ImageSeeder with
+bounded concurrency and batched commits. The fake server answers API calls
+and image downloads after --latency seconds; --rate caps API calls per
+second through the token bucket. Images go to a temporary image store and
+a temporary SQLite database unless DATABASE_URL is set.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_seeding.db"
+os.environ.setdefault("IMAGE_STORE_DIR", tempfile.mkdtemp())
+
+from app.database import Base, SessionLocal, engine
+from app.models import feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+from app.models.plant_image import PlantImage
+from app.services.image_seeding import ImageSeeder, SeedCheckpoint
+from app.services.image_store import thumbnails
+from app.services.plant_net_service import PlantNetService, TokenBucket
+from fake_plantnet import FakePlantNet
+
+
+async def sequential(plant_net, plants, images, pause):
+    """The previous seeder's shape: fetch, commit, pause, one plant after another"""
+    seeder = ImageSeeder(plant_net, concurrency=1, batch_size=1, images_per_plant=images,
+                         on_progress=lambda progress: None)
+    for plant in plants:
+        fetched = await plant_net.fetch_species_images(plant["scientific_name"], images)
+        if fetched is not None:
+            await asyncio.to_thread(seeder._commit, [(plant, fetched)])
+        await asyncio.sleep(pause)
+
+
+async def run(args):
+    plants = [{"common_name": f"Bench plant {i}", "scientific_name": f"Benchus plantus{i}"}
+              for i in range(args.plants)]
+    fake = FakePlantNet(images_per_species=args.images, latency=args.latency, image_size=(320, 240))
+    base_url = await fake.start()
+    results = {}
+    try:
+        for name in ("sequential", "pipeline"):
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            async with PlantNetService("bench", base_url, TokenBucket(args.rate, args.concurrency),
+                                       max_connections=args.concurrency * 2) as plant_net:
+                started = time.perf_counter()
+                if name == "sequential":
+                    await sequential(plant_net, plants, args.images, args.pause)
+                else:
+                    seeder = ImageSeeder(plant_net, concurrency=args.concurrency, batch_size=args.batch_size,
+                                         images_per_plant=args.images, checkpoint=SeedCheckpoint(None),
+                                         on_progress=lambda progress: None)
+                    progress = await seeder.run(plants)
+                results[name] = time.perf_counter() - started
+            db = SessionLocal()
+            stored = db.query(PlantImage).count()
+            db.close()
+            print(f"  {name:<12} {results[name]:8.2f} s  {args.plants / results[name]:8.1f} plants/s  "
+                  f"({stored} images)")
+        print(f"  {progress}")
+        print(f"  speedup {results['sequential'] / results['pipeline']:.1f}x")
+    finally:
+        await fake.stop()
+        thumbnails.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plants", type=int, default=200)
+    parser.add_argument("--images", type=int, default=3, help="images per plant")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server response delay in seconds")
+    parser.add_argument("--pause", type=float, default=0.0, help="sequential run's pause per plant (was 1 s)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="API calls per second")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=25)
+    args = parser.parse_args()
+    print(f"Seeding {args.plants} plants x {args.images} images, {args.latency * 1000:.0f} ms latency")
+    asyncio.run(run(args))
@@ -0,0 +1,126 @@
+"""
+Benchmark the per-garden in-memory spatial index at 10k plants.
+
+Run from the backend directory:
+    python -m benchmarks.bench_spatial_index --plants 10000 --points 1000
+
+Times the initial build, the per-request sync with and without new writes,
+and a batch placement check (zone, features and 5 nearest plants for every
+candidate point) against answering the same questions one point at a time
+with the per-row shapely path.
+
+Uses a temporary SQLite database unless DATABASE_URL is set.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_index.db"
+
+import numpy as np
+import shapely
+
+from app.database import Base, SessionLocal, engine
+from app.models import feature, garden, garden_change, plant, plant_image, user, zone, watering, weather
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.plant import Plant
+from app.models.zone import Zone
+from app.services.geometry_cache import geometry_cache
+from app.services.spatial_index import GardenSpatialIndex, spatial_indexes
+from app.services.spatial_service import SpatialService
+
+GARDEN_ID = 9_000_004
+
+
+def square(lon: float, lat: float, size: float) -> str:
+    return (
+        f"POLYGON(({lon} {lat},{lon + size} {lat},{lon + size} {lat + size},"
+        f"{lon} {lat + size},{lon} {lat}))"
+    )
+
+
+def seed(db, plants: int):
+    random.seed(42)
+    db.add(Garden(id=GARDEN_ID, name="Index benchmark garden", boundary=square(0, 0, 1)))
+    db.flush()
+    db.add_all(Zone(garden_id=GARDEN_ID, name=f"Zone {i}", boundary=square(i % 5 * 0.2, i // 5 * 0.25, 0.2))
+               for i in range(20))
+    db.add_all(Feature(garden_id=GARDEN_ID, name=f"Bed {i}", color="#3a7d44",
+                       boundary=square(random.random(), random.random(), 0.002))
+               for i in range(plants // 5))
+    db.add_all(Plant(garden_id=GARDEN_ID, location=f"POINT({random.random()} {random.random()})")
+               for _ in range(plants))
+    db.commit()
+
+
+def timed(label: str, fn, repeat: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<44} {elapsed * 1000:9.2f} ms")
+    return elapsed
+
+
+def one_at_a_time(db, points):
+    """Per-point answers the way the Python fallback path computes them"""
+    zones = db.query(Zone).filter(Zone.garden_id == GARDEN_ID).all()
+    features = db.query(Feature).filter(Feature.garden_id == GARDEN_ID).all()
+    plants = db.query(Plant).filter(Plant.garden_id == GARDEN_ID).all()
+    for lon, lat in points:
+        point = shapely.Point(lon, lat)
+        next((z for z in zones if geometry_cache.get(z).prepared.contains(point)), None)
+        [f for f in features if geometry_cache.get(f).prepared.intersects(point)]
+        sorted(plants, key=lambda p: geometry_cache.get(p, "location").geometry.distance(point))[:5]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plants", type=int, default=10_000)
+    parser.add_argument("--points", type=int, default=1000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not db.get(Garden, GARDEN_ID):
+            seed(db, args.plants)
+        rng = np.random.default_rng(1)
+        points = [tuple(p) for p in rng.random((args.points, 2)).tolist()]
+        print(f"Spatial index: {args.plants} plants, {args.plants // 5} features, 20 zones, "
+              f"{args.points} candidate points")
+
+        timed("build from database", lambda: GardenSpatialIndex(GARDEN_ID).build(db), repeat=3)
+        service = SpatialService(db)
+        service.check_placements(GARDEN_ID, points[:1])
+
+        def sync():
+            with spatial_indexes.use(db, GARDEN_ID):
+                pass
+        timed("sync, nothing changed", sync)
+
+        def write_and_sync():
+            plant = db.query(Plant).filter(Plant.garden_id == GARDEN_ID).first()
+            plant.location = f"POINT({random.random()} {random.random()})"
+            db.commit()
+            sync()
+        timed("sync after one plant moved", write_and_sync)
+
+        batched = timed(f"placement check, {args.points} points (index)",
+                        lambda: service.check_placements(GARDEN_ID, points, nearest=5))
+        sample = points[:max(args.points // 10, 1)]
+        looped = timed(f"same, one point at a time ({len(sample)} points)",
+                       lambda: one_at_a_time(db, sample), repeat=1) * len(points) / len(sample)
+        print(f"  one at a time, extrapolated to {args.points} points   {looped * 1000:9.2f} ms "
+              f"({looped / batched:.0f}x slower)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
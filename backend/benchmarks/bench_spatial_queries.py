@@ -0,0 +1,96 @@
+"""
+Benchmark index-backed spatial queries against the Python/shapely path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_spatial_queries --features 10000
+
+Uses DATABASE_URL if set (PostgreSQL + PostGIS compares both paths),
+otherwise a temporary SQLite database (Python path only).
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_spatial.db"
+
+from app.database import Base, SessionLocal, engine
+from app.models import feature, garden, plant, plant_image, user, zone, watering, weather
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.plant import Plant
+from app.models.zone import Zone
+from app.services.spatial_service import SpatialService
+
+
+def square(lon: float, lat: float, size: float) -> str:
+    return (
+        f"POLYGON(({lon} {lat},{lon + size} {lat},{lon + size} {lat + size},"
+        f"{lon} {lat + size},{lon} {lat}))"
+    )
+
+
+def seed(db, garden_id: int, count: int):
+    random.seed(42)
+    db.add(Garden(id=garden_id, name="Benchmark Garden", boundary=square(0, 0, 1)))
+    db.flush()
+    db.add_all(Zone(garden_id=garden_id, name=f"Zone {i}", boundary=square(i * 0.1, 0, 0.1)) for i in range(10))
+    db.add_all(
+        Feature(
+            garden_id=garden_id,
+            name=f"Bed {i}",
+            boundary=square(random.random(), random.random(), 0.001),
+            color="#3a7d44"
+        )
+        for i in range(count)
+    )
+    db.add_all(
+        Plant(garden_id=garden_id, location=f"POINT({random.random()} {random.random()})")
+        for _ in range(count)
+    )
+    db.commit()
+
+
+def timed(label: str, fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    size = len(result) if isinstance(result, list) else int(result is not None)
+    print(f"  {label:<38} {elapsed * 1000:9.2f} ms  ({size} rows)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--features", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    garden_id = 9_000_001
+    try:
+        if not db.query(Garden).filter(Garden.id == garden_id).first():
+            seed(db, garden_id, args.features)
+        service = SpatialService(db)
+        bbox = (0.4, 0.4, 0.45, 0.45)
+
+        print(f"Dialect: {engine.dialect.name}, {args.features} features/plants")
+        cases = [
+            ("features in bbox", "_features_intersecting_bbox", (garden_id, bbox)),
+            ("zone containing point", "_find_zone_containing", (garden_id, 0.55, 0.05)),
+            ("10 nearest plants", "_nearest_plants", (garden_id, 0.5, 0.5, 10)),
+        ]
+        for label, method, method_args in cases:
+            timed(f"{label} (python)", lambda: getattr(service, f"{method}_python")(*method_args), args.repeat)
+            if service._uses_postgis():
+                timed(f"{label} (postgis)", lambda: getattr(service, f"{method}_postgis")(*method_args), args.repeat)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+
+# app.database builds its engine at import; every test swaps in its own below
+os.environ["DATABASE_URL"] = "sqlite://"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import database
+from app.database import Base, SessionLocal, create_db_engine
+from app.main import app
+from app.models.garden import Garden
+from app.models.user import User
+from app.services.calendar_service import calendars
+from app.services.geometry_cache import geometry_cache
+from app.services.plant_catalog import catalog_store
+from app.services.recommendation_service import recommendations
+from app.services.spatial_index import spatial_indexes
+
+# In-process state derived from the database, reset whenever the database is
+CACHES = (catalog_store, calendars, geometry_cache, recommendations, spatial_indexes)
+
+
+@pytest.fixture()
+def engine(tmp_path, monkeypatch):
+    """A fresh SQLite database under tmp_path with every table, used by the app and SessionLocal"""
+    test_engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=test_engine)
+    monkeypatch.setattr(database, "engine", test_engine)
+    bind = SessionLocal.kw["bind"]
+    SessionLocal.configure(bind=test_engine)
+    for cache in CACHES:
+        cache.clear()
+    yield test_engine
+    for cache in CACHES:
+        cache.clear()
+    SessionLocal.configure(bind=bind)
+    test_engine.dispose()
+
+
+@pytest.fixture()
+def seed(engine):
+    """Insert rows in one transaction: seed(User(...), Garden(...))"""
+    def add(*rows):
+        db = SessionLocal()
+        try:
+            db.add_all(rows)
+            db.commit()
+        finally:
+            db.close()
+    return add
+
+
+@pytest.fixture()
+def rows():
+    """Rows seeded before the app starts; modules override this, or extend it by requesting rows"""
+    return [
+        User(id=1, email="gardener@example.com", username="gardener"),
+        Garden(id=1, name="Garden", user_id=1),
+    ]
+
+
+@pytest.fixture()
+def client(seed, rows):
+    seed(*rows)
+    with TestClient(app) as test_client:
+        yield test_client
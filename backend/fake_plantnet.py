@@ -0,0 +1,101 @@
+"""
+Local stand-in for the PlantNet API, for seeding runs without a key or quota.
+
+    python fake_plantnet.py --port 8765 --latency 0.1 --quota 5
+    PLANTNET_BASE_URL=http://127.0.0.1:8765/v2 python seed_plants.py
+
+/v2/species/search answers every scientific name with a few image URLs
+served by this same process; each image is a distinct JPEG generated on
+first request. --quota limits API calls per second (over it: 429 with
+Retry-After), --latency delays every response, and --fail lists scientific
+names whose searches return 500.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import time
+
+from aiohttp import web
+from PIL import Image
+
+
+class FakePlantNet:
+    def __init__(self, images_per_species: int = 3, latency: float = 0.0, quota: float = 0.0,
+                 fail=(), image_size=(640, 480)):
+        self.images_per_species = images_per_species
+        self.latency = latency
+        self.quota = quota
+        self.fail = set(fail)
+        self.image_size = image_size
+        self.api_calls = 0
+        self.throttled = 0
+        self.image_requests = 0
+        self._window = (0, 0)  # (second, calls in it)
+        self._images = {}
+        self._runner = None
+        self.app = web.Application()
+        self.app.router.add_get("/v2/species/search", self.search)
+        self.app.router.add_get("/images/{key}.jpg", self.image)
+
+    def _over_quota(self) -> bool:
+        if not self.quota:
+            return False
+        second = int(time.monotonic())
+        start, calls = self._window
+        calls = calls + 1 if start == second else 1
+        self._window = (second, calls)
+        return calls > self.quota
+
+    async def search(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        self.api_calls += 1
+        if self._over_quota():
+            self.throttled += 1
+            return web.json_response({"message": "Too many requests"}, status=429, headers={"Retry-After": "1"})
+        name = request.query.get("scientific-name", "")
+        if name in self.fail:
+            return web.json_response({"message": "Internal error"}, status=500)
+        base = f"{request.scheme}://{request.host}"
+        key = hashlib.sha1(name.encode()).hexdigest()[:12]
+        return web.json_response({"results": [{
+            "scientificName": name,
+            "family": "Fakeaceae",
+            "images": [{"url": f"{base}/images/{key}-{i}.jpg"} for i in range(self.images_per_species)],
+        }]})
+
+    async def image(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.latency)
+        self.image_requests += 1
+        key = request.match_info["key"]
+        if key not in self._images:
+            color = tuple(hashlib.sha1(key.encode()).digest()[:3])
+            buffer = io.BytesIO()
+            Image.new("RGB", self.image_size, color).save(buffer, format="JPEG")
+            self._images[key] = buffer.getvalue()
+        return web.Response(body=self._images[key], content_type="image/jpeg")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in the running event loop; returns the API base URL"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/v2"
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--images", type=int, default=3, help="images per species")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--quota", type=float, default=0, help="API calls per second; 0 for unlimited")
+    parser.add_argument("--fail", nargs="*", default=(), help="scientific names whose searches fail")
+    args = parser.parse_args()
+    fake = FakePlantNet(args.images, args.latency, args.quota, args.fail)
+    web.run_app(fake.app, host="127.0.0.1", port=args.port)
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Database initialization script for Garden Planner
-Run this to create all database tables and test the connection
+Run this to create or upgrade all database tables (Alembic migrations)
+and test the connection
 """
 
 import sys
@@ -10,6 +11,7 @@ import os
 # Add the app directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
+from sqlalchemy import text
 from app.database import initialize_database, engine, DATABASE_URL
 
 def main():
@@ -23,7 +25,7 @@ def main():
         
         # Test connection
         with engine.connect() as conn:
-            result = conn.execute("SELECT 1").fetchone()
+            result = conn.execute(text("SELECT 1")).fetchone()
             print("✅ Database connection successful!")
         
         # Initialize database
@@ -31,7 +33,7 @@ def main():
         
         # Import models to ensure they're registered
         print("📋 Importing database models...")
-        from app.models import garden, plant, user, zone, watering, weather
+        from app.models import garden, plant, plant_image, user, zone, watering, weather
         print("✅ All models imported successfully!")
         
         print("\n🎉 Database setup complete!")
@@ -0,0 +1,62 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import Base, DATABASE_URL, engine
+# Import every model so autogenerate sees the full schema
+from app.models import cache_version, feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Ignore PostgreSQL-only spatial indexes when autogenerating against SQLite"""
+    if type_ == "index" and name and name.endswith("_gist"):
+        return context.get_bind().dialect.name == "postgresql"
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout instead of running against a database"""
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against the application's engine"""
+    connectable = config.attributes.get("connection")
+    if connectable is None:
+        with engine.connect() as connection:
+            _run(connection)
+    else:
+        _run(connectable)
+
+
+def _run(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=connection.dialect.name == "sqlite",  # SQLite needs table rebuilds for ALTER
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
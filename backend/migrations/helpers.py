@@ -0,0 +1,106 @@
+"""
+Helpers for migrations that must run against a live production database.
+
+Index builds use CREATE INDEX CONCURRENTLY on PostgreSQL so writes are not
+blocked, and backfills update rows in primary-key ranges with a commit per
+batch so no single transaction holds row locks for the whole table.
+"""
+
+import os
+
+import sqlalchemy as sa
+from alembic import op
+
+BACKFILL_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+
+
+def is_postgresql() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def table_exists(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def column_exists(table: str, column: str) -> bool:
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def index_exists(table: str, name: str) -> bool:
+    return name in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def create_index_online(name: str, table: str, columns, **kwargs) -> None:
+    """Create an index without blocking writes; skips indexes that already exist"""
+    if index_exists(table, name):
+        return
+    if is_postgresql():
+        # CONCURRENTLY cannot run inside a transaction block
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+    else:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def drop_index_online(name: str, table: str) -> None:
+    if not index_exists(table, name):
+        return
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table)
+
+
+def backfill_in_batches(table: str, set_clause: str, where_clause: str = "1=1",
+                        batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Run UPDATE <table> SET <set_clause> over id ranges of batch_size rows,
+    committing after each range. Returns the number of rows updated.
+    """
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f"SELECT MIN(id), MAX(id) FROM {table}")).one()
+    if low is None:
+        return 0
+
+    statement = sa.text(
+        f"UPDATE {table} SET {set_clause} "
+        f"WHERE id >= :start AND id < :stop AND ({where_clause})"
+    )
+    updated = 0
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            result = bind.execute(statement, {"start": start, "stop": start + batch_size})
+            updated += max(result.rowcount, 0)
+    print(f"  backfilled {updated} rows in {table}")
+    return updated
+
+
+def backfill_rows_in_batches(table: str, read_columns, compute, where_clause: str = "1=1",
+                             batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Backfill values that need Python to compute: rows are read in id ranges of
+    batch_size, compute(row) returns the {column: value} to write for each row,
+    and every range is written with one executemany and committed.
+    """
+    bind = op.get_bind()
+    low, high = bind.execute(sa.text(f"SELECT MIN(id), MAX(id) FROM {table}")).one()
+    if low is None:
+        return 0
+
+    select = sa.text(
+        f"SELECT id, {', '.join(read_columns)} FROM {table} "
+        f"WHERE id >= :start AND id < :stop AND ({where_clause})"
+    )
+    updated = 0
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            rows = bind.execute(select, {"start": start, "stop": start + batch_size}).mappings().all()
+            params = [{"_id": row["id"], **compute(row)} for row in rows]
+            if not params:
+                continue
+            assignments = ", ".join(f"{column} = :{column}" for column in params[0] if column != "_id")
+            bind.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE id = :_id"), params)
+            updated += len(params)
+    print(f"  backfilled {updated} rows in {table}")
+    return updated
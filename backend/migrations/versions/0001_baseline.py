@@ -0,0 +1,175 @@
+"""Baseline schema as created by the original create_all scripts
+
+Tables that already exist (databases created with create_all before
+migrations were introduced) are left alone, so this revision adopts them.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import table_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_baseline'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_table(name: str, *columns) -> bool:
+    if table_exists(name):
+        return False
+    op.create_table(name, *columns)
+    return True
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String()),
+        sa.Column('username', sa.String()),
+        sa.Column('hashed_password', sa.String()),
+        sa.Column('full_name', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+    ):
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    _create_table(
+        'gardens',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('boundary', sa.Text()),
+        sa.Column('elevation', sa.Float()),
+        sa.Column('soil_type', sa.String()),
+        sa.Column('climate_zone', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'zones',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id')),
+        sa.Column('name', sa.String()),
+        sa.Column('boundary', sa.Text()),
+        sa.Column('sun_exposure', sa.Float()),
+        sa.Column('soil_ph', sa.Float()),
+        sa.Column('soil_moisture', sa.Float()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'features',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+        sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id')),
+        sa.Column('name', sa.String()),
+        sa.Column('boundary', sa.Text()),
+        sa.Column('color', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'plant_species',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), unique=True),
+        sa.Column('scientific_name', sa.String()),
+        sa.Column('sun_requirement', sa.String()),
+        sa.Column('water_requirement', sa.String()),
+        sa.Column('min_temp', sa.Float()),
+        sa.Column('max_temp', sa.Float()),
+        sa.Column('mature_height', sa.Float()),
+        sa.Column('mature_spread', sa.Float()),
+        sa.Column('spacing', sa.Float()),
+        sa.Column('growing_seasons', sa.JSON()),
+        sa.Column('days_to_harvest', sa.Integer()),
+        sa.Column('harvest_window_days', sa.Integer()),
+        sa.Column('companion_plants', sa.JSON()),
+    )
+
+    _create_table(
+        'plants',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id')),
+        sa.Column('zone_id', sa.Integer(), sa.ForeignKey('zones.id')),
+        sa.Column('species_id', sa.Integer(), sa.ForeignKey('plant_species.id')),
+        sa.Column('location', sa.Text()),
+        sa.Column('planted_date', sa.Date()),
+        sa.Column('current_height', sa.Float()),
+        sa.Column('current_spread', sa.Float()),
+        sa.Column('health_status', sa.String()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'plant_images',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('plant_species_id', sa.Integer(), sa.ForeignKey('plant_species.id')),
+        sa.Column('file_path', sa.String()),
+        sa.Column('content_type', sa.String()),
+        sa.Column('is_primary', sa.Boolean()),
+        sa.Column('source', sa.String()),
+        sa.Column('copyright_info', sa.String()),
+        sa.Column('file_size_bytes', sa.Integer()),
+    )
+
+    _create_table(
+        'watering_schedules',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('zone_id', sa.Integer(), sa.ForeignKey('zones.id')),
+        sa.Column('irrigation_type', sa.String()),
+        sa.Column('base_frequency_days', sa.Integer()),
+        sa.Column('water_amount_ml', sa.Float()),
+        sa.Column('start_time', sa.Time()),
+        sa.Column('duration_minutes', sa.Integer()),
+        sa.Column('rain_sensitivity_mm', sa.Float()),
+        sa.Column('skip_if_rain_forecast', sa.Boolean()),
+        sa.Column('temperature_adjustment', sa.JSON()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'watering_events',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('schedule_id', sa.Integer(), sa.ForeignKey('watering_schedules.id')),
+        sa.Column('planned_date', sa.DateTime()),
+        sa.Column('actual_date', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String()),
+        sa.Column('skip_reason', sa.String(), nullable=True),
+        sa.Column('water_amount_ml', sa.Float()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+    _create_table(
+        'weather_data',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id')),
+        sa.Column('date', sa.Date()),
+        sa.Column('rainfall_mm', sa.Float()),
+        sa.Column('temperature_high_c', sa.Float()),
+        sa.Column('temperature_low_c', sa.Float()),
+        sa.Column('humidity', sa.Float()),
+        sa.Column('wind_speed', sa.Float()),
+        sa.Column('conditions', sa.String()),
+        sa.Column('forecast_date', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        'weather_data', 'watering_events', 'watering_schedules', 'plant_images',
+        'plants', 'plant_species', 'features', 'zones', 'gardens', 'users',
+    ):
+        op.drop_table(table)
@@ -0,0 +1,108 @@
+"""Row versions and native PostGIS geometry columns
+
+Adds the version column used by the geometry cache. On PostgreSQL the
+GeoJSON/WKT text columns are converted to geometry without a table rewrite:
+a staging geometry column is backfilled in batches, indexed concurrently,
+and swapped in under a short lock. SQLite keeps its text columns.
+
+Revision ID: 0002_row_versions_and_postgis_geometry
+Revises: 0001_baseline
+Create Date: 2026-10-19 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.geometry import SRID, PostGISGeometry
+from migrations.helpers import backfill_in_batches, column_exists, create_index_online, is_postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_row_versions_and_postgis_geometry'
+down_revision: Union[str, Sequence[str], None] = '0001_baseline'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('gardens', 'zones', 'features', 'plants')
+
+GEOMETRY_COLUMNS = (
+    ('gardens', 'boundary', 'GEOMETRY'),
+    ('zones', 'boundary', 'GEOMETRY'),
+    ('features', 'boundary', 'GEOMETRY'),
+    ('plants', 'location', 'POINT'),
+)
+
+
+def _is_geometry(table: str, column: str) -> bool:
+    udt_name = op.get_bind().execute(
+        sa.text(
+            "SELECT udt_name FROM information_schema.columns "
+            "WHERE table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    ).scalar()
+    return udt_name == 'geometry'
+
+
+def _parse_text_geometry(column: str) -> str:
+    """SQL expression turning a GeoJSON (geometry or Feature) or WKT string into geometry"""
+    return (
+        f"CASE WHEN {column} LIKE '{{%' "
+        f"THEN ST_SetSRID(ST_GeomFromGeoJSON("
+        f"COALESCE({column}::jsonb -> 'geometry', {column}::jsonb)::text), {SRID}) "
+        f"ELSE ST_GeomFromText({column}, {SRID}) END"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in VERSIONED_TABLES:
+        if not column_exists(table, 'version'):
+            op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+    if not is_postgresql():
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    for table, column, geometry_type in GEOMETRY_COLUMNS:
+        if _is_geometry(table, column):
+            continue
+        staging = f"{column}_geom"
+        if not column_exists(table, staging):
+            op.add_column(table, sa.Column(staging, PostGISGeometry(geometry_type, SRID)))
+
+        # Bulk of the conversion runs in committed batches while the app keeps writing
+        backfill_in_batches(
+            table,
+            f"{staging} = {_parse_text_geometry(column)}",
+            f"{column} IS NOT NULL AND {staging} IS NULL",
+        )
+        create_index_online(f"ix_{table}_{column}_gist", table, [staging], postgresql_using='gist')
+
+        # Catch rows written since the backfill, then swap columns under a short lock
+        op.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        op.execute(
+            f"UPDATE {table} SET {staging} = {_parse_text_geometry(column)} "
+            f"WHERE {column} IS NOT NULL AND {staging} IS NULL"
+        )
+        op.drop_column(table, column)
+        op.alter_column(table, staging, new_column_name=column)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if is_postgresql():
+        for table, column, _ in GEOMETRY_COLUMNS:
+            if _is_geometry(table, column):
+                op.execute(f"DROP INDEX IF EXISTS ix_{table}_{column}_gist")
+                op.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text "
+                    f"USING ST_AsGeoJSON({column})"
+                )
+
+    for table in VERSIONED_TABLES:
+        if column_exists(table, 'version'):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('version')
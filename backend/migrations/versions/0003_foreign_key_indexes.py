@@ -0,0 +1,46 @@
+"""Indexes on foreign keys and hot composite lookups
+
+Built with CREATE INDEX CONCURRENTLY on PostgreSQL so the tables stay
+writable while the indexes are created.
+
+Revision ID: 0003_foreign_key_indexes
+Revises: 0002_row_versions_and_postgis_geometry
+Create Date: 2026-10-19 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from migrations.helpers import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_foreign_key_indexes'
+down_revision: Union[str, Sequence[str], None] = '0002_row_versions_and_postgis_geometry'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_gardens_user_id', 'gardens', ['user_id']),
+    ('ix_features_garden_id', 'features', ['garden_id']),
+    ('ix_features_user_id', 'features', ['user_id']),
+    ('ix_zones_garden_id', 'zones', ['garden_id']),
+    ('ix_plants_garden_id', 'plants', ['garden_id']),
+    ('ix_plants_zone_id', 'plants', ['zone_id']),
+    ('ix_plants_species_id', 'plants', ['species_id']),
+    ('ix_plant_images_plant_species_id', 'plant_images', ['plant_species_id']),
+    ('ix_watering_schedules_zone_id', 'watering_schedules', ['zone_id']),
+    ('ix_watering_events_schedule_id_planned_date', 'watering_events', ['schedule_id', 'planned_date']),
+    ('ix_weather_data_garden_id_date', 'weather_data', ['garden_id', 'date']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        create_index_online(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        drop_index_online(name, table)
@@ -0,0 +1,65 @@
+"""Precomputed feature bounding boxes
+
+Adds min/max lon/lat columns to features so list views can filter by bbox
+with a plain indexed range comparison instead of parsing every boundary.
+PostgreSQL fills them from the geometry column in SQL; SQLite stores GeoJSON
+text, so the bounds are computed in Python one id range at a time.
+
+Revision ID: 0004_feature_bounding_boxes
+Revises: 0003_foreign_key_indexes
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.feature import BBOX_COLUMNS, boundary_bbox
+from migrations.helpers import (
+    backfill_in_batches,
+    backfill_rows_in_batches,
+    column_exists,
+    create_index_online,
+    drop_index_online,
+    is_postgresql,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_feature_bounding_boxes'
+down_revision: Union[str, Sequence[str], None] = '0003_foreign_key_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in BBOX_COLUMNS:
+        if not column_exists('features', column):
+            op.add_column('features', sa.Column(column, sa.Float(), nullable=True))
+
+    if is_postgresql():
+        backfill_in_batches(
+            'features',
+            "min_lon = ST_XMin(boundary), min_lat = ST_YMin(boundary), "
+            "max_lon = ST_XMax(boundary), max_lat = ST_YMax(boundary)",
+            "boundary IS NOT NULL AND min_lon IS NULL",
+        )
+    else:
+        backfill_rows_in_batches(
+            'features',
+            ['boundary'],
+            lambda row: boundary_bbox(row['boundary']),
+            "boundary IS NOT NULL AND min_lon IS NULL",
+        )
+
+    create_index_online('ix_features_garden_id_bbox', 'features', ['garden_id', 'min_lon', 'min_lat'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_online('ix_features_garden_id_bbox', 'features')
+    with op.batch_alter_table('features') as batch_op:
+        for column in reversed(BBOX_COLUMNS):
+            batch_op.drop_column(column)
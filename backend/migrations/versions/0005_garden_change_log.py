@@ -0,0 +1,52 @@
+"""Garden change log for delta sync
+
+Revision ID: 0005_garden_change_log
+Revises: 0004_feature_bounding_boxes
+Create Date: 2026-10-19 09:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import column_exists, table_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_garden_change_log'
+down_revision: Union[str, Sequence[str], None] = '0004_feature_bounding_boxes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not table_exists('garden_changes'):
+        op.create_table(
+            'garden_changes',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id'), nullable=False),
+            sa.Column('entity', sa.String(), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('op', sa.String(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sqlite_autoincrement=True,
+        )
+        op.create_index('ix_garden_changes_garden_id_id', 'garden_changes', ['garden_id', 'id'])
+        op.create_index('ix_garden_changes_garden_id_entity', 'garden_changes',
+                        ['garden_id', 'entity', 'entity_id'])
+
+    # A constant server default is a metadata-only change on PostgreSQL 11+
+    if not column_exists('gardens', 'changes_compacted_seq'):
+        op.add_column('gardens', sa.Column('changes_compacted_seq', sa.Integer(),
+                                           nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('gardens') as batch_op:
+        batch_op.drop_column('changes_compacted_seq')
+    op.drop_index('ix_garden_changes_garden_id_entity', table_name='garden_changes')
+    op.drop_index('ix_garden_changes_garden_id_id', table_name='garden_changes')
+    op.drop_table('garden_changes')
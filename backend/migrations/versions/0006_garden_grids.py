@@ -0,0 +1,45 @@
+"""Persisted garden grids
+
+Revision ID: 0006_garden_grids
+Revises: 0005_garden_change_log
+Create Date: 2026-10-19 09:50:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import table_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_garden_grids'
+down_revision: Union[str, Sequence[str], None] = '0005_garden_change_log'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if table_exists('garden_grids'):
+        return
+    op.create_table(
+        'garden_grids',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id'), nullable=False, unique=True),
+        sa.Column('origin_lon', sa.Float()),
+        sa.Column('origin_lat', sa.Float()),
+        sa.Column('cell_size_feet', sa.Float(), nullable=False),
+        sa.Column('row_order', sa.JSON(), nullable=False),
+        sa.Column('col_order', sa.JSON(), nullable=False),
+        sa.Column('occupancy', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='1'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('garden_grids')
@@ -0,0 +1,99 @@
+"""Array-backed planted cells
+
+Revision ID: 0007_planted_cells
+Revises: 0006_garden_grids
+Create Date: 2026-10-19 10:00:00
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+from migrations.helpers import column_exists, table_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_planted_cells'
+down_revision: Union[str, Sequence[str], None] = '0006_garden_grids'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OCCUPANCY_DTYPE = "<u4"
+
+
+def _to_array(row_order, col_order, occupancy) -> np.ndarray:
+    array = np.zeros((max(row_order, default=-1) + 1, max(col_order, default=-1) + 1), dtype=OCCUPANCY_DTYPE)
+    for row, cols in occupancy.items():
+        for col, species_id in cols.items():
+            array[int(row), int(col)] = species_id or 0
+    return array
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not table_exists('planted_cells'):
+        op.create_table(
+            'planted_cells',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('garden_id', sa.Integer(), sa.ForeignKey('gardens.id'), nullable=False, unique=True),
+            sa.Column('grid_id', sa.Integer(), sa.ForeignKey('garden_grids.id'), nullable=False, unique=True),
+            sa.Column('row_capacity', sa.Integer(), nullable=False),
+            sa.Column('col_capacity', sa.Integer(), nullable=False),
+            sa.Column('species', sa.LargeBinary(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+
+    if not column_exists('garden_grids', 'occupancy'):
+        return
+    # Grids are one row per garden, so this copies them in a single pass
+    connection = op.get_bind()
+    grids = connection.execute(sa.text(
+        "SELECT id, garden_id, row_order, col_order, occupancy FROM garden_grids"
+    )).fetchall()
+    planted = sa.table(
+        'planted_cells',
+        sa.column('garden_id'), sa.column('grid_id'), sa.column('row_capacity'),
+        sa.column('col_capacity'), sa.column('species'), sa.column('version'),
+    )
+    rows = []
+    for grid_id, garden_id, row_order, col_order, occupancy in grids:
+        occupancy = json.loads(occupancy) if isinstance(occupancy, str) else occupancy
+        if not occupancy:
+            continue
+        row_order = json.loads(row_order) if isinstance(row_order, str) else row_order
+        col_order = json.loads(col_order) if isinstance(col_order, str) else col_order
+        array = _to_array(row_order, col_order, occupancy)
+        rows.append({
+            "garden_id": garden_id, "grid_id": grid_id,
+            "row_capacity": array.shape[0], "col_capacity": array.shape[1],
+            "species": zlib.compress(array.tobytes(), 1), "version": 1,
+        })
+    if rows:
+        op.bulk_insert(planted, rows)
+    with op.batch_alter_table('garden_grids') as batch_op:
+        batch_op.drop_column('occupancy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('garden_grids') as batch_op:
+        batch_op.add_column(sa.Column('occupancy', sa.JSON(), nullable=False, server_default='{}'))
+    connection = op.get_bind()
+    planted = connection.execute(sa.text(
+        "SELECT grid_id, row_capacity, col_capacity, species FROM planted_cells"
+    )).fetchall()
+    grids = sa.table('garden_grids', sa.column('id'), sa.column('occupancy', sa.JSON()))
+    for grid_id, row_capacity, col_capacity, species in planted:
+        if not row_capacity or not col_capacity:
+            continue
+        array = np.frombuffer(zlib.decompress(species), dtype=OCCUPANCY_DTYPE).reshape(row_capacity, col_capacity)
+        occupancy = {}
+        for row, col in zip(*np.nonzero(array)):
+            occupancy.setdefault(str(row), {})[str(col)] = int(array[row, col])
+        connection.execute(grids.update().where(grids.c.id == grid_id).values(occupancy=occupancy))
+    op.drop_table('planted_cells')
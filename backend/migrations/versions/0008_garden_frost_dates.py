@@ -0,0 +1,40 @@
+"""Garden frost dates
+
+Stores the average last spring and first fall frost for each garden, as
+returned by the USDA hardiness lookup, for the planting/harvest calendar.
+Only the month and day are used.
+
+Revision ID: 0008_garden_frost_dates
+Revises: 0007_planted_cells
+Create Date: 2026-10-19 11:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import column_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008_garden_frost_dates'
+down_revision: Union[str, Sequence[str], None] = '0007_planted_cells'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('last_frost_date', 'first_frost_date')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in COLUMNS:
+        if not column_exists('gardens', column):
+            op.add_column('gardens', sa.Column(column, sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('gardens') as batch_op:
+        for column in COLUMNS:
+            batch_op.drop_column(column)
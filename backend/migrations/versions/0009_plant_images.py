@@ -0,0 +1,52 @@
+"""Content-addressed plant images
+
+Image rows now reference the image store by SHA-256 digest and record the
+image's pixel size; a species holds each distinct image once. The image
+seeder never managed to write rows before this (it targeted a column that
+did not exist), so there is nothing to backfill.
+
+Revision ID: 0009_plant_images
+Revises: 0008_garden_frost_dates
+Create Date: 2026-10-19 12:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import column_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009_plant_images'
+down_revision: Union[str, Sequence[str], None] = '0008_garden_frost_dates'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    ('content_hash', sa.String(length=64)),
+    ('width', sa.Integer()),
+    ('height', sa.Integer()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if column_exists('plant_images', 'content_hash'):
+        return
+    # Batch mode, as SQLite cannot add a unique constraint in place
+    with op.batch_alter_table('plant_images') as batch_op:
+        for name, type_ in COLUMNS:
+            batch_op.add_column(sa.Column(name, type_, nullable=True))
+        batch_op.create_index('ix_plant_images_content_hash', ['content_hash'])
+        batch_op.create_unique_constraint('uq_plant_images_species_hash', ['plant_species_id', 'content_hash'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('plant_images') as batch_op:
+        batch_op.drop_constraint('uq_plant_images_species_hash', type_='unique')
+        batch_op.drop_index('ix_plant_images_content_hash')
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
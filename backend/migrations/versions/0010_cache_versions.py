@@ -0,0 +1,40 @@
+"""ETag cache-scope versions
+
+One row per cache scope ("garden:<id>", "catalog"), bumped in the transaction
+of every write to the scope, so all worker processes derive the same ETags.
+Missing rows read as version 0.
+
+Revision ID: 0010_cache_versions
+Revises: 0009_plant_images
+Create Date: 2026-10-19 15:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import table_exists
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010_cache_versions'
+down_revision: Union[str, Sequence[str], None] = '0009_plant_images'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if table_exists('cache_versions'):
+        return
+    op.create_table(
+        'cache_versions',
+        sa.Column('scope', sa.String(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('cache_versions')
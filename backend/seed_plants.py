@@ -1,23 +1,56 @@
+import argparse
 import asyncio
 import os
 from dotenv import load_dotenv
-from app.database import SessionLocal
-from app.services.plant_net_service import seed_plant_images
 
-async def main():
-    load_dotenv()
-    
-    # Create database session
-    async with SessionLocal() as session:
-        # Path to our common plants JSON
-        plants_file = os.path.join(
-            os.path.dirname(__file__),
-            'app/data/common_plants.json'
-        )
-        
-        print("Starting to seed plant images...")
-        await seed_plant_images(session, plants_file)
-        print("Finished seeding plant images!")
+# Before app modules read their settings from the environment
+load_dotenv()
+
+# Import every model so relationship() string references resolve
+from app.models import cache_version, feature, garden, garden_change, garden_grid, plant, plant_image, planted_cell, user, zone, watering, weather
+# Registers the session hooks that bump the catalog version, so running servers see new species
+import app.etag  # noqa: F401
+from app.services.image_seeding import (
+    SEED_BATCH_SIZE, SEED_CHECKPOINT_PATH, SEED_CONCURRENCY, ImageSeeder, SeedCheckpoint, load_plant_list,
+)
+from app.services.image_store import thumbnails
+from app.services.plant_net_service import (
+    PLANTNET_BASE_URL, PLANTNET_BURST, PLANTNET_RATE_PER_SECOND, PlantNetService, TokenBucket,
+)
+
+async def main(args):
+    # Path to our common plants JSON
+    plants_file = os.path.join(
+        os.path.dirname(__file__),
+        'app/data/common_plants.json'
+    )
+    checkpoint = SeedCheckpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.reset()
+
+    print("Starting to seed plant images...")
+    limiter = TokenBucket(args.rate, args.burst)
+    async with PlantNetService(os.getenv('PLANTNET_API_KEY'), args.base_url, limiter,
+                               max_connections=args.concurrency * 2) as plant_net:
+        seeder = ImageSeeder(plant_net, concurrency=args.concurrency, batch_size=args.batch_size,
+                             checkpoint=checkpoint, report_every=args.report_every,
+                             on_progress=lambda progress: print(progress))
+        await seeder.run(load_plant_list(args.plants or plants_file))
+    print("Waiting for thumbnails...")
+    thumbnails.drain()
+    thumbnails.shutdown()
+    print("Finished seeding plant images!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Download plant images from PlantNet into the image store")
+    parser.add_argument("--plants", help="plant list JSON (default: app/data/common_plants.json)")
+    parser.add_argument("--base-url", default=PLANTNET_BASE_URL,
+                        help="PlantNet API URL, e.g. a local fake_plantnet.py")
+    parser.add_argument("--concurrency", type=int, default=SEED_CONCURRENCY, help="plants fetched at once")
+    parser.add_argument("--rate", type=float, default=PLANTNET_RATE_PER_SECOND, help="API calls per second")
+    parser.add_argument("--burst", type=int, default=PLANTNET_BURST, help="API calls allowed back to back")
+    parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE, help="plants per database commit")
+    parser.add_argument("--checkpoint", default=SEED_CHECKPOINT_PATH, help="progress file for resuming")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and seed every plant")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    asyncio.run(main(parser.parse_args()))
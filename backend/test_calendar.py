@@ -0,0 +1,105 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.database import SessionLocal
+from app.models.garden import Garden
+from app.models.plant import Plant, PlantSpecies
+from app.models.user import User
+from app.services import calendar_service
+from app.services.calendar_service import IntervalIndex, calendars
+
+
+@pytest.fixture()
+def rows():
+    return [
+        User(id=1, email="calendar@example.com", username="calendar"),
+        Garden(id=1, name="Zone 6", user_id=1, climate_zone="6a"),
+        Garden(id=2, name="Own frost dates", user_id=1, climate_zone="6a",
+               last_frost_date=date(2000, 5, 1), first_frost_date=date(2000, 10, 1)),
+        PlantSpecies(id=1, name="Tomato", min_temp=50, days_to_harvest=70, harvest_window_days=30,
+                     growing_seasons=["summer"]),
+        PlantSpecies(id=2, name="Lettuce", min_temp=20, days_to_harvest=45, harvest_window_days=21,
+                     growing_seasons=["spring", "fall"]),
+        Plant(id=1, garden_id=1, species_id=1, planted_date=date(2026, 5, 15)),
+        Plant(id=2, garden_id=1, species_id=2),
+        Plant(id=3, garden_id=1, species_id=1, planted_date=date(2026, 8, 20)),
+        Plant(id=4, garden_id=1, species_id=1, planted_date=date(2026, 6, 1)),
+        Plant(id=5, garden_id=2, species_id=2),
+    ]
+
+
+def _calendar(client, garden_id=1, **params):
+    response = client.get(f"/api/gardens/{garden_id}/calendar", params={"year": 2026, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_garden_calendar_intervals(client):
+    calendar = _calendar(client)
+    assert calendar["frost"] == {"last_frost": "2026-04-20", "first_frost": "2026-10-20", "source": "climate_zone"}
+    plants = {p["plant_id"]: p for p in calendar["plants"]}
+    assert plants[1]["planting"] == ["2026-05-15", "2026-05-15"]
+    assert plants[1]["harvest"] == ["2026-07-24", "2026-08-23"]
+    # Unsown lettuce is scheduled around the last frost
+    assert plants[2]["scheduled"] and plants[2]["planting"] == ["2026-03-23", "2026-05-04"]
+    assert plants[2]["harvest"] == ["2026-05-07", "2026-07-09"]
+    # Planted too late: frost kills the tomato before it ripens
+    assert plants[3]["harvest"] is None and plants[3]["frost_cut"]
+
+    assert calendar["harvest_overlaps"] == [
+        {"start": "2026-08-10", "end": "2026-08-23", "plants": 2, "species_ids": [1]}
+    ]
+    week = next(w for w in calendar["weeks"] if w["week_start"] == "2026-08-10")
+    assert week == {"week_start": "2026-08-10", "planting": 0, "harvesting": 2}
+
+    june = _calendar(client, start="2026-06-01", end="2026-06-07")
+    assert sorted(p["plant_id"] for p in june["plants"]) == [2, 4]
+    assert _calendar(client, 2)["frost"]["source"] == "garden"
+    assert client.get("/api/gardens/9/calendar").status_code == 404
+
+
+def test_new_plants_update_the_calendar_incrementally(client):
+    _calendar(client)
+    loads = calendar_service.calendar_builds.value(reason="load")
+    changes = calendar_service.calendar_builds.value(reason="change")
+
+    db = SessionLocal()
+    db.add(Plant(id=6, garden_id=1, species_id=2, planted_date=date(2026, 8, 15)))
+    db.delete(db.get(Plant, 3))
+    db.commit()
+    db.close()
+
+    plants = {p["plant_id"]: p for p in _calendar(client)["plants"]}
+    assert sorted(plants) == [1, 2, 4, 6]
+    assert plants[6]["harvest"] == ["2026-09-29", "2026-10-20"]
+    assert calendar_service.calendar_builds.value(reason="load") == loads
+    assert calendar_service.calendar_builds.value(reason="change") == changes + 1
+
+
+def test_batch_build_matches_per_garden_build(client):
+    expected = [_calendar(client, garden_id) for garden_id in (1, 2)]
+    calendars.clear()
+    db = SessionLocal()
+    assert calendars.build_all(db, 2026) == 2
+    db.close()
+    loads = calendar_service.calendar_builds.value(reason="load")
+    assert [_calendar(client, garden_id) for garden_id in (1, 2)] == expected
+    assert calendar_service.calendar_builds.value(reason="load") == loads
+
+
+def test_interval_index_matches_brute_force():
+    rng = np.random.default_rng(3)
+    starts = rng.integers(0, 365, 500).astype(float)
+    ends = starts + rng.integers(0, 60, 500)
+    index = IntervalIndex(starts, ends)
+    for low, high in [(0, 0), (100, 130), (300, 400), (-5, -1)]:
+        expected = np.flatnonzero((starts <= high) & (ends >= low))
+        assert sorted(index.overlapping(low, high).tolist()) == expected.tolist()
+    lows = np.arange(0, 400, 7.0)
+    expected = [np.count_nonzero((starts <= low + 6) & (ends >= low)) for low in lows]
+    assert index.count_overlapping(lows, lows + 6).tolist() == expected
+    for begin, end in index.busy_periods(40):
+        assert all(np.count_nonzero((starts <= d) & (ends >= d)) >= 40 for d in range(begin, end + 1))
+        assert np.count_nonzero((starts <= end + 1) & (ends >= end + 1)) < 40
@@ -0,0 +1,117 @@
+import pytest
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.models.plant import PlantSpecies
+from app.services import plant_catalog
+from app.services.companion_graph import CompanionGraph, parse_companions
+from app.services.plant_catalog import CatalogEntry, PlantCatalog
+
+
+@pytest.fixture()
+def rows():
+    return [
+        PlantSpecies(id=1, name="Tomato", scientific_name="Solanum lycopersicum", sun_requirement="Full sun",
+                     water_requirement="medium", min_temp=10, max_temp=35),
+        PlantSpecies(id=2, name="Sweet Basil", scientific_name="Ocimum basilicum", sun_requirement="full",
+                     water_requirement="medium", min_temp=12, max_temp=32),
+        PlantSpecies(id=3, name="Hosta", scientific_name="Hosta plantaginea", sun_requirement="shade",
+                     water_requirement="high", min_temp=-30, max_temp=30),
+    ]
+
+
+def _names(response):
+    assert response.status_code == 200
+    return [plant["name"] for plant in response.json()]
+
+
+def test_catalog_merges_table_and_reference_data(client):
+    response = client.get("/api/plants", params={"limit": 500})
+    plants = {plant["name"]: plant for plant in response.json()}
+    # Table rows pick up categories from the reference list; reference-only plants have no id
+    assert plants["Tomato"]["id"] == 1 and plants["Tomato"]["type"] == "vegetable"
+    assert "fruit" in plants["Tomato"]["categories"]
+    assert plants["Rosemary"]["id"] is None
+    assert int(response.headers["X-Total-Count"]) == len(plants)
+    assert client.get("/api/plants/3").json()["scientific_name"] == "Hosta plantaginea"
+    assert client.get("/api/plants/99").status_code == 404
+    assert client.get("/api/plants/categories").json()["herb"] >= 1
+
+
+def test_search_ranks_and_filters(client):
+    assert _names(client.get("/api/plants", params={"q": "tomato"}))[0] == "Tomato"
+    assert _names(client.get("/api/plants", params={"q": "bas"}))[0] == "Sweet Basil"
+    assert _names(client.get("/api/plants", params={"q": "ocimum"}))[0] == "Sweet Basil"
+    # Misspelt names still match through trigrams
+    assert "Tomato" in _names(client.get("/api/plants", params={"q": "tomatto"}))
+
+    assert _names(client.get("/api/plants", params={"sun": "shade"})) == ["Hosta"]
+    assert _names(client.get("/api/plants", params={"min_temp": 0})) == ["Hosta"]
+    assert _names(client.get("/api/plants", params={"water": "medium", "max_temp": 33})) == ["Tomato"]
+    assert client.get("/api/plants", params={"min_temp": 5, "max_temp": 0}).status_code == 400
+
+
+def test_catalog_reloads_after_table_changes(client, seed):
+    assert _names(client.get("/api/plants", params={"q": "kale"})) == []
+    first = client.get("/api/plants", params={"q": "kale"})
+    builds = plant_catalog.catalog_builds.value(reason="changed")
+
+    seed(PlantSpecies(id=4, name="Kale", scientific_name="Brassica oleracea"))
+
+    response = client.get("/api/plants", params={"q": "kale"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert _names(response) == ["Kale"]
+    assert plant_catalog.catalog_builds.value(reason="changed") == builds + 1
+
+
+def test_prefix_and_fuzzy_search_without_database():
+    def entry(i, name, scientific):
+        return CatalogEntry(i, name, scientific, None, (), None, None, None, None, None, None, None, None, ())
+
+    catalog = PlantCatalog([entry(1, "Carrot", "Daucus carota"), entry(2, "Cardoon", "Cynara cardunculus"),
+                            entry(3, "Wild carrot", "Daucus carota subsp. carota")])
+    total, page = catalog.search("carrot")
+    assert total == 2 and [r["id"] for _, r in page] == [1, 3]
+    total, page = catalog.search("car")
+    # Name prefixes outrank word prefixes; the closer name wins among equals
+    assert [r["id"] for _, r in page] == [1, 2, 3]
+    assert catalog.search("car") is catalog.search("car")
+
+
+def test_companion_graph_endpoints(client):
+    db = SessionLocal()
+    db.get(PlantSpecies, 1).companion_plants = [2, -3]
+    db.add_all([
+        PlantSpecies(id=4, name="Marigold", companion_plants=[1, 2]),
+        PlantSpecies(id=5, name="Fennel", companion_plants=[-1, -2, 4]),
+    ])
+    db.commit()
+    db.close()
+
+    companions = client.get("/api/plants/1/companions").json()
+    assert [p["id"] for p in companions["companions"]] == [2, 4]
+    assert [p["id"] for p in companions["antagonists"]] == [3, 5]
+    # Listed by Marigold only, still symmetric
+    assert [p["id"] for p in client.get("/api/plants/2/companions").json()["companions"]] == [1, 4]
+
+    assert [p["id"] for p in client.get("/api/plants/compatible", params={"ids": [1, 2]}).json()] == [4]
+    conflicts = client.get("/api/plants/conflicts", params={"ids": [1, 2, 3, 4, 5]}).json()
+    assert conflicts["conflicts"] == [[1, 3], [1, 5], [2, 5]]
+    assert conflicts["companion_pairs"] == [[1, 2], [1, 4], [2, 4], [4, 5]]
+    assert client.get("/api/plants/conflicts", params={"ids": [1, 99]}).status_code == 400
+
+
+def test_antagonism_overrides_companion_listing():
+    graph = CompanionGraph({1: ((2, 3), ()), 2: ((), (1,)), 3: ((1,), ()), 4: ((), ())})
+    assert graph.neighbours(1) == [3]
+    assert graph.related(2, 1, "antagonist") and not graph.related(1, 2)
+    assert graph.compatible_with_all([1, 3]) == []
+    assert graph.compatible_with_all([3]) == [1]
+    assert parse_companions([2, "3", -4, None, "x", 4]) == ((2, 3), (4,))
+
+
+def test_catalog_reloads_after_writes_outside_the_app(client, engine):
+    assert _names(client.get("/api/plants", params={"q": "kale"})) == []
+    # A script or SQL session that never bumps the catalog version
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO plant_species (id, name) VALUES (4, 'Kale')"))
+    assert _names(client.get("/api/plants", params={"q": "kale"})) == ["Kale"]
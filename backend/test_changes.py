@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.garden import Garden
+from app.models.garden_change import GardenChange
+from app.models.zone import Zone
+from app.services.change_log_service import compact_garden
+
+SQUARE = "POLYGON((0 0,0 1,1 1,1 0,0 0))"
+
+
+def _feature(name, garden_id=1):
+    return {"name": name, "boundary": SQUARE, "color": "#3a7d44", "garden_id": garden_id, "user_id": 1}
+
+
+@pytest.fixture()
+def rows(rows):
+    return rows + [Garden(id=2, name="Two", user_id=1)]
+
+
+def _changes(client, since=0, garden_id=1):
+    response = client.get(f"/api/gardens/{garden_id}/changes?since={since}")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_changes_are_collapsed_per_entity(client):
+    start = _changes(client)["next"]
+    kept = client.post("/api/features/", json=_feature("Bed")).json()["id"]
+    gone = client.post("/api/features/", json=_feature("Path")).json()["id"]
+    client.put(f"/api/features/{kept}", json=_feature("Raised bed"))
+    client.delete(f"/api/features/{gone}")
+
+    feed = _changes(client, start)
+    assert [(c["id"], c["op"]) for c in feed["changes"]] == [(kept, "upsert"), (gone, "delete")]
+    assert feed["changes"][0]["data"]["name"] == "Raised bed"
+    assert _changes(client, feed["next"])["changes"] == []
+
+
+def test_orm_and_bulk_writes_are_logged(client, seed):
+    seed(Zone(garden_id=1, name="Shade"))
+    created = client.post("/api/features/bulk", json=[_feature("A"), _feature("B")]).json()
+    moved = created["results"][0]["id"]
+    client.put("/api/features/bulk", json=[{**_feature("A", garden_id=2), "id": moved}])
+
+    one = {(c["entity"], c["op"]) for c in _changes(client)["changes"]}
+    assert one == {("zone", "upsert"), ("feature", "upsert"), ("feature", "delete")}
+    two = _changes(client, garden_id=2)["changes"]
+    assert [(c["id"], c["op"]) for c in two] == [(moved, "upsert")]
+
+
+def test_compaction_is_lossless_until_tombstones_expire(client, engine):
+    ids = [client.post("/api/features/", json=_feature(f"Bed {i}")).json()["id"] for i in range(3)]
+    for feature_id in ids:
+        client.put(f"/api/features/{feature_id}", json=_feature("Renamed"))
+    client.delete(f"/api/features/{ids[0]}")
+    before = _changes(client)["changes"]
+
+    with engine.begin() as connection:
+        compact_garden(connection, 1)
+    db = SessionLocal()
+    assert db.query(GardenChange).filter(GardenChange.garden_id == 1).count() == 3
+    db.close()
+    assert _changes(client)["changes"] == before
+
+    with engine.begin() as connection:
+        compact_garden(connection, 1, now=datetime.utcnow() + timedelta(days=365))
+    assert _changes(client)["reset"] is True
+    resumed = _changes(client, _changes(client)["next"])
+    assert resumed["reset"] is False and resumed["changes"] == []
+
+
+def test_unknown_garden(client):
+    assert client.get("/api/gardens/999/changes").status_code == 404
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.models.feature import Feature
+from app.models.plant import Plant, PlantSpecies
+from app.models.zone import Zone
+
+# About 0.9 m of longitude and 1.1 m of latitude at 37N
+DLON, DLAT = 0.00001, 0.00001
+LON, LAT = -122.0, 37.0
+
+
+def square(x, y, w, h=None):
+    x0, y0, x1, y1 = LON + x * DLON, LAT + y * DLAT, LON + (x + w) * DLON, LAT + (y + (h or w)) * DLAT
+    return f"POLYGON(({x0} {y0},{x1} {y0},{x1} {y1},{x0} {y1},{x0} {y0}))"
+
+
+def point(x, y):
+    return f"POINT({LON + x * DLON} {LAT + y * DLAT})"
+
+
+@pytest.fixture()
+def rows(rows):
+    return rows + [
+        PlantSpecies(id=1, name="Squash", spacing=90),
+        PlantSpecies(id=2, name="Radish", spacing=5),
+    ]
+
+
+def test_conflicts_are_found_in_one_pass(client, seed):
+    seed(
+        Zone(id=1, garden_id=1, name="North", boundary=square(0, 0, 10)),
+        Zone(id=2, garden_id=1, name="Overlaps north", boundary=square(8, 0, 10)),
+        Zone(id=3, garden_id=1, name="Touches north", boundary=square(0, 10, 10)),
+        Feature(id=1, garden_id=1, name="Bed", color="#3a7d44", boundary=square(1, 1, 3)),
+        Feature(id=2, garden_id=1, name="Path", color="#999999", boundary=square(3, 1, 1, 20)),
+        Plant(id=1, garden_id=1, species_id=1, location=point(1, 1)),
+        Plant(id=2, garden_id=1, species_id=1, location=point(1.5, 1)),  # ~0.45 m from plant 1
+        Plant(id=3, garden_id=1, species_id=2, location=point(5, 5)),
+        Plant(id=4, garden_id=1, species_id=2, location=point(5.5, 5)),  # ~0.45 m, radishes need 5 cm
+    )
+
+    report = client.get("/api/gardens/1/conflicts").json()
+    assert report["checked"] == {"plants": 4, "zones": 3, "features": 2}
+    assert report["counts"] == {"plant_spacing": 1, "zone_overlap": 1,
+                                "feature_overlap": 1, "feature_zone_intrusion": 2}
+    by_type = {c["type"]: c for c in report["conflicts"]}
+    assert by_type["plant_spacing"]["ids"] == [1, 2]
+    assert by_type["plant_spacing"]["required_m"] == 0.9
+    assert by_type["plant_spacing"]["distance_m"] == pytest.approx(0.445, abs=0.01)
+    assert by_type["zone_overlap"]["ids"] == [1, 2]
+    assert by_type["feature_overlap"]["ids"] == [1, 2]
+    # The path runs out of the north zone, across the touching one and beyond
+    intrusions = [c for c in report["conflicts"] if c["type"] == "feature_zone_intrusion"]
+    assert sorted((c["feature_id"], c["zone_id"]) for c in intrusions) == [(2, 1), (2, 3)]
+    assert client.get("/api/gardens/9/conflicts").status_code == 404
+
+
+def test_thousands_of_plants_well_under_a_second(client, seed):
+    rng = np.random.default_rng(3)
+    seed(*(
+        Plant(garden_id=1, species_id=int(species), location=point(x, y))
+        for (x, y), species in zip(rng.random((5000, 2)) * 300, rng.integers(1, 3, 5000))
+    ))
+    client.get("/api/gardens/1/conflicts?limit=1")  # Builds the index
+
+    started = time.perf_counter()
+    report = client.get("/api/gardens/1/conflicts?limit=1").json()
+    assert time.perf_counter() - started < 0.5
+    assert report["checked"]["plants"] == 5000
+    assert report["truncated"] and report["counts"]["plant_spacing"] > 0
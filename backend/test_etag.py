@@ -0,0 +1,62 @@
+import pytest
+
+from app.etag import resource_versions
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.user import User
+from app.query_budget import assert_max_queries
+
+SQUARE = "POLYGON((0 0,0 1,1 1,1 0,0 0))"
+
+
+@pytest.fixture()
+def rows():
+    return [
+        User(id=1, email="etag@example.com", username="etag"),
+        Garden(id=1, name="One", user_id=1, boundary=SQUARE),
+        Garden(id=2, name="Two", user_id=1, boundary=SQUARE),
+        Feature(id=1, garden_id=1, user_id=1, name="Bed", color="#3a7d44", boundary=SQUARE),
+    ]
+
+
+def test_not_modified_after_one_version_lookup(client):
+    first = client.get("/api/features/?garden_id=1")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    with assert_max_queries(1):
+        second = client.get("/api/features/?garden_id=1", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+
+
+def test_query_string_is_part_of_the_etag(client):
+    full = client.get("/api/features/?garden_id=1").headers["ETag"]
+    projected = client.get("/api/features/?garden_id=1&fields=name").headers["ETag"]
+    assert full != projected
+
+
+def test_writes_change_only_their_garden(client):
+    one = client.get("/api/features/?garden_id=1").headers["ETag"]
+    two = client.get("/api/features/?garden_id=2").headers["ETag"]
+
+    client.put("/api/features/1", json={"name": "Renamed", "boundary": SQUARE, "color": "#fff",
+                                        "garden_id": 1, "user_id": 1})
+    assert client.get("/api/features/?garden_id=1", headers={"If-None-Match": one}).status_code == 200
+    assert client.get("/api/features/?garden_id=2", headers={"If-None-Match": two}).status_code == 304
+
+
+def test_bulk_writes_change_the_etag(client):
+    etag = client.get("/api/features/?garden_id=2").headers["ETag"]
+    client.post("/api/features/bulk?garden_id=2&user_id=1",
+                json=[{"name": "New", "boundary": SQUARE, "color": "#fff"}])
+    assert client.get("/api/features/?garden_id=2", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_versions_are_shared_between_workers(client, engine):
+    etag = client.get("/api/features/?garden_id=1").headers["ETag"]
+    # A write through another worker process only reaches this one via the database
+    with engine.begin() as connection:
+        resource_versions.bump(connection, [("garden", 1)])
+    assert client.get("/api/features/?garden_id=1", headers={"If-None-Match": etag}).status_code == 200
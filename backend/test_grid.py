@@ -0,0 +1,128 @@
+from sqlalchemy import text
+
+from app.services.grid_service import cell_id
+from app.services.planted_cell_service import PlantedCellService
+
+
+def _cells(client):
+    state = client.get("/api/gardens/1/grid/state?cells=true").json()
+    return {(c["row"], c["col"]): c for c in state["cells"]}
+
+
+def test_insert_row_returns_only_new_cells_and_keeps_ids(client):
+    client.put("/api/gardens/1/grid/state", json={"rows": 200, "cols": 200})
+    before = _cells(client)
+    planted = before[(150, 7)]["id"]
+    client.put(f"/api/gardens/1/grid/cells/{planted}", json={"species_id": 42})
+
+    diff = client.post("/api/gardens/1/grid/rows", json={"index": 100}).json()
+    assert (diff["rows"], diff["cols"]) == (201, 200)
+    assert len(diff["added"]) == 200 and diff["removed"] == []
+    assert {c["row"] for c in diff["added"]} == {100}
+
+    after = _cells(client)
+    assert after[(99, 5)]["id"] == before[(99, 5)]["id"]
+    assert after[(151, 7)]["id"] == planted and after[(151, 7)]["species_id"] == 42
+
+
+def test_delete_column_clears_its_plantings(client):
+    client.put("/api/gardens/1/grid/state", json={"rows": 3, "cols": 3})
+    client.put(f"/api/gardens/1/grid/cells/{cell_id(1, 1)}", json={"species_id": 7})
+    client.put(f"/api/gardens/1/grid/cells/{cell_id(2, 2)}", json={"species_id": 8})
+
+    diff = client.delete("/api/gardens/1/grid/cols/1").json()
+    assert diff["removed"] == [cell_id(0, 1), cell_id(1, 1), cell_id(2, 1)]
+    assert diff["cleared"] == [{"id": cell_id(1, 1), "species_id": 7}]
+    assert _cells(client)[(2, 1)] == {"id": cell_id(2, 2), "row": 2, "col": 1, "species_id": 8}
+
+    # The freed column slot is reused by the next insert
+    added = client.post("/api/gardens/1/grid/cols", json={}).json()["added"]
+    assert [c["id"] for c in added] == [cell_id(0, 1), cell_id(1, 1), cell_id(2, 1)]
+    assert _cells(client)[(1, 2)]["species_id"] is None
+
+
+def test_resize_and_version_checks(client):
+    created = client.put("/api/gardens/1/grid/resize", json={"rows": 2, "cols": 2}).json()
+    diff = client.put("/api/gardens/1/grid/resize", json={"rows": 3, "cols": 1}).json()
+    assert len(diff["added"]) == 1 and len(diff["removed"]) == 2
+    assert diff["version"] > created["version"]
+    assert "new_dimensions" not in diff and (diff["rows"], diff["cols"]) == (3, 1)
+    stale = client.put(f"/api/gardens/1/grid/resize?version={created['version']}", json={"rows": 4, "cols": 4})
+    assert stale.status_code == 409
+    assert client.put("/api/gardens/2/grid/resize?version=1", json={"rows": 1, "cols": 1}).status_code == 404
+
+    stale = client.post(f"/api/gardens/1/grid/rows?version={created['version']}", json={})
+    assert stale.status_code == 409
+    assert client.delete("/api/gardens/1/grid/cols/0").status_code == 400  # last column
+
+
+def test_planted_cells_bulk_write_fill_and_counts(client):
+    client.put("/api/gardens/1/grid/state", json={"rows": 4, "cols": 5})
+    assert client.get("/api/gardens/1/grid/planted").json()["runs"] == [[0, 20]]
+
+    fill = client.post("/api/gardens/1/grid/planted/fill", json={"region": [1, 1, 2, 3], "species_id": 9})
+    assert fill.json()["changed"] == 6
+    client.put("/api/gardens/1/grid/planted",
+               json={"cells": [{"id": cell_id(0, 0), "species_id": 4}, {"id": cell_id(2, 3), "species_id": 4}]})
+
+    matrix = client.get("/api/gardens/1/grid/planted?format=matrix&region=0,0,2,3").json()["species"]
+    assert matrix == [[4, 0, 0, 0], [0, 9, 9, 9], [0, 9, 9, 4]]
+    counts = client.get("/api/gardens/1/grid/planted/counts").json()
+    assert counts["total"] == 7
+    assert counts["species"] == [{"species_id": 4, "cells": 2}, {"species_id": 9, "cells": 5}]
+
+    # Runs replace a region; plantings follow their cells when rows are inserted
+    client.put("/api/gardens/1/grid/planted", json={"runs": [[3, 2], [0, 3]], "region": [3, 0, 3, 4]})
+    client.post("/api/gardens/1/grid/rows", json={"index": 0})
+    assert client.get("/api/gardens/1/grid/planted?region=4,0,4,4").json()["runs"] == [[3, 2], [0, 3]]
+
+    cleared = client.post("/api/gardens/1/grid/planted/clear", json={"region": [0, 0, 4, 4]}).json()
+    assert cleared["changed"] == 9
+    assert client.get("/api/gardens/1/grid/planted/counts").json()["total"] == 0
+
+
+def test_planted_cells_rejects_bad_input(client):
+    client.put("/api/gardens/1/grid/state", json={"rows": 2, "cols": 2})
+    assert client.put("/api/gardens/1/grid/planted", json={"runs": [[1, 3]]}).status_code == 400
+    assert client.put("/api/gardens/1/grid/planted",
+                      json={"cells": [{"id": cell_id(5, 0), "species_id": 1}]}).status_code == 400
+    assert client.post("/api/gardens/1/grid/planted/fill",
+                       json={"region": [0, 0, 2, 0], "species_id": 1}).status_code == 400
+    # Species IDs outside the uint32 occupancy array are rejected, not wrapped
+    for species_id in (-5, 2**32):
+        assert client.put("/api/gardens/1/grid/planted",
+                          json={"cells": [{"id": cell_id(0, 0), "species_id": species_id}]}).status_code == 400
+        assert client.post("/api/gardens/1/grid/planted/fill",
+                           json={"region": [0, 0, 1, 1], "species_id": species_id}).status_code == 400
+        assert client.put("/api/gardens/1/grid/planted", json={"runs": [[species_id, 4]]}).status_code == 400
+    assert client.get("/api/gardens/1/grid/planted").json()["runs"] == [[0, 4]]
+    assert client.get("/api/gardens/2/grid/planted").status_code == 404
+
+
+def test_cell_route_status_codes(client):
+    client.put("/api/gardens/1/grid/state", json={"rows": 2, "cols": 2})
+    assert client.put(f"/api/gardens/1/grid/cells/{cell_id(5, 0)}", json={"species_id": 1}).status_code == 404
+    assert client.put(f"/api/gardens/1/grid/cells/{cell_id(0, 0)}", json={"species_id": -1}).status_code == 400
+
+
+def test_concurrent_planting_write_is_a_conflict(client, engine, monkeypatch):
+    client.put("/api/gardens/1/grid/state", json={"rows": 2, "cols": 2})
+    for cell in (cell_id(0, 0), cell_id(1, 1)):
+        client.put(f"/api/gardens/1/grid/cells/{cell}", json={"species_id": 1})
+    load = PlantedCellService._load
+
+    def load_then_race(self, grid, create=True):
+        # Another request writes the plantings between this one's read and write
+        loaded = load(self, grid, create)
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE planted_cells SET version = version + 1"))
+        return loaded
+
+    monkeypatch.setattr(PlantedCellService, "_load", load_then_race)
+    assert client.put(f"/api/gardens/1/grid/cells/{cell_id(0, 1)}", json={"species_id": 2}).status_code == 409
+    assert client.delete("/api/gardens/1/grid/rows/0").status_code == 409
+    assert client.put("/api/gardens/1/grid/resize", json={"rows": 1, "cols": 1}).status_code == 409
+    monkeypatch.undo()
+    state = client.get("/api/gardens/1/grid/state").json()
+    assert (state["rows"], state["cols"]) == (2, 2)
+    assert client.get("/api/gardens/1/grid/planted").json()["runs"] == [[1, 1], [0, 2], [1, 1]]
@@ -0,0 +1,129 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.database import SessionLocal
+from app.models.plant import PlantSpecies
+from app.models.plant_image import PlantImage
+from app.services import image_store as image_service
+from app.services.image_store import ImageStore, ThumbnailPipeline, add_plant_image
+
+
+def _jpeg(width=800, height=600, color=(40, 160, 60)) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    # The module-level store was built from IMAGE_STORE_DIR on import, so swap in one under tmp_path
+    store = ImageStore(tmp_path / "image_store")
+    pipeline = ThumbnailPipeline(store, workers=1)
+    monkeypatch.setattr(image_service, "image_store", store)
+    monkeypatch.setattr(image_service, "thumbnails", pipeline)
+    yield store
+    pipeline.shutdown()
+
+
+@pytest.fixture()
+def rows():
+    return [PlantSpecies(id=1, name="Tomato"), PlantSpecies(id=2, name="Basil")]
+
+
+def test_store_deduplicates_into_sharded_paths(tmp_path):
+    store = ImageStore(tmp_path)
+    data = _jpeg()
+    digest, written = store.put(data)
+    assert written
+    assert store.path(digest) == tmp_path / digest[:2] / digest[2:4] / digest
+    assert store.path(digest).read_bytes() == data
+    assert store.put(data) == (digest, False)
+    assert sum(1 for path in tmp_path.rglob("*") if path.is_file()) == 1
+
+
+def test_serve_original_with_immutable_caching(client):
+    data = _jpeg()
+    db = SessionLocal()
+    first = add_plant_image(db, 1, data, is_primary=True)
+    db.commit()
+    # The same content again, for the same species and for another one
+    assert add_plant_image(db, 1, data).id == first.id
+    add_plant_image(db, 2, data)
+    db.commit()
+    digest = first.content_hash
+    assert (first.width, first.height, first.content_type) == (800, 600, "image/jpeg")
+    db.close()
+
+    response = client.get(f"/api/images/{digest}")
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert response.headers["etag"] == f'"{digest}"'
+
+    response = client.get(f"/api/images/{digest}", headers={"If-None-Match": f'"{digest}"'})
+    assert response.status_code == 304
+
+    assert client.get(f"/api/images/{'0' * 64}").status_code == 404
+    assert client.get("/api/images/..%2F..%2Fetc").status_code == 404
+
+    listing = client.get("/api/plants/1/images").json()
+    assert [image["content_hash"] for image in listing] == [digest]
+    assert listing[0]["thumbnails"]["128"] == f"/api/images/{digest}?size=128"
+
+
+def test_thumbnails_in_fixed_sizes_and_negotiated_format(client):
+    db = SessionLocal()
+    digest = add_plant_image(db, 1, _jpeg()).content_hash
+    db.commit()
+    db.close()
+    thumbnails = image_service.thumbnails
+    thumbnails.drain()
+    assert thumbnails.missing(digest) == []
+
+    response = client.get(f"/api/images/{digest}", params={"size": 256}, headers={"Accept": "image/webp,*/*"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "Accept" in response.headers["vary"]
+    assert Image.open(io.BytesIO(response.content)).size == (256, 192)
+
+    response = client.get(f"/api/images/{digest}", params={"size": 128, "format": "jpeg"})
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "Accept" not in response.headers.get("vary", "")
+    assert Image.open(io.BytesIO(response.content)).size == (128, 96)
+
+    assert client.get(f"/api/images/{digest}", params={"size": 100}).status_code == 400
+    assert client.get(f"/api/images/{digest}", params={"size": 128, "format": "gif"}).status_code == 400
+
+
+def test_missing_thumbnails_render_on_request(client, store, seed):
+    digest, _ = store.put(_jpeg(300, 300, (200, 30, 30)))
+    thumbnails = image_service.thumbnails
+    assert len(thumbnails.missing(digest)) == len(thumbnails.sizes) * 2
+    # Stored but not attached to any plant: no thumbnails either
+    assert client.get(f"/api/images/{digest}", params={"size": 512, "format": "jpeg"}).status_code == 404
+    assert thumbnails.missing(digest)
+
+    seed(PlantImage(plant_species_id=1, content_hash=digest, file_path=ImageStore.relative_path(digest),
+                    content_type="image/jpeg"))
+    response = client.get(f"/api/images/{digest}", params={"size": 512, "format": "jpeg"})
+    assert response.status_code == 200
+    # Never upscaled
+    assert Image.open(io.BytesIO(response.content)).size == (300, 300)
+
+
+def test_thumbnail_not_ready_in_time_is_503(client, store, seed, monkeypatch):
+    digest, _ = store.put(_jpeg(300, 300, (30, 30, 200)))
+    seed(PlantImage(plant_species_id=1, content_hash=digest, file_path=ImageStore.relative_path(digest),
+                    content_type="image/jpeg"))
+    thumbnails = image_service.thumbnails
+    monkeypatch.setattr(thumbnails, "wait_seconds", 0)
+    response = client.get(f"/api/images/{digest}", params={"size": 256, "format": "webp"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert "immutable" not in response.headers.get("Cache-Control", "")
+    # Rendering carries on, and the next request gets the thumbnail
+    thumbnails.drain()
+    assert client.get(f"/api/images/{digest}", params={"size": 256, "format": "webp"}).status_code == 200
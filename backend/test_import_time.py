@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.lazy_imports import HEAVY_MODULES, LazyModule, lazy_module, preload
+
+# Modules that importing the app must not load; spatial, image and email
+# code import them on first use
+DEFERRED = ("aiohttp", "PIL", "pyproj", "pysolar", "requests", "rasterio", "geopandas", "mercantile")
+
+# Generous, since it is wall time on a shared machine; the module check above
+# is what catches a heavy import creeping back in
+IMPORT_TIME_BUDGET_SECONDS = float(os.getenv("IMPORT_TIME_BUDGET_SECONDS", "3"))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted(sys.modules)}))
+"""
+
+
+def cold_import():
+    backend = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, IMPORT_WARMUP="false")
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=backend, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_defers_heavy_modules():
+    modules = cold_import()["modules"]
+    loaded = [name for name in DEFERRED if any(m == name or m.startswith(name + ".") for m in modules)]
+    assert loaded == []
+
+
+def test_app_import_within_budget():
+    # Best of three, so one slow run on a busy machine does not fail the build
+    seconds = min(cold_import()["seconds"] for _ in range(3))
+    assert seconds < IMPORT_TIME_BUDGET_SECONDS, f"importing app.main took {seconds:.2f}s"
+
+
+def test_lazy_module_loads_on_first_attribute():
+    module = LazyModule("json.decoder")
+    assert "not loaded" in repr(module)
+    assert module.JSONDecodeError is sys.modules["json.decoder"].JSONDecodeError
+    assert "(loaded)" in repr(module)
+    # Already imported modules are returned as they are
+    assert lazy_module("json") is sys.modules["json"]
+
+
+def test_preload_imports_registered_modules():
+    import app.main  # noqa: F401 registers the app's lazy modules
+
+    assert {"aiohttp", "PIL.Image", "pyproj", "pysolar.solar", "requests"} <= set(HEAVY_MODULES)
+    timings = preload()
+    assert set(timings) == set(HEAVY_MODULES)
+    assert all(name in sys.modules for name in timings)
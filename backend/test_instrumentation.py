@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from app.instrumentation import (
+    UNMATCHED_ROUTE, http_request_seconds, http_requests, http_requests_in_flight, request_db_queries,
+    upstream_call, upstream_requests, upstream_seconds,
+)
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.user import User
+from app.services.plant_net_service import PlantNetService, TokenBucket
+from fake_plantnet import FakePlantNet
+
+SQUARE = "POLYGON((0 0,0 1,1 1,1 0,0 0))"
+FEATURES_ROUTE = "/api/features/"
+
+
+@pytest.fixture()
+def rows():
+    return [
+        User(id=1, email="metrics@example.com", username="metrics"),
+        Garden(id=1, name="Metered", user_id=1, boundary=SQUARE),
+        Feature(garden_id=1, user_id=1, name="Bed", color="#3a7d44", boundary=SQUARE),
+    ]
+
+
+def test_requests_are_recorded_per_route_with_db_work(client):
+    requests_before = http_requests.value(method="GET", route=FEATURES_ROUTE, status=200)
+    queries_before = request_db_queries.sum(method="GET", route=FEATURES_ROUTE)
+
+    response = client.get("/api/features/?garden_id=1")
+
+    assert response.status_code == 200
+    assert http_requests.value(method="GET", route=FEATURES_ROUTE, status=200) == requests_before + 1
+    assert http_request_seconds.count(method="GET", route=FEATURES_ROUTE) >= 1
+    # The sync endpoint's queries run in a worker thread but count towards the request
+    assert request_db_queries.sum(method="GET", route=FEATURES_ROUTE) > queries_before
+    assert http_requests_in_flight.value() == 0
+
+
+def test_path_parameters_are_labelled_by_template(client):
+    before = http_requests.value(method="GET", route="/api/gardens/{garden_id}", status=200)
+    client.get("/api/gardens/1")
+    assert http_requests.value(method="GET", route="/api/gardens/{garden_id}", status=200) == before + 1
+
+
+def test_unmatched_paths_share_one_label(client):
+    before = http_requests.value(method="GET", route=UNMATCHED_ROUTE, status=404)
+    client.get("/no/such/path/1")
+    client.get("/no/such/path/2")
+    assert http_requests.value(method="GET", route=UNMATCHED_ROUTE, status=404) == before + 2
+
+
+def test_metrics_endpoint_exposes_request_metrics(client):
+    client.get("/")
+    body = client.get("/metrics").text
+    assert 'http_requests_total{method="GET",route="/",status="200"}' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "http_request_db_queries_bucket" in body
+
+
+def test_upstream_calls_are_timed_by_status():
+    async def search():
+        fake = FakePlantNet(fail={"Failus"})
+        base_url = await fake.start()
+        try:
+            async with PlantNetService("key", base_url, TokenBucket(1000, 100), max_retries=0) as plant_net:
+                await plant_net.search_species("Okus")
+                await plant_net.search_species("Failus")
+        finally:
+            await fake.stop()
+
+    ok_before = upstream_requests.value(upstream="plantnet", status=200)
+    failed_before = upstream_requests.value(upstream="plantnet", status=500)
+    asyncio.run(search())
+    assert upstream_requests.value(upstream="plantnet", status=200) == ok_before + 1
+    assert upstream_requests.value(upstream="plantnet", status=500) == failed_before + 1
+
+    with pytest.raises(ConnectionError):
+        with upstream_call("brevo"):
+            raise ConnectionError("unreachable")
+    assert upstream_requests.value(upstream="brevo", status="error") == 1
+    assert upstream_seconds.count(upstream="brevo") == 1
@@ -0,0 +1,105 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from app.models.plant import PlantSpecies
+from app.models.zone import Zone
+from app.services.layout_service import LayoutSolver, LayoutSpecies, sun_range
+
+CELL = 0.15
+
+
+def _species():
+    return [
+        LayoutSpecies(1, 12, spacing_m=0.6, min_sun=6, companions=frozenset({2})),
+        LayoutSpecies(2, 30, spacing_m=0.3, companions=frozenset({1})),
+        LayoutSpecies(3, 20, spacing_m=0.3, max_sun=3),
+    ]
+
+
+def test_solver_respects_spacing_and_sun():
+    usable = np.ones((30, 30), dtype=bool)
+    usable[:5, :5] = False
+    sun = np.full(usable.shape, 8.0)
+    sun[:, 20:] = 2.0  # Shaded east edge
+    species = {s.species_id: s for s in _species()}
+
+    result = LayoutSolver(usable, sun, CELL, list(species.values())).solve(2000)
+
+    assert not result.unplaced
+    for species_id, row, col in result.placements:
+        assert usable[row, col]
+        assert species[species_id].min_sun <= sun[row, col] <= species[species_id].max_sun
+    for (a, r1, c1), (b, r2, c2) in combinations(result.placements, 2):
+        required = (species[a].spacing_m + species[b].spacing_m) / 2
+        assert np.hypot(r1 - r2, c1 - c2) * CELL >= required - 1e-9
+    assert result.companion_pairs >= result.greedy_companion_pairs > 0
+
+
+def test_companions_never_pull_plants_onto_unsuitable_cells():
+    usable = np.ones((10, 10), dtype=bool)
+    species = [
+        LayoutSpecies(1, 20, spacing_m=0.15, companions=frozenset({2})),
+        LayoutSpecies(2, 5, spacing_m=0.15, max_sun=3, companions=frozenset({1})),
+    ]
+    result = LayoutSolver(usable, np.full((10, 10), 8.0), CELL, species).solve(100)
+    assert result.unplaced == {2: 5}
+    assert len({(row, col) for _, row, col in result.placements}) == 20
+
+
+def test_sun_requirement_names():
+    assert sun_range("Full sun") == (6.0, float("inf"))
+    assert sun_range("partial_shade") == (3.0, 6.0)
+    assert sun_range("full shade") == (0.0, 3.0)
+    assert sun_range(None) == (0.0, float("inf"))
+
+
+@pytest.fixture()
+def rows(rows):
+    return rows + [
+        # Roughly 4 m x 4 m near 37N
+        Zone(id=1, garden_id=1, name="Bed", sun_exposure=7,
+             boundary="POLYGON((-122 37,-121.999955 37,-121.999955 37.000036,-122 37.000036,-122 37))"),
+        PlantSpecies(id=1, name="Tomato", sun_requirement="full", spacing=60, companion_plants=[2, 4]),
+        PlantSpecies(id=2, name="Basil", sun_requirement="full", spacing=25, companion_plants=[1]),
+        PlantSpecies(id=3, name="Hosta", sun_requirement="shade", spacing=45),
+        PlantSpecies(id=4, name="Fennel", sun_requirement="full", spacing=30, companion_plants=[-1]),
+    ]
+
+
+def test_zone_layout_endpoint(client):
+    response = client.post("/api/gardens/1/zones/1/layout", json={
+        "plants": [{"species_id": 1, "quantity": 6}, {"species_id": 2, "quantity": 12},
+                   {"species_id": 3, "quantity": 2}],
+    })
+    assert response.status_code == 200
+    layout = response.json()
+    placed = [p["species_id"] for p in layout["placements"]]
+    assert placed.count(1) == 6 and placed.count(2) == 12
+    # No cell has the few hours of sun a shade plant wants
+    assert layout["unplaced"] == [{"species_id": 3, "quantity": 2}]
+    assert layout["companion_pairs"] > 0
+    assert all(-122 <= p["lon"] <= -121.999955 and 37 <= p["lat"] <= 37.000036 for p in layout["placements"])
+
+    lattice = layout["lattice"]
+    shade = [[2.0] * lattice["cols"] for _ in range(lattice["rows"])]
+    shaded = client.post("/api/gardens/1/zones/1/layout", json={
+        "plants": [{"species_id": 3, "quantity": 2}], "sun_map": shade,
+    }).json()
+    assert len(shaded["placements"]) == 2
+
+    assert client.post("/api/gardens/1/zones/1/layout", json={
+        "plants": [{"species_id": 99, "quantity": 1}]}).status_code == 400
+    assert client.post("/api/gardens/1/zones/1/layout", json={
+        "plants": [{"species_id": 1, "quantity": 1}], "sun_map": [[1.0]]}).status_code == 400
+    assert client.post("/api/gardens/2/zones/1/layout", json={"plants": []}).status_code == 404
+
+
+def test_zone_layout_antagonism_overrides_companion_listing(client):
+    # Tomato lists fennel as a companion, but fennel lists tomato as one to keep apart
+    layout = client.post("/api/gardens/1/zones/1/layout", json={
+        "plants": [{"species_id": 1, "quantity": 4}, {"species_id": 4, "quantity": 4}],
+    }).json()
+    assert len(layout["placements"]) == 8
+    assert layout["companion_pairs"] == 0
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from app.services.live_updates import GardenChannel, Subscriber, hub
+
+SQUARE = "POLYGON((0 0,0 1,1 1,1 0,0 0))"
+
+
+def test_committed_changes_are_pushed(client):
+    with client.websocket_connect("/api/gardens/1/live") as websocket:
+        assert websocket.receive_json() == {"type": "subscribed", "garden_id": 1}
+        created = client.post("/api/features/bulk?garden_id=1&user_id=1", json=[
+            {"name": "Bed", "boundary": SQUARE, "color": "#3a7d44"},
+            {"name": "Path", "boundary": SQUARE, "color": "#999999"},
+        ]).json()
+        frame = websocket.receive_json()
+    assert frame["type"] == "changes"
+    assert [c["id"] for c in frame["changes"]] == [r["id"] for r in created["results"]]
+    assert frame["next"] == frame["changes"][-1]["seq"]
+    assert hub.subscriber_count() == 0
+
+
+def test_orm_writes_carry_row_data(client):
+    with client.websocket_connect("/api/gardens/1/live") as websocket:
+        websocket.receive_json()
+        client.post("/api/features/", json={"name": "Bed", "boundary": SQUARE, "color": "#3a7d44",
+                                            "garden_id": 1, "user_id": 1})
+        change = websocket.receive_json()["changes"][0]
+    assert change["op"] == "upsert" and change["data"]["name"] == "Bed"
+
+
+def test_bursts_are_coalesced_into_one_frame():
+    async def run():
+        channel = GardenChannel(1, coalesce_seconds=0.01)
+        subscriber = Subscriber(1)
+        channel.subscribers.add(subscriber)
+        channel.on_message([{"seq": 1, "entity": "feature", "id": 7, "op": "upsert", "data": None}])
+        channel.on_message([{"seq": 2, "entity": "feature", "id": 7, "op": "delete", "data": None},
+                            {"seq": 3, "entity": "zone", "id": 2, "op": "upsert", "data": None}])
+        await asyncio.sleep(0.05)
+        return [json.loads(subscriber.queue.get_nowait()) for _ in range(subscriber.queue.qsize())]
+
+    frames = asyncio.run(run())
+    assert len(frames) == 1
+    assert [(c["entity"], c["op"]) for c in frames[0]["changes"]] == [("feature", "delete"), ("zone", "upsert")]
+
+
+def test_slow_subscriber_gets_a_single_resync():
+    async def run():
+        subscriber = Subscriber(1, max_frames=2)
+        for i in range(4):
+            subscriber.offer(json.dumps({"type": "changes", "n": i}))
+        return [json.loads(subscriber.queue.get_nowait()) for _ in range(subscriber.queue.qsize())]
+
+    frames = asyncio.run(run())
+    assert frames[0] == {"type": "resync", "garden_id": 1}
+    assert [f["n"] for f in frames[1:]] == [3]
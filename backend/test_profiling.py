@@ -0,0 +1,107 @@
+import os
+import time
+
+import pytest
+
+from app.main import app
+from app.profiling import WAITING, WORKER_THREAD, ProfileStore, Sampler, profiler
+
+ADMIN = {"X-Admin-Token": "admin-secret"}
+PROFILE = {"X-Profile": "admin-secret"}
+
+
+def busy_sync(seconds: float = 0.05):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+    return {"ok": True}
+
+
+async def busy_async():
+    return busy_sync()
+
+
+app.add_api_route("/_test/busy-sync", busy_sync)
+app.add_api_route("/_test/busy-async", busy_async)
+
+
+@pytest.fixture()
+def rows():
+    return []
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path):
+    # The app's profiler was configured from the environment on import, so set it up here and restore it after
+    saved = (profiler.token, profiler.sample_rate, profiler.threshold_ms, profiler.store, profiler.sampler)
+    profiler.token = "admin-secret"
+    profiler.sample_rate = 0.0
+    profiler.threshold_ms = 500
+    profiler.store = ProfileStore(tmp_path / "profiles", 3)
+    profiler.sampler = Sampler(1)
+    yield profiler.store.directory
+    profiler.token, profiler.sample_rate, profiler.threshold_ms, profiler.store, profiler.sampler = saved
+
+
+def _stacks(client, profile_id):
+    response = client.get(f"/api/admin/profiles/{profile_id}", headers=ADMIN)
+    assert response.status_code == 200
+    return response.json()["stacks"]
+
+
+def test_header_profiles_sync_endpoint_in_worker_thread(client):
+    response = client.get("/_test/busy-sync", headers=PROFILE)
+    profile_id = response.headers["X-Profile-Id"]
+
+    stacks = _stacks(client, profile_id)
+    busy = sum(count for stack, count in stacks.items()
+               if stack.startswith(WORKER_THREAD) and "busy_sync" in stack)
+    assert busy > 0
+    assert busy > stacks.get(WAITING, 0)
+
+    folded = client.get(f"/api/admin/profiles/{profile_id}?format=folded", headers=ADMIN)
+    assert folded.status_code == 200
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in folded.text.splitlines())
+
+
+def test_header_profiles_async_endpoint_on_event_loop(client):
+    response = client.get("/_test/busy-async", headers=PROFILE)
+    stacks = _stacks(client, response.headers["X-Profile-Id"])
+    assert any("busy_async" in stack and stack.endswith(")") for stack in stacks)
+
+
+def test_requests_without_header_are_not_profiled(client):
+    before = len(client.get("/api/admin/profiles", headers=ADMIN).json())
+    response = client.get("/_test/busy-sync", headers={"X-Profile": "wrong"})
+    assert "X-Profile-Id" not in response.headers
+    assert len(client.get("/api/admin/profiles", headers=ADMIN).json()) == before
+
+
+def test_sampled_requests_are_kept_only_over_threshold(client):
+    profiler.sample_rate = 1.0
+    profiler.threshold_ms = 60_000
+    before = [p["id"] for p in client.get("/api/admin/profiles", headers=ADMIN).json()]
+    client.get("/_test/busy-sync")
+    assert [p["id"] for p in client.get("/api/admin/profiles", headers=ADMIN).json()] == before
+
+    profiler.threshold_ms = 0
+    client.get("/_test/busy-sync")
+    newest = client.get("/api/admin/profiles", headers=ADMIN).json()[0]
+    assert newest["trigger"] == "sampled"
+    assert newest["route"] == "/_test/busy-sync"
+    assert newest["status"] == 200
+
+
+def test_ring_keeps_newest_profiles(client, profile_dir):
+    ids = [client.get("/_test/busy-sync", headers=PROFILE).headers["X-Profile-Id"] for _ in range(5)]
+    listed = [p["id"] for p in client.get("/api/admin/profiles", headers=ADMIN).json()]
+    assert listed == list(reversed(ids[-3:]))
+    assert len(os.listdir(profile_dir)) == 6
+    assert client.get(f"/api/admin/profiles/{ids[0]}", headers=ADMIN).status_code == 404
+
+
+def test_admin_endpoints_need_the_token(client):
+    assert client.get("/api/admin/profiles").status_code == 403
+    assert client.get("/api/admin/profiles", headers={"X-Admin-Token": "nope"}).status_code == 403
+    assert client.get("/api/admin/profiles/../../etc", headers=ADMIN).status_code == 404
+    assert client.get("/api/admin/profiles/not-an-id", headers=ADMIN).status_code == 404
@@ -0,0 +1,62 @@
+import pytest
+
+from app.models.feature import Feature
+from app.models.garden import Garden
+from app.models.plant import Plant
+from app.models.user import User
+from app.models.zone import Zone
+from app.query_budget import QUERY_BUDGETS, assert_max_queries
+
+GARDEN_ID = 1
+
+
+@pytest.fixture()
+def rows():
+    return [
+        User(id=1, email="budget@example.com", username="budget"),
+        Garden(id=GARDEN_ID, name="Budget Garden", user_id=1, boundary="POLYGON((0 0,0 1,1 1,1 0,0 0))"),
+        *(Zone(garden_id=GARDEN_ID, name=f"Zone {i}", boundary=f"POLYGON(({i} 0,{i} 1,{i + 1} 1,{i + 1} 0,{i} 0))")
+          for i in range(5)),
+        *(Feature(garden_id=GARDEN_ID, user_id=1, name=f"Bed {i}", color="#3a7d44",
+                  boundary=f"POLYGON((0 {i / 50},0 {(i + 1) / 50},1 {(i + 1) / 50},1 {i / 50},0 {i / 50}))")
+          for i in range(50)),
+        *(Plant(garden_id=GARDEN_ID, location=f"POINT({i / 50} 0.5)") for i in range(50)),
+    ]
+
+
+@pytest.mark.parametrize("path, url", [
+    ("/api/features/", f"/api/features/?garden_id={GARDEN_ID}"),
+    ("/api/gardens/{garden_id}/zones/containing", f"/api/gardens/{GARDEN_ID}/zones/containing?lon=2.5&lat=0.5"),
+    ("/api/gardens/{garden_id}/features/intersecting", f"/api/gardens/{GARDEN_ID}/features/intersecting?bbox=0,0,0.5,0.5"),
+    ("/api/gardens/{garden_id}/plants/nearest", f"/api/gardens/{GARDEN_ID}/plants/nearest?lon=0.5&lat=0.5"),
+    ("/api/gardens/{garden_id}/changes", f"/api/gardens/{GARDEN_ID}/changes?since=0"),
+])
+def test_endpoint_within_query_budget(client, path, url):
+    with assert_max_queries(QUERY_BUDGETS[("GET", path)]):
+        response = client.get(url)
+    assert response.status_code == 200
+
+
+def test_feature_listing_pages_by_cursor(client):
+    seen, cursor = [], None
+    while True:
+        url = f"/api/features/?garden_id={GARDEN_ID}&limit=20&fields=name"
+        if cursor:
+            url += f"&cursor={cursor}"
+        with assert_max_queries(QUERY_BUDGETS[("GET", "/api/features/")]):
+            response = client.get(url)
+        page = response.json()
+        assert all(set(item) == {"id", "name"} for item in page)
+        seen.extend(item["id"] for item in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == 50 and seen == sorted(seen)
+
+
+def test_feature_listing_bbox_and_zoom(client):
+    response = client.get(f"/api/features/?garden_id={GARDEN_ID}&bbox=0,0,1,0.1&zoom=10")
+    features = response.json()
+    assert response.status_code == 200
+    assert [f["name"] for f in features] == [f"Bed {i}" for i in range(6)]
+    assert features[0]["boundary"].startswith('{"type":"Polygon"')
@@ -0,0 +1,84 @@
+import pytest
+
+from app.models.garden import Garden
+from app.models.plant import PlantSpecies
+from app.models.user import User
+from app.models.zone import Zone
+from app.services import recommendation_service
+from app.services.recommendation_service import SiteBucket, parse_hardiness_zone, zone_winter_low_f
+
+
+@pytest.fixture()
+def rows():
+    return [
+        User(id=1, email="recommend@example.com", username="recommend"),
+        Garden(id=1, name="Cold", user_id=1, climate_zone="4a"),
+        Garden(id=2, name="Warm", user_id=1, climate_zone="Zone 9b"),
+        Zone(id=1, garden_id=1, name="Sunny", sun_exposure=8, soil_ph=6.5, soil_moisture=45),
+        Zone(id=2, garden_id=2, name="Shady", sun_exposure=2, soil_ph=6.4, soil_moisture=0.62),
+        Zone(id=3, garden_id=2, name="Shady too", sun_exposure=2.2, soil_ph=6.6, soil_moisture=0.58),
+        # Temperatures in °F
+        PlantSpecies(id=1, name="Tomato", scientific_name="Solanum lycopersicum", sun_requirement="full",
+                     water_requirement="medium", min_temp=50, max_temp=95),
+        PlantSpecies(id=2, name="Hosta", sun_requirement="shade", water_requirement="high",
+                     min_temp=-40, max_temp=90),
+        PlantSpecies(id=3, name="Kale", sun_requirement="full", water_requirement="medium",
+                     min_temp=-35, max_temp=85),
+        PlantSpecies(id=4, name="Blueberry", scientific_name="Vaccinium corymbosum", sun_requirement="full",
+                     water_requirement="medium", min_temp=-20, max_temp=90),
+    ]
+
+
+def _ids(result):
+    return [plant["id"] for plant in result["plants"]]
+
+
+def test_zone_recommendations_rank_by_site(client):
+    cold = client.get("/api/gardens/1/zones/1/recommendations").json()
+    assert cold["site"] == {"climate_zone": "4a", "sun_hours": 8, "soil_ph": 6.5, "soil_moisture": 0.5}
+    # Sun-loving and happy in neutral soil first: tomato is an annual, so winters do not count
+    # against it, and kale minds the summer heat a little; blueberry wants acid soil
+    assert _ids(cold) == [1, 3, 4, 2]
+    assert cold["plants"][0]["criteria"]["cold"] == 1.0
+
+    shady = client.get("/api/gardens/2/zones/2/recommendations", params={"limit": 1}).json()
+    assert _ids(shady) == [2]
+    assert client.get("/api/gardens/1/zones/2/recommendations").status_code == 404
+
+
+def test_zones_in_one_bucket_share_a_ranking(client, seed):
+    misses = recommendation_service.recommendation_cache.value(outcome="miss")
+    first = client.get("/api/gardens/2/zones/2/recommendations").json()
+    second = client.get("/api/gardens/2/zones/3/recommendations").json()
+    assert first["site"] == second["site"] and first["plants"] == second["plants"]
+    assert recommendation_service.recommendation_cache.value(outcome="miss") == misses + 1
+
+    # A catalog change invalidates every cached ranking
+    seed(PlantSpecies(id=5, name="Fern", sun_requirement="shade", water_requirement="high", min_temp=-30))
+    assert 5 in _ids(client.get("/api/gardens/2/zones/3/recommendations").json())
+    assert recommendation_service.recommendation_cache.value(outcome="miss") == misses + 2
+
+
+def test_annuals_are_recommended_despite_frost(client, seed):
+    # Tomato and basil die at the first frost either way; they are planted after it
+    seed(PlantSpecies(id=6, name="Basil", scientific_name="Ocimum basilicum", sun_requirement="full",
+                      water_requirement="medium", min_temp=40, max_temp=95))
+    cold = client.get("/api/gardens/1/zones/1/recommendations", params={"min_score": 90}).json()
+    plants = {plant["id"]: plant for plant in cold["plants"]}
+    assert plants[1]["criteria"]["cold"] == plants[6]["criteria"]["cold"] == 1.0
+    # Perennials still have to survive the winter
+    assert 4 not in plants
+
+
+def test_site_recommendations_without_a_zone(client):
+    response = client.get("/api/plants/recommendations", params={"climate_zone": "10a", "min_score": 95})
+    assert response.status_code == 200
+    assert 3 not in _ids(response.json())  # Too hot for kale
+    assert client.get("/api/plants/recommendations", params={"climate_zone": "warm"}).status_code == 400
+
+
+def test_hardiness_zones():
+    assert parse_hardiness_zone("Zone 7b") == (7, "b")
+    assert parse_hardiness_zone("14") is None
+    assert zone_winter_low_f((7, "b")) == 5
+    assert SiteBucket.of("7B", 6.4, 6.3, 40) == SiteBucket.of("7b", 5.6, 6.4, 0.44)
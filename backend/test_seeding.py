@@ -0,0 +1,115 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.plant import PlantSpecies
+from app.models.plant_image import PlantImage
+from app.services import image_store as image_service
+from app.services.image_seeding import ImageSeeder, SeedCheckpoint
+from app.services.image_store import ImageStore, ThumbnailPipeline
+from app.services.plant_net_service import PlantNetService, TokenBucket, retry_after_delay
+from fake_plantnet import FakePlantNet
+
+PLANTS = [
+    {"common_name": f"Plant {i}", "scientific_name": f"Plantus number{i}", "categories": ["herb"]}
+    for i in range(12)
+]
+
+
+@pytest.fixture()
+def database(tmp_path, monkeypatch, seed):
+    # Seeded images go to a store under tmp_path, not the app's data directory
+    store = ImageStore(tmp_path / "image_store")
+    pipeline = ThumbnailPipeline(store, workers=1)
+    monkeypatch.setattr(image_service, "image_store", store)
+    monkeypatch.setattr(image_service, "thumbnails", pipeline)
+    # Already in the catalog under its common name
+    seed(PlantSpecies(id=1, name="Plant 0"))
+    yield
+    pipeline.shutdown()
+
+
+async def _seed(fake, checkpoint, plants=PLANTS, rate=1000.0, burst=100, concurrency=4, max_retries=0):
+    base_url = await fake.start()
+    try:
+        async with PlantNetService("key", base_url, TokenBucket(rate, burst), max_retries=max_retries) as plant_net:
+            seeder = ImageSeeder(plant_net, concurrency=concurrency, batch_size=5, images_per_plant=2,
+                                 checkpoint=checkpoint, on_progress=lambda progress: None)
+            return await seeder.run(plants)
+    finally:
+        await fake.stop()
+
+
+def test_seed_resumes_from_checkpoint(database, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    fake = FakePlantNet(fail={"Plantus number3", "Plantus number7"})
+    progress = asyncio.run(_seed(fake, SeedCheckpoint(checkpoint_path)))
+    assert (progress.seeded, progress.failed, progress.skipped, progress.images) == (10, 2, 0, 20)
+
+    db = SessionLocal()
+    assert db.query(PlantSpecies).count() == 10
+    assert db.query(PlantImage).count() == 20
+    assert db.get(PlantSpecies, 1).scientific_name is None  # matched by name, not duplicated
+    assert len(db.get(PlantSpecies, 1).images) == 2
+    assert sum(image.is_primary for image in db.get(PlantSpecies, 1).images) == 1
+    db.close()
+
+    # The rerun only fetches the plants that failed
+    fake = FakePlantNet()
+    progress = asyncio.run(_seed(fake, SeedCheckpoint(checkpoint_path)))
+    assert (progress.seeded, progress.failed, progress.skipped) == (2, 0, 10)
+    assert fake.api_calls == 2
+    db = SessionLocal()
+    assert db.query(PlantImage).count() == 24
+    db.close()
+
+
+def test_seed_honours_rate_limit_and_server_quota(database):
+    fake = FakePlantNet(quota=4)
+    started = time.monotonic()
+    progress = asyncio.run(_seed(fake, SeedCheckpoint(None), plants=PLANTS[:8], rate=20, burst=8,
+                                 concurrency=8, max_retries=3))
+    # Throttled calls are retried after Retry-After, so nothing is lost
+    assert (progress.seeded, progress.failed) == (8, 0)
+    assert fake.throttled > 0
+    assert time.monotonic() - started >= 1
+
+
+def test_failed_fetch_cancels_the_writer(database):
+    class BrokenPlantNet:
+        async def fetch_species_images(self, scientific_name, limit):
+            raise RuntimeError("connection reset")
+
+    async def run():
+        seeder = ImageSeeder(BrokenPlantNet(), concurrency=2, on_progress=lambda progress: None)
+        with pytest.raises(RuntimeError):
+            await seeder.run(PLANTS[:3])
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
+
+
+def test_retry_after_seconds_or_http_date():
+    assert retry_after_delay("3", 1) == 3
+    assert retry_after_delay(None, 4) == 4
+    assert 25 < retry_after_delay(format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True), 1) <= 30
+    assert retry_after_delay("Wed, 21 Oct 2015 07:28:00 GMT", 1) == 0
+    for unparseable in ("soon", "nan", ""):
+        assert retry_after_delay(unparseable, 2) == 2
+
+
+def test_token_bucket_spacing():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=2)
+        started = time.monotonic()
+        for _ in range(7):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two from the burst, then five at 50 per second
+    assert 0.09 <= asyncio.run(run()) < 0.5
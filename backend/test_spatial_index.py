@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+import pytest
+import shapely
+
+from app.database import SessionLocal
+from app.models.garden import Garden
+from app.models.plant import Plant
+from app.models.zone import Zone
+from app.services import spatial_index
+from app.services.spatial_index import IndexLayer
+
+
+def square(lon, lat, size):
+    return f"POLYGON(({lon} {lat},{lon + size} {lat},{lon + size} {lat + size},{lon} {lat + size},{lon} {lat}))"
+
+
+@pytest.fixture()
+def rows(rows):
+    return rows + [
+        *(Zone(id=i + 1, garden_id=1, name=f"Zone {i}", boundary=square(i, 0, 1)) for i in range(3)),
+        *(Plant(id=i + 1, garden_id=1, location=f"POINT({i + 0.5} 0.5)") for i in range(3)),
+    ]
+
+
+def _check(client, points, nearest=1):
+    response = client.post("/api/gardens/1/plants/placement", json={"points": points, "nearest": nearest})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_placement_check_locates_points(client):
+    bed = client.post("/api/features/", json={
+        "name": "Bed", "boundary": square(1.2, 0.2, 0.2), "color": "#3a7d44", "garden_id": 1, "user_id": 1
+    }).json()["id"]
+
+    result = _check(client, [[0.4, 0.5], [1.3, 0.3], [5, 5]], nearest=2)
+    assert [r["zone_id"] for r in result] == [1, 2, None]
+    assert [r["feature_ids"] for r in result] == [[], [bed], []]
+    assert [p["id"] for p in result[0]["nearest_plants"]] == [1, 2]
+    # 0.1 degrees of longitude at 0.5N, in metres
+    assert result[0]["nearest_plants"][0]["distance_m"] == pytest.approx(11_132, rel=0.01)
+    assert client.post("/api/gardens/9/plants/placement", json={"points": []}).status_code == 404
+    for bad in ("[[NaN, 37.0]]", "[[0.5, Infinity]]", "[[181, 0]]", "[[0, -91]]", "[[0.5]]"):
+        response = client.post("/api/gardens/1/plants/placement", content=f'{{"points": {bad}}}',
+                               headers={"Content-Type": "application/json"})
+        assert response.status_code == 422
+
+
+def test_nearest_plants_rank_by_metres(client, seed):
+    # At 60N a degree of longitude is half as long as a degree of latitude
+    seed(Garden(id=2, name="North", user_id=1),
+         Plant(id=10, garden_id=2, location="POINT(10.015 60)"),  # ~835 m east
+         Plant(id=11, garden_id=2, location="POINT(10 60.01)"))  # ~1113 m north
+    response = client.post("/api/gardens/2/plants/placement", json={"points": [[10, 60]], "nearest": 1})
+    near = response.json()[0]["nearest_plants"]
+    assert [p["id"] for p in near] == [10]
+    assert near[0]["distance_m"] == pytest.approx(835, rel=0.01)
+
+
+def test_index_follows_writes_without_rebuilding(client):
+    _check(client, [[0.5, 0.5]])
+    builds = spatial_index.index_builds.value(layer="zone", reason="load")
+
+    db = SessionLocal()
+    db.get(Zone, 1).boundary = square(10, 10, 1)
+    db.delete(db.get(Plant, 1))
+    db.add(Zone(id=4, garden_id=1, name="New", boundary=square(0, 0, 0.8)))
+    db.commit()
+    db.close()
+
+    result = _check(client, [[0.5, 0.5], [10.5, 10.5]])
+    assert [r["zone_id"] for r in result] == [4, 1]
+    assert result[0]["nearest_plants"][0]["id"] == 2
+    assert spatial_index.index_builds.value(layer="zone", reason="load") == builds
+
+
+def test_layer_queries_match_brute_force():
+    random.seed(7)
+    geometries = shapely.points(np.random.default_rng(7).random((2000, 2)))
+    layer = IndexLayer("plant", range(2000), geometries)
+    # Move and delete some rows so the delta and the stale mask are both exercised
+    for row_id in random.sample(range(2000), 30):
+        layer.upsert(row_id, shapely.Point(random.random(), random.random()))
+    for row_id in random.sample(range(2000), 30):
+        layer.remove(row_id)
+
+    current = {row_id: layer._geometries[row_id] for row_id in layer._geometries}
+    ids = np.array(list(current))
+    points = shapely.points(np.random.default_rng(8).random((50, 2)))
+    for point, hits in zip(points, layer.nearest(points, 5)):
+        distances = shapely.distance(point, np.array(list(current.values()), dtype=object))
+        expected = ids[np.argsort(distances, kind="stable")[:5]].tolist()
+        assert [row_id for row_id, _ in hits] == expected
+
+    box = shapely.box(0.2, 0.2, 0.4, 0.4)
+    _, found = layer.query(np.array([box]), "intersects")
+    assert sorted(found.tolist()) == sorted(i for i, g in current.items() if box.intersects(g))
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from analyze_storage import StorageAnalyzer
+from app.models.plant import PlantSpecies
+from app.models.plant_image import PlantImage
+from app.services.image_store import ImageStore
+
+
+@pytest.fixture()
+def analyzer(tmp_path, seed):
+    store = ImageStore(tmp_path / "store")
+    basil, _ = store.put(b"basil" * 1000)
+    tomato, _ = store.put(b"tomato" * 2000)
+    store.put(b"orphan" * 10)
+    for digest in (basil, tomato):
+        path = store.thumbnail_path(digest, 128, "webp")
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"t" * 100)
+    # A copy left behind by the old timestamp-named downloads
+    legacy = store.root / "legacy"
+    legacy.mkdir()
+    (legacy / "Basil_20250101_120000.jpg").write_bytes(b"basil" * 1000)
+
+    seed(PlantSpecies(id=1, name="Basil", scientific_name="Ocimum basilicum"),
+         PlantSpecies(id=2, name="Tomato"),
+         PlantImage(plant_species_id=1, content_hash=basil),
+         PlantImage(plant_species_id=2, content_hash=tomato))
+
+    plant_list = tmp_path / "plants.json"
+    plant_list.write_text(json.dumps({
+        "herbs": [{"common_name": "Basil", "scientific_name": "Ocimum basilicum"}],
+        "vegetables": [{"common_name": "Tomato", "scientific_name": "Solanum lycopersicum"},
+                       {"common_name": "Carrot", "scientific_name": "Daucus carota"}],
+    }))
+    return StorageAnalyzer(store, tmp_path / "report", plant_list, workers=4)
+
+
+def test_storage_report(analyzer):
+    analysis = analyzer.analyze()
+    summary = analysis["summary"]
+    assert summary["total_files"] == 6
+    assert (summary["total_images"], summary["total_thumbnails"], summary["other_files"]) == (3, 2, 1)
+    assert (summary["duplicate_files"], summary["duplicated_digests"]) == (1, 1)
+    categories = analysis["categories"]
+    # Originals, thumbnails and the legacy copy all count towards their plant's category
+    assert (categories["herbs"]["num_files"], categories["herbs"]["num_images"]) == (3, 1)
+    assert (categories["vegetables"]["num_files"], categories["vegetables"]["num_images"]) == (2, 1)
+    assert categories["unreferenced"]["num_images"] == 1
+    assert analysis["growth"]["plants_without_images"] == 1
+    assert analysis["growth"]["projected_mb"]["365_days"] > summary["total_storage_mb"]
+    assert json.loads(analyzer.storage_report_path.read_text())["summary"] == summary
+
+
+def test_rerun_rescans_only_changed_directories(analyzer):
+    first = analyzer.analyze()
+    assert first["scan"]["rescanned_directories"] == first["scan"]["directories"] - 3
+
+    again = analyzer.analyze()
+    assert again["scan"]["rescanned_directories"] == 0
+    assert again["summary"] == first["summary"]
+    assert len(again["history"]) == 2
+
+    analyzer.store.put(b"new image" * 300)
+    (analyzer.store.root / "legacy" / "Basil_20250101_120000.jpg").unlink()
+    third = analyzer.analyze()
+    # The new image's leaf directory (and any new parent), plus the legacy directory
+    assert 2 <= third["scan"]["rescanned_directories"] <= 4
+    assert third["summary"]["total_images"] == 4
+    assert third["summary"]["duplicate_files"] == 0
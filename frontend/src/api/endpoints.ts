@@ -4,6 +4,7 @@ const API_ENDPOINTS = {
   GARDEN_BY_ID: (id: number) => `/gardens/${id}`,
   GARDEN_SATELLITE: (id: number) => `/gardens/${id}/satellite`,
   GARDEN_GRID: (id: number) => `/gardens/${id}/grid`,
+  GARDEN_CHANGES: (id: number) => `/gardens/${id}/changes`,
   
   // Zone endpoints
   ZONES: (gardenId: number) => `/gardens/${gardenId}/zones`,
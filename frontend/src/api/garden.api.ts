@@ -1,4 +1,4 @@
-import type { Garden, GridSystem } from '../types/garden';
+import type { Garden, GardenChanges, GridSystem } from '../types/garden';
 import apiClient from './apiClient';
 import API_ENDPOINTS from './endpoints';
 
@@ -38,4 +38,11 @@ export class GardenAPI {
     });
     return response.data;
   }
+
+  static async getGardenChanges(id: number, since: number): Promise<GardenChanges> {
+    const response = await apiClient.get(API_ENDPOINTS.GARDEN_CHANGES(id), {
+      params: { since }
+    });
+    return response.data;
+  }
 }
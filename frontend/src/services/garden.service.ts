@@ -28,7 +28,7 @@ export const gardenService = {
     return response.json();
   },
 
-  async resizeGardenGrid(id: number, rows: number, cols: number): Promise<{ message: string; new_dimensions: { rows: number; cols: number } }> {
+  async resizeGardenGrid(id: number, rows: number, cols: number): Promise<{ message: string; rows: number; cols: number }> {
     const response = await fetch(`${API_BASE}/gardens/${id}/grid/resize`, {
       method: 'PUT',
       headers: {
@@ -46,3 +46,20 @@ export interface GridSystem {
     height_feet: number;
   };
 }
+
+export interface GardenChange {
+  seq: number;
+  entity: 'feature' | 'zone' | 'plant';
+  id: number;
+  op: 'upsert' | 'delete';
+  data: Record<string, unknown> | null;
+}
+
+export interface GardenChanges {
+  garden_id: number;
+  since: number;
+  next: number;        // pass as `since` on the next poll
+  has_more: boolean;
+  reset: boolean;      // history was compacted past `since`: reload the garden
+  changes: GardenChange[];
+}
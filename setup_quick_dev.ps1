@@ -43,10 +43,9 @@ if (-not (Test-Path "venv\Scripts\uvicorn.exe")) {
 # Create database tables
 Write-Host "Setting up SQLite database..." -ForegroundColor Yellow
 .\venv\Scripts\python.exe -c "
-from app.database import create_tables, engine
-from app.models import garden, plant, user, zone, watering, weather
+from app.database import run_migrations
 print('Creating database tables...')
-create_tables()
+run_migrations()
 print('Database setup complete!')
 print(f'SQLite database created at: garden_planner.db')
 "